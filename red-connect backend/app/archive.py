@@ -0,0 +1,374 @@
+"""
+Archive of closed years of donations and events.
+
+Almost every query filters on recent dates, so the hot tables only need the
+current year and the last ``ARCHIVE_HOT_YEARS`` closed years. ``archive_years``
+moves older years out of them into gzip-compressed NDJSON files under
+``ARCHIVE_DIR`` (``donations/2019.ndjson.gz``, ...) and records each year in
+``manifest.json`` with its row count and per-month aggregates. An event
+stays in the table while a donation from another year still references it.
+Certificates are not archived: donors look theirs up by id and number long
+after the donation, so ``certificates.donation_id`` carries no foreign key and
+may refer to an archived donation. Per-donor totals of the moved donations are
+kept in ``archived_donation_totals`` so the donor counters can still be
+rebuilt.
+
+Readers (``iter_rows`` and ``monthly_totals``) combine both sources: the
+archived years' files (or manifest aggregates) and whatever is still, or
+again, in the tables. A year is marked pending in the manifest while it is
+being moved and readers use only the tables for it, so an interrupted run
+never returns a row twice; ``archivable_years`` picks it up again and the
+next run finishes the move.
+"""
+import gzip
+import heapq
+import os
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import orjson
+from sqlalchemy import and_, case, delete, exists, func, insert, not_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app import partitioning
+from app.config import settings
+from app.models import (
+    ArchivedDonationTotal,
+    Donation,
+    DonationStatus,
+    Event,
+    EventRegistration,
+    Notification,
+)
+
+# Tables readable through the archive: name -> (model, date column)
+ARCHIVED_TABLES = {
+    "donations": (Donation, Donation.donation_date),
+    "events": (Event, Event.event_date),
+}
+
+_COUNTED_STATUSES = {status.value for status in DonationStatus if status != DonationStatus.CANCELLED}
+
+
+class ArchiveStore:
+    """Archive files and their manifest under ``root``."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._manifest = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, "manifest.json")
+
+    def manifest(self) -> dict:
+        """``{table: {year: entry}}``, re-read when the file changes (e.g. after an archive run)."""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        with self._lock:
+            if mtime != self._mtime:
+                with open(self.manifest_path, "rb") as f:
+                    self._manifest = orjson.loads(f.read())
+                self._mtime = mtime
+            return self._manifest
+
+    def years(self, table: str) -> Dict[int, dict]:
+        return {int(year): entry for year, entry in self.manifest().get(table, {}).items()}
+
+    def record(self, table: str, year: int, entry: dict) -> None:
+        manifest = dict(self.manifest())
+        manifest[table] = {**manifest.get(table, {}), str(year): entry}
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(orjson.dumps(manifest, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+        os.replace(tmp, self.manifest_path)
+
+    def path(self, table: str, year: int) -> str:
+        return os.path.join(self.root, table, f"{year}.ndjson.gz")
+
+    def write(self, table: str, year: int, rows: Iterable[dict]) -> int:
+        """Replace the year's file with ``rows``; returns the number written."""
+        path = self.path(table, year)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        count = 0
+        with gzip.open(path + ".tmp", "wb") as out:
+            for row in rows:
+                out.write(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE))
+                count += 1
+        os.replace(path + ".tmp", path)
+        return count
+
+    def read(self, table: str, year: int) -> Iterator[dict]:
+        path = self.path(table, year)
+        if not os.path.exists(path):
+            return
+        with gzip.open(path, "rb") as f:
+            for line in f:
+                yield orjson.loads(line)
+
+
+archive_store = ArchiveStore(settings.ARCHIVE_DIR)
+
+
+def _status(value) -> str:
+    # Enum members from the hot tables, plain values from the files
+    return getattr(value, "value", value)
+
+
+def _day(value) -> str:
+    # Hot rows carry date objects, archived rows ISO strings
+    return value.isoformat() if isinstance(value, date) else str(value)
+
+
+# -- archiving ---------------------------------------------------------------
+
+
+def _year_range(column, year: int):
+    return and_(column >= date(year, 1, 1), column < date(year + 1, 1, 1))
+
+
+def _merged(store: ArchiveStore, table: str, year: int, moving_ids: set, hot_rows: Iterable[dict],
+            date_key: str) -> Iterator[dict]:
+    """Rows already archived for the year (minus ones being moved again) merged with ``hot_rows``."""
+    previous = (row for row in store.read(table, year) if row["id"] not in moving_ids)
+    return heapq.merge(previous, hot_rows, key=lambda row: (_day(row[date_key]), row["id"]))
+
+
+def _chunks(ids: List[int], size: int):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def archive_year(bind: Engine, year: int, store: Optional[ArchiveStore] = None,
+                 batch_size: int = 5000) -> Dict[str, int]:
+    """Move one closed year out of the hot tables; returns rows moved per table."""
+    store = store or archive_store
+    in_year = _year_range(Donation.donation_date, year)
+    filters = {
+        "donations": in_year,
+        # An event stays while a donation from another year still references it
+        "events": and_(
+            _year_range(Event.event_date, year),
+            ~exists().where(Donation.event_id == Event.id, not_(in_year)),
+        ),
+    }
+    models = {"donations": Donation, "events": Event}
+    date_keys = {"donations": "donation_date", "events": "event_date"}
+
+    # Only the rows selected here are written and deleted, whatever is inserted meanwhile.
+    with bind.connect() as conn:
+        ids = {
+            table: [row_id for (row_id,) in conn.execute(select(model.id).where(filters[table]))]
+            for table, model in models.items()
+        }
+
+    # Readers ignore a pending year's files and read only the tables.
+    previous = {table: store.years(table).get(year) for table in models}
+    for table in models:
+        store.record(table, year, {**(previous[table] or {"rows": 0, "monthly": {}}), "pending": True})
+
+    entries, totals = {}, {}
+    archived_at = datetime.utcnow().isoformat(timespec="seconds")
+    for table, model in models.items():
+        months = {}
+        moving = set(ids[table])
+
+        def tally(rows, table=table, months=months):
+            for row in rows:
+                month = months.setdefault(_day(row[date_keys[table]])[:7], _empty_month(table))
+                _add_to_month(table, month, row)
+                if table == "donations" and _status(row["status"]) in _COUNTED_STATUSES:
+                    donor = totals.setdefault(row["donor_id"], [0, None])
+                    donor[0] += 1
+                    donor[1] = max(donor[1] or "", _day(row["donation_date"]))
+                yield row
+
+        with bind.connect() as conn:
+            hot_rows = conn.execute(
+                select(model.__table__).where(filters[table]).order_by(
+                    getattr(model, date_keys[table]), model.id
+                ).execution_options(yield_per=batch_size)
+            ).mappings()
+            rows = _merged(store, table, year, moving,
+                           (dict(row) for row in hot_rows if row["id"] in moving), date_keys[table])
+            count = store.write(table, year, tally(rows))
+        entries[table] = {"rows": count, "archived_at": archived_at, "monthly": months, "pending": False}
+
+    with bind.begin() as conn:
+        # Totals are per year and rebuilt from the whole file, so a re-run replaces them.
+        conn.execute(delete(ArchivedDonationTotal).where(ArchivedDonationTotal.year == year))
+        if totals:
+            conn.execute(insert(ArchivedDonationTotal), [
+                {"donor_id": donor_id, "year": year, "donations": count,
+                 "last_donation_date": date.fromisoformat(last)}
+                for donor_id, (count, last) in totals.items()
+            ])
+        for chunk in _chunks(ids["events"], batch_size):
+            conn.execute(delete(Notification).where(Notification.event_id.in_(chunk)))
+            conn.execute(delete(EventRegistration).where(EventRegistration.event_id.in_(chunk)))
+        for table in ("donations", "events"):
+            model = models[table]
+            for chunk in _chunks(ids[table], batch_size):
+                conn.execute(delete(model).where(model.id.in_(chunk)))
+
+    for table, entry in entries.items():
+        store.record(table, year, entry)
+
+    if partitioning.supported(bind):
+        with bind.connect() as conn:
+            for table in partitioning.PARTITIONED_TABLES:
+                partitioning.drop_empty_year_partition(conn, table, year)
+    return {table: len(table_ids) for table, table_ids in ids.items()}
+
+
+def archivable_years(bind: Engine, before_year: int, store: Optional[ArchiveStore] = None) -> List[int]:
+    """Years before ``before_year`` with donations or events in the hot tables, plus interrupted runs."""
+    store = store or archive_store
+    years = {
+        year for table in ARCHIVED_TABLES
+        for year, entry in store.years(table).items() if entry.get("pending")
+    }
+    with bind.connect() as conn:
+        for model, column in ARCHIVED_TABLES.values():
+            year = func.extract("year", column)
+            years.update(int(y) for (y,) in conn.execute(
+                select(year).where(column < date(before_year, 1, 1)).group_by(year)
+            ))
+    return sorted(years)
+
+
+def archive_years(bind: Engine, years: Iterable[int], store: Optional[ArchiveStore] = None,
+                  batch_size: int = 5000) -> Dict[int, Dict[str, int]]:
+    """Archive several years, oldest first; returns rows moved per year and table."""
+    return {year: archive_year(bind, year, store, batch_size=batch_size) for year in sorted(years)}
+
+
+# -- reading ---------------------------------------------------------------
+
+
+def _empty_month(table: str) -> dict:
+    if table == "donations":
+        return {"donations": 0, "completed": 0, "units": 0.0}
+    return {"events": 0, "participants": 0}
+
+
+def _add_to_month(table: str, month: dict, row: dict) -> None:
+    if table == "donations":
+        month["donations"] += 1
+        month["completed"] += _status(row["status"]) == DonationStatus.COMPLETED.value
+        month["units"] += row["units"] or 0.0
+    else:
+        month["events"] += 1
+        month["participants"] += row["registered_participants"] or 0
+
+
+def _archived_years(store: ArchiveStore, table: str, from_date: Optional[date], to_date: Optional[date]) -> Dict[int, dict]:
+    return {
+        year: entry for year, entry in store.years(table).items()
+        if not entry.get("pending")
+        and (from_date is None or year >= from_date.year) and (to_date is None or year <= to_date.year)
+    }
+
+
+def _date_range(column, from_date: Optional[date], to_date: Optional[date]):
+    conditions = []
+    if from_date:
+        conditions.append(column >= from_date)
+    if to_date:
+        conditions.append(column <= to_date)
+    return conditions
+
+
+def iter_rows(db: Session, table: str, columns: List, from_date: Optional[date] = None,
+              to_date: Optional[date] = None, store: Optional[ArchiveStore] = None,
+              batch_size: int = 1000) -> Iterator[dict]:
+    """Rows of ``table`` dated within the range as dicts of ``columns``, hot and archived, by date then id."""
+    store = store or archive_store
+    model, column = ARCHIVED_TABLES[table]
+    keys = [c.key for c in columns]
+    date_key, low, high = column.key, _day(from_date) if from_date else None, _day(to_date) if to_date else None
+
+    hot = db.query(*columns).filter(
+        *_date_range(column, from_date, to_date)
+    ).order_by(column, model.id).yield_per(batch_size)
+
+    def archived():
+        for year in sorted(_archived_years(store, table, from_date, to_date)):
+            for row in store.read(table, year):
+                day = row[date_key]
+                if (low is None or day >= low) and (high is None or day <= high):
+                    yield {key: row.get(key) for key in keys}
+
+    return heapq.merge(archived(), (row._asdict() for row in hot), key=lambda row: (_day(row[date_key]), row["id"]))
+
+
+def _hot_monthly_columns(table: str) -> list:
+    if table == "donations":
+        return [
+            func.count(Donation.id).label("donations"),
+            func.sum(case((Donation.status == DonationStatus.COMPLETED, 1), else_=0)).label("completed"),
+            func.coalesce(func.sum(Donation.units), 0).label("units"),
+        ]
+    return [
+        func.count(Event.id).label("events"),
+        func.coalesce(func.sum(Event.registered_participants), 0).label("participants"),
+    ]
+
+
+def monthly_totals(db: Session, table: str, from_date: Optional[date] = None, to_date: Optional[date] = None,
+                   store: Optional[ArchiveStore] = None) -> List[dict]:
+    """Per-month aggregates of ``table`` over whole months, archived months from the manifest."""
+    store = store or archive_store
+    model, column = ARCHIVED_TABLES[table]
+    if from_date:
+        from_date = from_date.replace(day=1)
+    if to_date:
+        # Through the end of to_date's month
+        next_month = date(to_date.year + to_date.month // 12, to_date.month % 12 + 1, 1)
+        to_date = date.fromordinal(next_month.toordinal() - 1)
+    low, high = (from_date.isoformat()[:7] if from_date else None), (to_date.isoformat()[:7] if to_date else None)
+
+    months: Dict[str, dict] = {}
+    for entry in _archived_years(store, table, from_date, to_date).values():
+        for month, totals in entry.get("monthly", {}).items():
+            if (low is None or month >= low) and (high is None or month <= high):
+                merged = months.setdefault(month, _empty_month(table))
+                for key, value in totals.items():
+                    merged[key] += value
+
+    row_year, row_month = func.extract("year", column), func.extract("month", column)
+    hot = db.query(row_year, row_month, *_hot_monthly_columns(table)).filter(
+        *_date_range(column, from_date, to_date)
+    ).group_by(row_year, row_month)
+    for row in hot:
+        values = row._asdict()
+        key = f"{int(row[0]):04d}-{int(row[1]):02d}"
+        merged = months.setdefault(key, _empty_month(table))
+        for name in merged:
+            merged[name] += values[name] or 0
+
+    return [{"month": key, **months[key]} for key in sorted(months)]
+
+
+def export_ndjson(session_factory, table: str, columns: List, from_date: Optional[date] = None,
+                  to_date: Optional[date] = None, chunk_rows: int = 1000) -> Iterator[bytes]:
+    """NDJSON body for ``iter_rows``, in chunks; opens its own session since it outlives the request handler."""
+    db = session_factory()
+    try:
+        lines = []
+        for row in iter_rows(db, table, columns, from_date, to_date):
+            lines.append(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE))
+            if len(lines) >= chunk_rows:
+                yield b"".join(lines)
+                lines = []
+        if lines:
+            yield b"".join(lines)
+    finally:
+        db.close()
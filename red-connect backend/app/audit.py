@@ -0,0 +1,217 @@
+"""
+Audit log of changes to donations, certificates and blood stock.
+
+Changes are captured from the ORM: a ``before_flush`` listener on
+``SessionLocal`` sessions records each insert, update (changed columns only,
+as ``[old, new]``) and delete of an ``AUDITED_MODELS`` object, with the user
+``get_current_user`` authenticated on that session. Entries are held on the
+session until it commits, then put on an in-process queue; a rolled-back
+transaction records nothing. Writes made with Core statements or bulk
+``Query.update()`` (such as the batch expiry sweep) bypass the session and
+are not audited.
+
+``AuditWriter`` drains the queue on a background thread and inserts entries
+with one executemany per batch: as soon as ``AUDIT_BATCH_SIZE`` are waiting,
+or ``AUDIT_FLUSH_SECONDS`` after the oldest one arrived. The queue holds at
+most ``AUDIT_MAX_BUFFER`` entries; when the database cannot keep up, further
+entries are dropped and counted in ``stats["dropped"]`` rather than slowing
+down requests.
+"""
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import orjson
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models import AuditLog, BloodBatch, BloodInventory, Certificate, Donation
+
+logger = logging.getLogger(__name__)
+
+AUDITED_MODELS = (Donation, Certificate, BloodInventory, BloodBatch)
+
+_ACTOR = "audit_actor_user_id"
+_PENDING = "audit_pending"
+
+
+def set_actor(db: Session, user_id: int) -> None:
+    """Attribute the session's audited changes to ``user_id``."""
+    db.info[_ACTOR] = user_id
+
+
+def _columns(obj) -> dict:
+    """Loaded, non-null column values (never triggers a load)."""
+    state = inspect(obj)
+    columns = state.mapper.column_attrs
+    return {key: value for key, value in state.dict.items() if key in columns and value is not None}
+
+
+def _changed(obj) -> dict:
+    changes = {}
+    state = inspect(obj)
+    for key in state.mapper.column_attrs.keys():
+        history = state.attrs[key].history
+        if history.added:
+            old = history.deleted[0] if history.deleted else None
+            if old != history.added[0]:
+                changes[key] = [old, history.added[0]]
+    return changes
+
+
+def _record(session: Session, flush_context, instances) -> None:
+    """``before_flush``: note the session's pending changes to audited objects."""
+    now = datetime.utcnow()
+    actor = session.info.get(_ACTOR)
+    pending = session.info.setdefault(_PENDING, [])
+
+    def add(obj, action: str, changes: dict) -> None:
+        pending.append({
+            "created_at": now,
+            "actor_user_id": actor,
+            "entity": obj.__tablename__,
+            "entity_id": getattr(obj, "id", None),
+            "action": action,
+            "changes": changes,
+            # New rows get their id during the flush; read it at commit
+            "obj": obj if action == "insert" else None,
+        })
+
+    for obj in session.new:
+        if isinstance(obj, AUDITED_MODELS):
+            add(obj, "insert", _columns(obj))
+    for obj in session.dirty:
+        if isinstance(obj, AUDITED_MODELS):
+            changes = _changed(obj)
+            if changes:
+                add(obj, "update", changes)
+    for obj in session.deleted:
+        if isinstance(obj, AUDITED_MODELS):
+            add(obj, "delete", _columns(obj))
+
+
+def _commit(session: Session) -> None:
+    """``after_commit``: hand the committed entries to the writer."""
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    for entry in pending:
+        obj = entry.pop("obj")
+        if obj is not None:
+            state = inspect(obj)
+            if not state.has_identity:
+                # Inserted in a savepoint that was rolled back
+                continue
+            entry["entity_id"] = state.identity[0]
+        audit_writer.submit(entry)
+
+
+def _rollback(session: Session, previous_transaction) -> None:
+    """``after_soft_rollback``: forget the entries of a rolled-back transaction."""
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+
+class AuditWriter:
+    """Bulk-inserts queued audit entries from a background thread."""
+
+    def __init__(self, bind: Engine, batch_size: int = 500, flush_seconds: float = 1.0, max_buffer: int = 10000):
+        self.bind = bind
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=max_buffer)
+        self.stats = {"written": 0, "batches": 0, "dropped": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, entry: dict) -> None:
+        """Queue an entry without blocking; counted as dropped when the buffer is full."""
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._stats_lock:
+                self.stats["dropped"] += 1
+
+    @property
+    def buffered(self) -> int:
+        return self._queue.qsize()
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Write what is queued, then stop."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run(self) -> None:
+        batch: List[dict] = []
+        deadline = 0.0
+        while True:
+            wait = max(deadline - time.monotonic(), 0.0) if batch else self.flush_seconds
+            try:
+                entry = self._queue.get(timeout=0.0 if self._stop.is_set() else wait)
+            except queue.Empty:
+                entry = None
+            if entry is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_seconds
+                batch.append(entry)
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline or self._stop.is_set()):
+                self.write(batch)
+                batch = []
+            if self._stop.is_set() and entry is None:
+                return
+
+    def write(self, batch: List[dict]) -> None:
+        """Insert a batch with one executemany (JSON encoding happens here, off the request threads)."""
+        rows = [{**entry, "changes": orjson.dumps(entry["changes"], default=str).decode()} for entry in batch]
+        try:
+            with self.bind.begin() as conn:
+                conn.execute(insert(AuditLog), rows)
+        except Exception as e:
+            logger.error(f"❌ Audit log write of {len(rows)} entries failed: {e}")
+            with self._stats_lock:
+                self.stats["failed"] += len(rows)
+            return
+        with self._stats_lock:
+            self.stats["written"] += len(rows)
+            self.stats["batches"] += 1
+
+
+def changes_of(row) -> Dict:
+    """Decoded ``changes`` of an audit log row."""
+    return orjson.loads(row.changes)
+
+
+audit_writer = AuditWriter(
+    engine,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_seconds=settings.AUDIT_FLUSH_SECONDS,
+    max_buffer=settings.AUDIT_MAX_BUFFER,
+)
+
+if settings.AUDIT_ENABLED:
+    event.listen(SessionLocal, "before_flush", _record)
+    event.listen(SessionLocal, "after_commit", _commit)
+    event.listen(SessionLocal, "after_soft_rollback", _rollback)
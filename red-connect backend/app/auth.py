@@ -2,28 +2,36 @@ from datetime import datetime, timedelta
 from typing import Optional
 import jwt
 from jwt import PyJWTError
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager, joinedload
 from app.config import settings
 from app.database import get_db
-from app.models import User
+from app.audit import set_actor
+from app.models import User, Donor, Organizer, UserRole
 from app.schemas import TokenData
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing (passlib/bcrypt are imported on first use to keep worker startup fast)
+_pwd_context = None
+
+def get_pwd_context():
+    """Return the shared CryptContext, creating it on first use."""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Hash a password."""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
@@ -37,6 +45,15 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def token_claims(user: User) -> dict:
+    """Claims for a user's access token, including their donor/organizer profile id."""
+    claims = {"sub": user.email, "user_id": user.id, "role": user.role}
+    if user.role == UserRole.DONOR and user.donor_profile is not None:
+        claims["donor_id"] = user.donor_profile.id
+    elif user.role == UserRole.ORGANIZER and user.organizer_profile is not None:
+        claims["organizer_id"] = user.organizer_profile.id
+    return claims
+
 def decode_access_token(token: str) -> TokenData:
     """Decode and verify a JWT token."""
     try:
@@ -44,6 +61,8 @@ def decode_access_token(token: str) -> TokenData:
         email: str = payload.get("sub")
         user_id: int = payload.get("user_id")
         role: str = payload.get("role")
+        donor_id: Optional[int] = payload.get("donor_id")
+        organizer_id: Optional[int] = payload.get("organizer_id")
         
         if email is None:
             raise HTTPException(
@@ -52,7 +71,7 @@ def decode_access_token(token: str) -> TokenData:
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        return TokenData(email=email, user_id=user_id, role=role)
+        return TokenData(email=email, user_id=user_id, role=role, donor_id=donor_id, organizer_id=organizer_id)
     except PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -64,10 +83,28 @@ def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ) -> User:
-    """Get the current authenticated user."""
+    """Get the current authenticated user, with their donor/organizer profile loaded in the same query."""
     token_data = decode_access_token(token)
     
-    user = db.query(User).filter(User.email == token_data.email).first()
+    query = db.query(User)
+    # Newer tokens carry the profile id, so the profile is joined by primary key;
+    # older ones fall back to a left join on user_id.
+    if token_data.donor_id is not None:
+        query = query.join(User.donor_profile).filter(
+            Donor.id == token_data.donor_id
+        ).options(contains_eager(User.donor_profile))
+    elif token_data.organizer_id is not None:
+        query = query.join(User.organizer_profile).filter(
+            Organizer.id == token_data.organizer_id
+        ).options(contains_eager(User.organizer_profile))
+    elif token_data.role == UserRole.DONOR:
+        query = query.options(joinedload(User.donor_profile))
+    elif token_data.role == UserRole.ORGANIZER:
+        query = query.options(joinedload(User.organizer_profile))
+    
+    if token_data.user_id is not None:
+        query = query.filter(User.id == token_data.user_id)
+    user = query.filter(User.email == token_data.email).first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -81,6 +118,8 @@ def get_current_user(
             detail="Inactive user"
         )
     
+    # Changes made on this request's session are audited as this user's
+    set_actor(db, user.id)
     return user
 
 def get_current_donor(current_user: User = Depends(get_current_user)) -> User:
@@ -101,3 +140,20 @@ def get_current_organizer(current_user: User = Depends(get_current_user)) -> Use
         )
     return current_user
 
+def get_current_donor_profile(current_user: User = Depends(get_current_donor)) -> Donor:
+    """Get the current donor's profile (loaded together with the user)."""
+    if current_user.donor_profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Donor profile not found"
+        )
+    return current_user.donor_profile
+
+def get_current_organizer_profile(current_user: User = Depends(get_current_organizer)) -> Organizer:
+    """Get the current organizer's profile (loaded together with the user)."""
+    if current_user.organizer_profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Organizer profile not found"
+        )
+    return current_user.organizer_profile
@@ -0,0 +1,204 @@
+"""
+iCalendar (RFC 5545) feed of upcoming events.
+
+Calendar clients poll a subscription URL every few minutes, so the rendered
+feed is cached per (city, state) filter together with its ETag and
+Last-Modified values; a poll is then a dictionary lookup, or a ``304`` when
+the client already has the current version. Event writes in this process
+expire the cache immediately; other workers pick changes up when their entry
+expires after ``CALENDAR_CACHE_TTL_SECONDS``.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.config import settings
+from app.models import Event
+
+PRODID = "-//Red Connect//Blood Donation Camps//EN"
+UID_DOMAIN = "redconnect"
+# Events per feed; calendar clients only care about the near future
+MAX_EVENTS = 1000
+
+FEED_COLUMNS = [
+    Event.id, Event.title, Event.description, Event.event_date, Event.start_time, Event.end_time,
+    Event.venue, Event.city, Event.state, Event.status, Event.updated_at,
+]
+
+
+class Feed(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: datetime
+    expires: float
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> bytes:
+    """Split a content line into 75-octet chunks, continuation lines starting with a space."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return data + b"\r\n"
+    chunks, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        # Do not cut a UTF-8 sequence in half
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        chunks.append(data[start:end])
+        start, limit = end, 74
+    return b"\r\n ".join(chunks) + b"\r\n"
+
+
+def _parse_time(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    try:
+        hour, minute = value.split(":")[:2]
+        return int(hour), int(minute)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _stamp(value: datetime) -> str:
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def _event_lines(event, now: datetime) -> list:
+    start, end = _parse_time(event.start_time), _parse_time(event.end_time)
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:event-{event.id}@{UID_DOMAIN}",
+        f"DTSTAMP:{_stamp(event.updated_at or now)}",
+        f"LAST-MODIFIED:{_stamp(event.updated_at or now)}",
+    ]
+    day = event.event_date
+    if start:
+        # Floating local times: a camp starts at 09:00 wherever it is held
+        lines.append(f"DTSTART:{day:%Y%m%d}T{start[0]:02d}{start[1]:02d}00")
+        if end and end > start:
+            lines.append(f"DTEND:{day:%Y%m%d}T{end[0]:02d}{end[1]:02d}00")
+    else:
+        lines.append(f"DTSTART;VALUE=DATE:{day:%Y%m%d}")
+        lines.append(f"DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}")
+    lines.append(f"SUMMARY:{_escape(event.title)}")
+    lines.append(f"LOCATION:{_escape(', '.join(part for part in (event.venue, event.city, event.state) if part))}")
+    if event.description:
+        lines.append(f"DESCRIPTION:{_escape(event.description)}")
+    lines += ["STATUS:CONFIRMED", "END:VEVENT"]
+    return lines
+
+
+def render_calendar(events: Iterable, name: str) -> bytes:
+    """Serialize event rows (``FEED_COLUMNS``) as an iCalendar document."""
+    now = datetime.utcnow()
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(name)}",
+        "REFRESH-INTERVAL;VALUE=DURATION:PT1H",
+    ]
+    for event in events:
+        lines += _event_lines(event, now)
+    lines.append("END:VCALENDAR")
+    return b"".join(_fold(line) for line in lines)
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.replace(microsecond=0, tzinfo=timezone.utc), usegmt=True)
+
+
+class CalendarCache:
+    """Rendered feeds per filter key, least recently used evicted first."""
+
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._feeds: "OrderedDict[tuple, Feed]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(city: Optional[str], state: Optional[str]) -> tuple:
+        return ((city or "").strip(), (state or "").strip())
+
+    def get(self, key: tuple) -> Optional[Feed]:
+        """The cached feed, or None when missing or expired."""
+        with self._lock:
+            feed = self._feeds.get(key)
+            if feed is None or feed.expires <= time.monotonic():
+                return None
+            self._feeds.move_to_end(key)
+            return feed
+
+    def put(self, key: tuple, body: bytes) -> Feed:
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        with self._lock:
+            previous = self._feeds.get(key)
+            # Last-Modified only moves when the content does, so If-Modified-Since
+            # polls keep getting 304s across rebuilds (and after deletions).
+            if previous is not None and previous.etag == etag:
+                last_modified = previous.last_modified
+            else:
+                last_modified = datetime.utcnow()
+            feed = self._feeds[key] = Feed(body, etag, last_modified, time.monotonic() + self.ttl_seconds)
+            self._feeds.move_to_end(key)
+            while len(self._feeds) > self.max_entries:
+                self._feeds.popitem(last=False)
+        return feed
+
+    def invalidate(self) -> None:
+        """Expire every cached feed (an event changed); rebuilt on the next poll."""
+        with self._lock:
+            for key, feed in list(self._feeds.items()):
+                self._feeds[key] = feed._replace(expires=0.0)
+
+
+def _not_modified(request: Request, feed: Feed) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match wins over If-Modified-Since (RFC 9110)
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or feed.etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        return feed.last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def feed_response(request: Request, feed: Feed, max_age: int) -> Response:
+    """The feed, or an empty ``304`` when the client's copy is current."""
+    headers = {
+        "ETag": feed.etag,
+        "Last-Modified": http_date(feed.last_modified),
+        "Cache-Control": f"public, max-age={max_age}",
+    }
+    if _not_modified(request, feed):
+        return Response(status_code=304, headers=headers)
+    return Response(feed.body, media_type="text/calendar; charset=utf-8", headers=headers)
+
+
+def calendar_name(city: Optional[str], state: Optional[str]) -> str:
+    place = ", ".join(part for part in (city, state) if part)
+    return f"Blood donation camps in {place}" if place else "Blood donation camps"
+
+
+calendar_cache = CalendarCache(settings.CALENDAR_CACHE_TTL_SECONDS)
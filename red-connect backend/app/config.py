@@ -11,6 +11,112 @@ class Settings(BaseSettings):
     DB_NAME: str = os.getenv("DB_NAME", "red_connect")
     DB_USER: str = os.getenv("DB_USER", "root")
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "")
+    # Full SQLAlchemy URL; overrides the DB_* parts above (e.g. sqlite:///./local.db)
+    DB_URL: str = os.getenv("DB_URL", "")
+    
+    # Read replicas: comma-separated SQLAlchemy URLs used by read-only endpoints
+    DB_REPLICA_URLS: str = os.getenv("DB_REPLICA_URLS", "")
+    DB_REPLICA_RETRY_SECONDS: int = int(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))  # skip a failed replica this long
+    READ_YOUR_WRITES_SECONDS: int = int(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))  # pin reads to primary after a write
+    
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_CONNECT_TIMEOUT: int = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))  # seconds
+    DB_ECHO: bool = os.getenv("DB_ECHO", "False").lower() in ("true", "1", "yes")  # log every SQL statement (debugging only)
+    
+    # Startup: "migrate" applies pending migrations (development), "check" only
+    # reads the schema_version row and refuses to start if the schema is behind.
+    SCHEMA_STARTUP_MODE: str = os.getenv("SCHEMA_STARTUP_MODE", "migrate")
+    
+    # Production server profile (python run.py --prod)
+    WEB_WORKERS: int = int(os.getenv("WEB_WORKERS", "0"))  # 0 = one per CPU
+    WEB_BACKLOG: int = int(os.getenv("WEB_BACKLOG", "2048"))
+    WEB_KEEPALIVE: int = int(os.getenv("WEB_KEEPALIVE", "5"))  # seconds
+    WEB_GRACEFUL_TIMEOUT: int = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))  # seconds to drain on SIGTERM
+    WEB_MAX_REQUESTS: int = int(os.getenv("WEB_MAX_REQUESTS", "0"))  # recycle workers after N requests (0 = never)
+    
+    # Emergency matching: rebuild the in-memory eligibility index this often
+    MATCHING_INDEX_TTL_SECONDS: int = int(os.getenv("MATCHING_INDEX_TTL_SECONDS", "600"))
+    
+    # Notifications: transport per channel ("file", "socket", "smtp" for email,
+    # "http" for SMS, or "none" to leave messages queued)
+    NOTIFY_EMAIL_TRANSPORT: str = os.getenv("NOTIFY_EMAIL_TRANSPORT", "file")
+    NOTIFY_SMS_TRANSPORT: str = os.getenv("NOTIFY_SMS_TRANSPORT", "file")
+    NOTIFY_FILE_PATH: str = os.getenv("NOTIFY_FILE_PATH", "notifications.ndjson")  # local sink, one JSON line per message
+    NOTIFY_SOCKET_ADDRESS: str = os.getenv("NOTIFY_SOCKET_ADDRESS", "127.0.0.1:9025")  # host:port of a line-based sink
+    NOTIFY_EMAIL_RATE: float = float(os.getenv("NOTIFY_EMAIL_RATE", "20"))  # messages per second per process
+    NOTIFY_SMS_RATE: float = float(os.getenv("NOTIFY_SMS_RATE", "5"))  # messages per second per process
+    NOTIFY_BATCH_SIZE: int = int(os.getenv("NOTIFY_BATCH_SIZE", "200"))
+    NOTIFY_MAX_ATTEMPTS: int = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "3"))
+    NOTIFY_RETRY_BASE_SECONDS: float = float(os.getenv("NOTIFY_RETRY_BASE_SECONDS", "30"))  # delay after the first failure, doubled after each
+    NOTIFY_RETRY_MAX_SECONDS: float = float(os.getenv("NOTIFY_RETRY_MAX_SECONDS", "3600"))
+    NOTIFY_POLL_SECONDS: float = float(os.getenv("NOTIFY_POLL_SECONDS", "5"))
+    # Run the sender inside the web workers; disable when running `python manage.py send-notifications`
+    NOTIFY_DISPATCHER_ENABLED: bool = os.getenv("NOTIFY_DISPATCHER_ENABLED", "True").lower() in ("true", "1", "yes")
+    SMTP_HOST: str = os.getenv("SMTP_HOST", "localhost")
+    SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
+    SMTP_USER: str = os.getenv("SMTP_USER", "")
+    SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
+    SMTP_STARTTLS: bool = os.getenv("SMTP_STARTTLS", "True").lower() in ("true", "1", "yes")
+    SMTP_FROM: str = os.getenv("SMTP_FROM", "Red Connect <noreply@redconnect.local>")
+    SMS_GATEWAY_URL: str = os.getenv("SMS_GATEWAY_URL", "")  # receives JSON {"to": ..., "message": ...}
+    SMS_GATEWAY_TOKEN: str = os.getenv("SMS_GATEWAY_TOKEN", "")
+    
+    # Rate limits for login/register ("N/second|minute|hour", empty to disable)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "True").lower() in ("true", "1", "yes")
+    RATE_LIMIT_PER_IP: str = os.getenv("RATE_LIMIT_PER_IP", "20/minute")
+    RATE_LIMIT_PER_EMAIL: str = os.getenv("RATE_LIMIT_PER_EMAIL", "5/minute")
+    RATE_LIMIT_PER_ROUTE: str = os.getenv("RATE_LIMIT_PER_ROUTE", "")  # across all clients, e.g. "50/second"
+    RATE_LIMIT_TRUST_FORWARDED: bool = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "False").lower() in ("true", "1", "yes")  # behind a proxy
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" (per process) or "redis"
+    RATE_LIMIT_REDIS_URL: str = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))  # memory backend LRU size
+    
+    # Move events UPCOMING -> ONGOING -> COMPLETED this often (0 disables; one worker runs it at a time)
+    EVENT_STATUS_INTERVAL_SECONDS: int = int(os.getenv("EVENT_STATUS_INTERVAL_SECONDS", "60"))
+    
+    # iCalendar feed (/api/events/calendar.ics): rendered feeds are cached per worker this long
+    CALENDAR_CACHE_TTL_SECONDS: int = int(os.getenv("CALENDAR_CACHE_TTL_SECONDS", "300"))
+    
+    # Batch-get endpoints (/api/.../batch?ids=1,2,3): most ids resolved per request
+    BATCH_MAX_IDS: int = int(os.getenv("BATCH_MAX_IDS", "100"))
+    
+    # Retire expired blood batches this often (0 disables; one worker runs it at a time)
+    INVENTORY_EXPIRY_INTERVAL_SECONDS: int = int(os.getenv("INVENTORY_EXPIRY_INTERVAL_SECONDS", "3600"))
+    
+    # Demand forecasts (/api/blood-banks/{id}/forecast), recomputed this often (0 disables)
+    FORECAST_INTERVAL_SECONDS: int = int(os.getenv("FORECAST_INTERVAL_SECONDS", "3600"))
+    FORECAST_HISTORY_DAYS: int = int(os.getenv("FORECAST_HISTORY_DAYS", "112"))  # 16 weeks of dispatches
+    FORECAST_HORIZON_DAYS: int = int(os.getenv("FORECAST_HORIZON_DAYS", "7"))
+    FORECAST_SMOOTHING: float = float(os.getenv("FORECAST_SMOOTHING", "0.1"))  # weight of the latest day in the level
+    
+    # Donor dashboard (/api/donors/me/dashboard): cached per donor and worker this long (0 disables)
+    DASHBOARD_CACHE_TTL_SECONDS: int = int(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "30"))
+    
+    # Organizer report (/api/organizers/me/report): cached per organizer and worker this long (0 disables)
+    ORGANIZER_REPORT_CACHE_TTL_SECONDS: int = int(os.getenv("ORGANIZER_REPORT_CACHE_TTL_SECONDS", "300"))
+    
+    # Idempotency-Key on POST/PUT: results replayed for this long; recent ones also held in memory per worker
+    IDEMPOTENCY_ENABLED: bool = os.getenv("IDEMPOTENCY_ENABLED", "True").lower() in ("true", "1", "yes")
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_LOCK_SECONDS: int = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))  # a request that never finished frees its key after this
+    IDEMPOTENCY_CACHE_SIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+    IDEMPOTENCY_MAX_BODY_BYTES: int = int(os.getenv("IDEMPOTENCY_MAX_BODY_BYTES", "65535"))  # larger responses are not kept
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: int = int(os.getenv("IDEMPOTENCY_PURGE_INTERVAL_SECONDS", "3600"))
+    
+    # Audit log of ORM changes, written by a background thread in batches of AUDIT_BATCH_SIZE
+    # at least every AUDIT_FLUSH_SECONDS; beyond AUDIT_MAX_BUFFER queued entries new ones are dropped (and counted)
+    AUDIT_ENABLED: bool = os.getenv("AUDIT_ENABLED", "True").lower() in ("true", "1", "yes")
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+    AUDIT_FLUSH_SECONDS: float = float(os.getenv("AUDIT_FLUSH_SECONDS", "1.0"))
+    AUDIT_MAX_BUFFER: int = int(os.getenv("AUDIT_MAX_BUFFER", "10000"))
+    
+    # Event waitlist: channels used to tell donors they were promoted to a place
+    WAITLIST_NOTIFY_CHANNELS: str = os.getenv("WAITLIST_NOTIFY_CHANNELS", "email,sms")
+    
+    # Archive of closed years (python manage.py archive): gzip NDJSON files + manifest.json
+    ARCHIVE_DIR: str = os.getenv("ARCHIVE_DIR", "archive")
+    ARCHIVE_HOT_YEARS: int = int(os.getenv("ARCHIVE_HOT_YEARS", "1"))  # closed years kept in the tables besides the current one
     
     # JWT
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
@@ -20,11 +126,26 @@ class Settings(BaseSettings):
     # App Configuration
     DEBUG: bool = os.getenv("DEBUG", "False").lower() in ("true", "1", "yes")
     
+    # Logging: one JSON object per line ("text" for plain lines), formatted and written by a background thread
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records waiting to be written; beyond that they are dropped
+    LOG_SLOW_REQUEST_MS: int = int(os.getenv("LOG_SLOW_REQUEST_MS", "500"))  # slower requests are logged with their SQL
+    LOG_SLOW_SQL_MAX: int = int(os.getenv("LOG_SLOW_SQL_MAX", "50"))  # statements kept per slow request
+    LOG_SAMPLED_PATHS: str = os.getenv("LOG_SAMPLED_PATHS", "/health,/ready")  # high-volume path prefixes whose access log is sampled
+    LOG_SAMPLE_RATE: float = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+    
     # Database URL
     @property
     def DATABASE_URL(self) -> str:
+        if self.DB_URL:
+            return self.DB_URL
         return f"mysql+pymysql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
     
+    @property
+    def REPLICA_URLS(self) -> list:
+        return [url.strip() for url in self.DB_REPLICA_URLS.split(",") if url.strip()]
+    
     class Config:
         env_file = ".env"
 
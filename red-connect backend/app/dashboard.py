@@ -0,0 +1,151 @@
+"""
+Donor dashboard (``GET /api/donors/me/dashboard``).
+
+One payload with what the donor home screen shows: the profile, when the
+donor may give blood next, the latest donations and certificates, and
+upcoming events in the donor's state (own city first). The profile comes with
+the authenticated user; the other reads are independent, so they run
+concurrently on the thread pool, each on a session of its own, and the
+request waits for the slowest of them rather than their sum. Lists are capped
+at ``RECENT_ITEMS`` so the payload stays small however long the history is.
+
+The encoded payload is cached per donor for ``DASHBOARD_CACHE_TTL_SECONDS``.
+The donor's own writes (donations, certificates, profile) drop the entry in
+the worker that handled them; other workers catch up within the TTL.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Callable, Optional
+
+import orjson
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.matching import eligibility_window
+from app.models import Certificate, Donation, Donor, Event, EventStatus
+from app.serialization import rows_to_dicts
+
+RECENT_ITEMS = 5
+
+
+class DashboardCache:
+    """Encoded dashboards per donor id, least recently used evicted first."""
+
+    def __init__(self, ttl_seconds: float = 30, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, donor_id: int) -> Optional[bytes]:
+        """The cached body, or None when missing or expired."""
+        with self._lock:
+            entry = self._entries.get(donor_id)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            self._entries.move_to_end(donor_id)
+            return entry[0]
+
+    def put(self, donor_id: int, body: bytes) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[donor_id] = (body, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(donor_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, donor_id: int) -> None:
+        """Drop a donor's dashboard (their data changed); rebuilt on the next request."""
+        with self._lock:
+            self._entries.pop(donor_id, None)
+
+
+def next_eligible_date(donor: Donor, today: Optional[date] = None) -> Optional[date]:
+    """First day from ``today`` on that the donor may donate, or None when they no longer can (age, weight)."""
+    today = today or date.today()
+    eligible_from, eligible_until = eligibility_window(donor.last_donation_date, donor.date_of_birth, donor.weight)
+    start = max(eligible_from, today.toordinal())
+    if start > eligible_until:
+        return None
+    return date.fromordinal(start)
+
+
+def _read(build: Callable[[Session], object]):
+    """Run ``build`` on a session of its own (called from a worker thread)."""
+    db = SessionLocal()
+    try:
+        return build(db)
+    finally:
+        db.close()
+
+
+def _recent_donations(db: Session, donor_id: int) -> list:
+    return rows_to_dicts(
+        db.query(
+            Donation.id, Donation.donation_date, Donation.blood_type, Donation.units, Donation.status, Donation.event_id
+        ).filter(
+            Donation.donor_id == donor_id
+        ).order_by(Donation.donation_date.desc(), Donation.id.desc()).limit(RECENT_ITEMS)
+    )
+
+
+def _certificates(db: Session, donor_id: int) -> dict:
+    recent = db.query(
+        Certificate.id, Certificate.certificate_number, Certificate.issue_date, Certificate.status, Certificate.certificate_url
+    ).filter(
+        Certificate.donor_id == donor_id
+    ).order_by(Certificate.issue_date.desc(), Certificate.id.desc()).limit(RECENT_ITEMS)
+    total = db.query(func.count(Certificate.id)).filter(Certificate.donor_id == donor_id).scalar()
+    return {"total": total, "recent": rows_to_dicts(recent)}
+
+
+def _upcoming_events(db: Session, city: Optional[str], state: Optional[str], today: date) -> list:
+    query = db.query(
+        Event.id, Event.title, Event.event_date, Event.start_time, Event.venue, Event.city
+    ).filter(Event.status == EventStatus.UPCOMING, Event.event_date >= today)
+    if state:
+        query = query.filter(Event.state == state)
+    # Soonest in the state; events in the donor's own city go first
+    events = rows_to_dicts(query.order_by(Event.event_date, Event.id).limit(RECENT_ITEMS * 4))
+    events.sort(key=lambda event: event["city"] != city)
+    return events[:RECENT_ITEMS]
+
+
+async def build_dashboard(donor: Donor) -> bytes:
+    """The encoded dashboard for a loaded donor profile."""
+    today = date.today()
+    eligible_on = next_eligible_date(donor, today)
+    donor_id, city, state = donor.id, donor.city, donor.state
+    donations, certificates, events = await asyncio.gather(
+        asyncio.to_thread(_read, lambda db: _recent_donations(db, donor_id)),
+        asyncio.to_thread(_read, lambda db: _certificates(db, donor_id)),
+        asyncio.to_thread(_read, lambda db: _upcoming_events(db, city, state, today)),
+    )
+    return orjson.dumps({
+        "profile": {
+            "id": donor.id,
+            "full_name": donor.full_name,
+            "blood_type": donor.blood_type,
+            "city": city,
+            "state": state,
+            "total_donations": donor.total_donations or 0,
+            "last_donation_date": donor.last_donation_date,
+            "profile_image": donor.profile_image,
+        },
+        "eligible_now": eligible_on == today,
+        "next_eligible_date": eligible_on,
+        "recent_donations": donations,
+        "certificates_total": certificates["total"],
+        "recent_certificates": certificates["recent"],
+        "upcoming_events": events,
+        "generated_at": datetime.utcnow(),
+    })
+
+
+dashboard_cache = DashboardCache(ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS)
@@ -1,14 +1,38 @@
-from sqlalchemy import create_engine
+import hashlib
+import hmac
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from fastapi import Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    echo=True
-)
+logger = logging.getLogger(__name__)
+
+def _engine_options(url: str) -> dict:
+    """Pool and driver options for an engine on ``url``."""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        # Fail fast instead of hanging a worker when the database stalls
+        "connect_args": {"connect_timeout": settings.DB_CONNECT_TIMEOUT},
+    }
+
+def _create_engine(url: str):
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        **_engine_options(url)
+    )
+
+engine = _create_engine(settings.DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -22,3 +46,159 @@ def get_db():
     finally:
         db.close()
 
+class ReplicaRouter:
+    """Round-robin over read replicas, skipping replicas that recently failed."""
+
+    def __init__(self, engines: list, retry_seconds: float):
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self._counter = itertools.count()
+        self._down_until = [0.0] * len(engines)
+
+    def candidates(self):
+        """Yield healthy replicas, starting from the next one in rotation."""
+        if not self.engines:
+            return
+        start = next(self._counter)
+        now = time.monotonic()
+        for offset in range(len(self.engines)):
+            index = (start + offset) % len(self.engines)
+            if self._down_until[index] <= now:
+                yield index, self.engines[index]
+
+    def mark_down(self, index: int) -> None:
+        self._down_until[index] = time.monotonic() + self.retry_seconds
+
+replica_router = ReplicaRouter(
+    [_create_engine(url) for url in settings.REPLICA_URLS],
+    settings.DB_REPLICA_RETRY_SECONDS,
+)
+
+# Read-your-writes: a client that wrote recently keeps reading from the primary.
+# The pin travels with the client as a signed "primary until" timestamp, so it
+# holds whichever worker serves the next request.
+PRIMARY_PIN_COOKIE = "rc_primary_until"
+
+def _pin_signature(until: str) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), f"primary-until:{until}".encode(), hashlib.sha256).hexdigest()
+
+def primary_pin(now: float = None) -> str:
+    """Cookie value routing the client's reads to the primary for READ_YOUR_WRITES_SECONDS."""
+    until = f"{(now or time.time()) + settings.READ_YOUR_WRITES_SECONDS:.3f}"
+    return f"{until}.{_pin_signature(until)}"
+
+def is_pinned_to_primary(request: Request) -> bool:
+    """Whether the request carries a valid, unexpired pin."""
+    until, _, signature = request.cookies.get(PRIMARY_PIN_COOKIE, "").rpartition(".")
+    if not until or not hmac.compare_digest(signature, _pin_signature(until)):
+        return False
+    try:
+        return float(until) > time.time()
+    except ValueError:
+        return False
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware pinning a client to the primary after a successful write (only with replicas)."""
+
+    def __init__(self, app, router: ReplicaRouter):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS") or not self.router.engines:
+            await self.app(scope, receive, send)
+            return
+
+        async def pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = (f"{PRIMARY_PIN_COOKIE}={primary_pin()}; Max-Age={settings.READ_YOUR_WRITES_SECONDS}; "
+                          "Path=/; HttpOnly; SameSite=Lax")
+                message = {**message, "headers": [*message.get("headers", ()), (b"set-cookie", cookie.encode())]}
+            await send(message)
+
+        await self.app(scope, receive, pin)
+
+def _open_replica_session():
+    """Session on the next healthy replica, or None if none is reachable."""
+    for index, replica in replica_router.candidates():
+        db = SessionLocal(bind=replica)
+        try:
+            # Checks a connection out now (with pre-ping) so a dead replica is
+            # detected here rather than in the middle of the handler.
+            db.connection()
+            return db
+        except OperationalError as e:
+            db.close()
+            replica_router.mark_down(index)
+            logger.warning(f"Read replica {index} unavailable, skipping for {replica_router.retry_seconds}s: {e}")
+    return None
+
+# Dependency for read-only endpoints: a replica session unless the caller wrote recently
+def get_read_db(request: Request):
+    db = None
+    if replica_router.engines and not is_pinned_to_primary(request):
+        db = _open_replica_session()
+    if db is None:
+        db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _open_connections(bind, size: int) -> int:
+    connections = []
+    try:
+        for _ in range(size):
+            conn = bind.connect()
+            conn.exec_driver_sql("SELECT 1")
+            connections.append(conn)
+    finally:
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+def warm_pool(bind=None, size: int = None) -> int:
+    """Open ``size`` pooled connections up front so first requests don't pay for them.
+
+    Warms the primary and every replica unless ``bind`` is given. A replica
+    that cannot be reached is marked down rather than failing the warm-up.
+    Returns the number of connections opened.
+    """
+    size = size or settings.DB_POOL_SIZE
+    if bind is not None:
+        return _open_connections(bind, size)
+    opened = _open_connections(engine, size)
+    for index, replica in enumerate(replica_router.engines):
+        try:
+            opened += _open_connections(replica, size)
+        except OperationalError as e:
+            replica_router.mark_down(index)
+            logger.warning(f"Read replica {index} unavailable during warm-up: {e}")
+    return opened
+
+@contextmanager
+def advisory_lock(bind, name: str, timeout: int = 0):
+    """Hold a MySQL named lock (``GET_LOCK``) for the block; yields whether it was acquired.
+
+    With ``timeout=0`` another process holding the lock makes this yield False
+    immediately. Other databases have no named locks and always yield True.
+    """
+    if bind.dialect.name != "mysql":
+        yield True
+        return
+    with bind.connect() as conn:
+        acquired = conn.execute(text("SELECT GET_LOCK(:name, :timeout)"), {"name": name, "timeout": timeout}).scalar() == 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+
+def dispose_after_fork() -> None:
+    """Drop pooled connections inherited from a parent process.
+
+    Call in each worker right after fork; ``close=False`` leaves the parent's
+    sockets alone and the worker opens its own connections on first use.
+    """
+    for target in (engine, *replica_router.engines):
+        target.dispose(close=False)
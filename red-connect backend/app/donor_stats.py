@@ -0,0 +1,109 @@
+"""
+Donor counters kept in step with ``donations``.
+
+``donors.total_donations`` and ``donors.last_donation_date`` summarise the
+donor's donations that are not cancelled. The helpers below update them with
+SQL-side expressions inside the caller's transaction, so two concurrent
+writes can never overwrite each other's increment. ``recompute_donor_stats``
+rebuilds them from ``donations`` for all donors. Donations moved to the
+archive still count, through ``archived_donation_totals``.
+"""
+from datetime import date
+
+from sqlalchemy import Date, case, func, literal, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models import ArchivedDonationTotal, Donation, DonationStatus, Donor
+
+
+def counts_toward_total(status) -> bool:
+    """Cancelled donations are not counted."""
+    return status != DonationStatus.CANCELLED
+
+
+def _counted():
+    return Donation.status.is_distinct_from(DonationStatus.CANCELLED)
+
+
+def _later(first, second):
+    # GREATEST() returns NULL on MySQL when either side is NULL; CASE is portable.
+    return case(
+        (first.is_(None), second),
+        (or_(second.is_(None), first > second), first),
+        else_=second,
+    )
+
+
+def _latest_donation_date(donor_id):
+    hot = select(func.max(Donation.donation_date)).where(
+        Donation.donor_id == donor_id, _counted()
+    ).scalar_subquery()
+    archived = select(func.max(ArchivedDonationTotal.last_donation_date)).where(
+        ArchivedDonationTotal.donor_id == donor_id
+    ).scalar_subquery()
+    return _later(hot, archived)
+
+
+def record_donation_added(db: Session, donor_id: int, donation_date: date) -> None:
+    """Count a new donation: total + 1, last date = the later of the two."""
+    db.execute(
+        update(Donor)
+        .where(Donor.id == donor_id)
+        .values(
+            total_donations=func.coalesce(Donor.total_donations, 0) + 1,
+            last_donation_date=_later(literal(donation_date, Date), Donor.last_donation_date),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def record_donations_changed(db: Session, donor_id: int, delta: int = 0) -> None:
+    """After a donation is deleted or edited: shift the total by ``delta`` and re-derive the last date.
+
+    Call it after the donation row itself has been deleted/updated in the same
+    transaction; the last date comes from the donor's remaining donations
+    (an index lookup on ``ix_donations_donor_date``).
+    """
+    values = {"last_donation_date": _latest_donation_date(Donor.id)}
+    if delta:
+        total = func.coalesce(Donor.total_donations, 0) + delta
+        values["total_donations"] = case((total < 0, 0), else_=total)
+    db.execute(
+        update(Donor)
+        .where(Donor.id == donor_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def recompute_donor_stats(bind: Engine, batch_size: int = 50000) -> int:
+    """Rebuild every donor's counters from ``donations`` and the archive totals; returns donors updated.
+
+    Each batch is one UPDATE with correlated aggregates over a range of donor
+    ids, committed separately so a large table is not locked in one go.
+    """
+    with bind.connect() as conn:
+        low, high = conn.execute(select(func.min(Donor.id), func.max(Donor.id))).one()
+    if low is None:
+        return 0
+
+    total_donations = select(func.count(Donation.id)).where(
+        Donation.donor_id == Donor.id, _counted()
+    ).scalar_subquery() + func.coalesce(
+        select(func.sum(ArchivedDonationTotal.donations)).where(
+            ArchivedDonationTotal.donor_id == Donor.id
+        ).scalar_subquery(),
+        0,
+    )
+
+    updated = 0
+    for start in range(low, high + 1, batch_size):
+        with bind.begin() as conn:
+            result = conn.execute(
+                update(Donor)
+                .where(Donor.id >= start, Donor.id < start + batch_size)
+                .values(total_donations=total_donations, last_donation_date=_latest_donation_date(Donor.id))
+            )
+        updated += result.rowcount
+    return updated
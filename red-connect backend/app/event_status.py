@@ -0,0 +1,69 @@
+"""
+Scheduled event status transitions.
+
+Events move UPCOMING -> ONGOING when their start time passes and
+UPCOMING/ONGOING -> COMPLETED when their end time passes (or at the end of
+the day when no end time is set). ``advance_event_statuses`` applies both as
+set-based UPDATEs over the ``(status, event_date)`` index, so each run only
+touches events that are due. Times are the server's local time, compared as
+``HH:MM`` strings. Cancelled events are left alone.
+
+``EventStatusScheduler`` runs it periodically from every web worker; a MySQL
+named lock makes sure only one worker updates at a time.
+"""
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.engine import Engine
+
+from app.database import advisory_lock
+from app.models import Event, EventStatus
+from app.scheduler import PeriodicJob
+
+LOCK_NAME = "red_connect_event_status"
+
+
+def advance_event_statuses(bind: Engine, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Move due events to ONGOING/COMPLETED; returns how many moved to each.
+
+    Returns an empty dict when another process holds the lock.
+    """
+    now = now or datetime.now()
+    today, clock = now.date(), now.strftime("%H:%M")
+    with advisory_lock(bind, LOCK_NAME) as acquired:
+        if not acquired:
+            return {}
+        with bind.begin() as conn:
+            completed = conn.execute(
+                update(Event)
+                .where(
+                    Event.status.in_([EventStatus.UPCOMING, EventStatus.ONGOING]),
+                    Event.event_date <= today,
+                    or_(
+                        Event.event_date < today,
+                        and_(Event.end_time.isnot(None), Event.end_time != "", Event.end_time <= clock),
+                    ),
+                )
+                .values(status=EventStatus.COMPLETED)
+            ).rowcount
+            started = conn.execute(
+                update(Event)
+                .where(
+                    Event.status == EventStatus.UPCOMING,
+                    Event.event_date == today,
+                    or_(Event.start_time.is_(None), Event.start_time == "", Event.start_time <= clock),
+                )
+                .values(status=EventStatus.ONGOING)
+            ).rowcount
+    return {"ongoing": started, "completed": completed}
+
+
+class EventStatusScheduler(PeriodicJob):
+    """Runs ``advance_event_statuses`` every ``interval_seconds`` on the event loop's thread pool.
+
+    ``on_change`` is called after a run that moved any events.
+    """
+
+    def __init__(self, bind: Engine, interval_seconds: float = 60.0, on_change: Optional[Callable[[], None]] = None):
+        super().__init__("Event status update", lambda: advance_event_statuses(bind), interval_seconds, on_change)
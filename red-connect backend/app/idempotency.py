@@ -0,0 +1,274 @@
+"""
+Idempotency keys for POST and PUT requests.
+
+A client that may retry a write (a phone at a camp with a flaky connection)
+sends an ``Idempotency-Key`` header, unique per logical request. The first
+request with a key runs normally and its response is stored; a retry with the
+same key, from the same caller, to the same method and path, gets the stored
+response back (with ``Idempotent-Replayed: true``) without running the
+handler again, so it does not create a second row.
+
+* A retry with a different body gets ``422``; a retry while the first request
+  is still running gets ``409``.
+* Server errors (5xx), ``429`` and responses larger than
+  ``IDEMPOTENCY_MAX_BODY_BYTES`` are not stored, so retrying them runs the
+  handler again.
+* Login and registration routes (``CREDENTIAL_ROUTES``) ignore the header:
+  their responses carry access tokens, which are never stored. Logging in
+  again is harmless, and a retried registration is refused as a duplicate.
+* Requests without an ``Authorization`` header ignore it too. Keys are scoped
+  to the caller's token, and anonymous callers have nothing that tells them
+  apart, so one could be served another's stored response.
+
+Results live in ``idempotency_keys`` (hashes, status, content type, body)
+for ``IDEMPOTENCY_TTL_SECONDS`` and are purged by a periodic job. The first
+request claims its key by inserting the row, which serializes concurrent
+duplicates across workers; a claim whose request never finished (a worker
+crash) can be taken over after ``IDEMPOTENCY_LOCK_SECONDS``. Completed results
+are also kept in a per-worker LRU, so a replay to the worker that served the
+original does not query the database.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+import orjson
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from app.models import IdempotencyKey
+from app.rate_limit import CREDENTIAL_ROUTES
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+
+_table = IdempotencyKey.__table__
+
+
+class StoredResponse(NamedTuple):
+    request_hash: bytes
+    status_code: Optional[int]  # None while the first request is running
+    content_type: Optional[str]
+    body: Optional[bytes]
+
+
+_IN_PROGRESS = StoredResponse(b"", None, None, None)
+
+
+class IdempotencyStore:
+    """Stored results in ``idempotency_keys``, with the most recent ones cached in memory."""
+
+    def __init__(self, bind: Engine, ttl_seconds: float = 86400, lock_seconds: float = 60, cache_size: int = 10000):
+        self.bind = bind
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, Tuple[StoredResponse, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cached(self, key_hash: bytes) -> Optional[StoredResponse]:
+        """A completed result from memory, or None."""
+        with self._lock:
+            entry = self._cache.get(key_hash)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            self._cache.move_to_end(key_hash)
+            return entry[0]
+
+    def _remember(self, key_hash: bytes, stored: StoredResponse) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[key_hash] = (stored, time.monotonic() + self.ttl_seconds)
+            self._cache.move_to_end(key_hash)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def claim(self, key_hash: bytes, request_hash: bytes) -> Optional[StoredResponse]:
+        """Claim a key for a new request (returns None), or return its stored or in-progress result."""
+        now = datetime.utcnow()
+        lease = now + timedelta(seconds=self.lock_seconds)
+        try:
+            with self.bind.begin() as conn:
+                row = conn.execute(
+                    select(_table.c.request_hash, _table.c.status_code, _table.c.content_type,
+                           _table.c.body, _table.c.expires_at)
+                    .where(_table.c.key_hash == key_hash)
+                ).first()
+                if row is None:
+                    conn.execute(insert(_table).values(key_hash=key_hash, request_hash=request_hash, expires_at=lease))
+                    return None
+                if row.expires_at > now:
+                    stored = StoredResponse(row.request_hash, row.status_code, row.content_type, row.body)
+                    if stored.status_code is not None:
+                        self._remember(key_hash, stored)
+                    return stored
+                # An expired result or an abandoned claim: take it over unless another request just did
+                taken = conn.execute(
+                    update(_table)
+                    .where(_table.c.key_hash == key_hash, _table.c.expires_at == row.expires_at)
+                    .values(request_hash=request_hash, status_code=None, content_type=None, body=None, expires_at=lease)
+                ).rowcount
+                return None if taken else _IN_PROGRESS
+        except IntegrityError:
+            # Inserted by a concurrent request with the same key
+            return _IN_PROGRESS
+
+    def complete(self, key_hash: bytes, stored: StoredResponse) -> None:
+        """Store the result of a claimed request."""
+        with self.bind.begin() as conn:
+            conn.execute(
+                update(_table).where(_table.c.key_hash == key_hash).values(
+                    status_code=stored.status_code,
+                    content_type=stored.content_type,
+                    body=stored.body,
+                    expires_at=datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+                )
+            )
+        self._remember(key_hash, stored)
+
+    def release(self, key_hash: bytes) -> None:
+        """Drop a claim whose result is not kept, so the next retry runs the handler."""
+        with self.bind.begin() as conn:
+            conn.execute(delete(_table).where(_table.c.key_hash == key_hash, _table.c.status_code.is_(None)))
+
+
+def purge_expired(bind: Engine, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Delete expired results and abandoned claims; returns how many."""
+    with bind.begin() as conn:
+        purged = conn.execute(delete(_table).where(_table.c.expires_at < (now or datetime.utcnow()))).rowcount
+    return {"keys": purged}
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value
+    return None
+
+
+def key_hash_for(scope, key: bytes) -> bytes:
+    """Hash of the caller (the Authorization header), method, path and key."""
+    digest = hashlib.sha256()
+    for part in (_header(scope, b"authorization"), scope["method"].encode(),
+                 scope["path"].encode(), scope.get("query_string", b""), key):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.digest()
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware replaying stored results of POST/PUT requests with an ``Idempotency-Key``."""
+
+    def __init__(self, app, store: IdempotencyStore, methods: Iterable[str] = ("POST", "PUT"),
+                 exclude: Iterable[str] = CREDENTIAL_ROUTES, max_body_bytes: int = 65535):
+        self.app = app
+        self.store = store
+        self.methods = frozenset(methods)
+        self.exclude = frozenset(route.rstrip("/") for route in exclude)
+        self.max_body_bytes = max_body_bytes
+        self.replayed = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.methods:
+            await self.app(scope, receive, send)
+            return
+        key = _header(scope, HEADER)
+        if (key is None or scope["path"].rstrip("/") in self.exclude
+                or _header(scope, b"authorization") is None):
+            await self.app(scope, receive, send)
+            return
+        if not key.strip() or len(key) > MAX_KEY_LENGTH:
+            await _respond(send, 400, {"detail": f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"})
+            return
+
+        body = await _read_body(receive)
+        key_hash = key_hash_for(scope, key.strip())
+        request_hash = hashlib.sha256(body).digest()
+
+        stored = self.store.cached(key_hash)
+        if stored is None:
+            stored = await asyncio.to_thread(self.store.claim, key_hash, request_hash)
+        if stored is not None:
+            if stored.status_code is None:
+                await _respond(send, 409, {"detail": "A request with this Idempotency-Key is still in progress"})
+            elif stored.request_hash != request_hash:
+                await _respond(send, 422, {"detail": "Idempotency-Key was already used with a different request"})
+            else:
+                self.replayed += 1
+                await self._replay(send, stored)
+            return
+
+        await self._run(scope, body, receive, send, key_hash, request_hash)
+
+    async def _run(self, scope, body: bytes, receive, send, key_hash: bytes, request_hash: bytes) -> None:
+        """Run the handler, passing its response through while keeping a copy."""
+        response = {"status": 500, "content_type": None, "chunks": [], "size": 0}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                content_type = dict(message.get("headers", ())).get(b"content-type")
+                response["content_type"] = content_type.decode("latin-1") if content_type else None
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+                if response["size"] <= self.max_body_bytes:
+                    response["chunks"].append(message.get("body", b""))
+            await send(message)
+
+        sent = False
+
+        async def replay_body():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        try:
+            await self.app(scope, replay_body, capture)
+        except BaseException:
+            await asyncio.to_thread(self.store.release, key_hash)
+            raise
+
+        status = response["status"]
+        if status >= 500 or status == 429 or response["size"] > self.max_body_bytes:
+            await asyncio.to_thread(self.store.release, key_hash)
+        else:
+            stored = StoredResponse(request_hash, status, response["content_type"], b"".join(response["chunks"]))
+            await asyncio.to_thread(self.store.complete, key_hash, stored)
+
+    @staticmethod
+    async def _replay(send, stored: StoredResponse) -> None:
+        body = stored.body or b""
+        headers = [(b"content-length", str(len(body)).encode()), (b"idempotent-replayed", b"true")]
+        if stored.content_type:
+            headers.append((b"content-type", stored.content_type.encode("latin-1")))
+        await send({"type": "http.response.start", "status": stored.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            return b"".join(chunks)
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def _respond(send, status_code: int, payload: dict) -> None:
+    body = orjson.dumps(payload)
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
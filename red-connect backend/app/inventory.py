@@ -0,0 +1,222 @@
+"""
+Batch-level blood inventory.
+
+Stock is held as ``blood_batches``: units of one blood type and component
+collected on the same day, expiring after the component's shelf life.
+``blood_inventory.units_available`` is the per-(bank, type) total of usable
+units; every function here adjusts it by the same delta it applies to the
+batches, so reading stock never sums batches.
+
+* ``receive_batch`` adds a batch.
+* ``dispatch`` issues units oldest batch first (FIFO) and logs the dispatch.
+* ``set_stock`` applies a stock-take count as a received batch or a FIFO write-off.
+* ``expire_batches`` retires expired batches with one UPDATE per (bank, type).
+
+Each change locks the (bank, type) ``blood_inventory`` row before touching
+batches, so concurrent dispatches cannot issue the same units and the
+aggregate never drifts from the batches.
+"""
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import advisory_lock
+from app.models import BatchStatus, BloodBatch, BloodComponent, BloodDispatch, BloodInventory, BloodType
+
+# Storage shelf life per component (CPDA-1 whole blood, SAGM red cells,
+# agitated platelets at 22 °C, fresh frozen plasma at -30 °C)
+SHELF_LIFE_DAYS = {
+    BloodComponent.WHOLE_BLOOD: 35,
+    BloodComponent.RED_CELLS: 42,
+    BloodComponent.PLATELETS: 5,
+    BloodComponent.PLASMA: 365,
+}
+
+LOCK_NAME = "red_connect_inventory_expiry"
+
+
+class InsufficientStock(ValueError):
+    """Fewer usable units than requested; nothing was dispatched."""
+
+
+def expiry_date(component: BloodComponent, collected_on: date) -> date:
+    """Last day the units can be issued."""
+    return collected_on + timedelta(days=SHELF_LIFE_DAYS[component])
+
+
+def lock_stock(db: Session, bank_id: int, blood_type: BloodType) -> BloodInventory:
+    """The (bank, type) inventory row, locked until the transaction ends; created if missing."""
+    query = db.query(BloodInventory).filter(
+        BloodInventory.blood_bank_id == bank_id,
+        BloodInventory.blood_type == blood_type,
+    ).with_for_update()
+    stock = query.first()
+    if stock is None:
+        try:
+            with db.begin_nested():
+                stock = BloodInventory(blood_bank_id=bank_id, blood_type=blood_type, units_available=0)
+                db.add(stock)
+        except IntegrityError:
+            # Created by a concurrent request
+            stock = query.one()
+    return stock
+
+
+def _available(bank_id: int, blood_type: BloodType, component: Optional[BloodComponent], today: Optional[date]):
+    """Batches not yet issued or swept: of any component when ``component`` is None, expired ones too when ``today`` is None."""
+    conditions = [
+        BloodBatch.blood_bank_id == bank_id,
+        BloodBatch.blood_type == blood_type,
+        BloodBatch.status == BatchStatus.AVAILABLE,
+    ]
+    if component is not None:
+        conditions.append(BloodBatch.component == component)
+    if today is not None:
+        conditions.append(BloodBatch.expires_on >= today)
+    return conditions
+
+
+def receive_batch(
+    db: Session,
+    bank_id: int,
+    blood_type: BloodType,
+    units: int,
+    component: BloodComponent = BloodComponent.WHOLE_BLOOD,
+    collected_on: Optional[date] = None,
+) -> BloodBatch:
+    """Add a batch to the bank's stock (in the caller's transaction)."""
+    collected_on = collected_on or date.today()
+    stock = lock_stock(db, bank_id, blood_type)
+    batch = BloodBatch(
+        blood_bank_id=bank_id,
+        blood_type=blood_type,
+        component=component,
+        units_received=units,
+        units_remaining=units,
+        collected_on=collected_on,
+        expires_on=expiry_date(component, collected_on),
+        status=BatchStatus.AVAILABLE,
+    )
+    db.add(batch)
+    if batch.expires_on >= date.today():
+        stock.units_available = (stock.units_available or 0) + units
+    else:
+        # Recorded for completeness, but never usable
+        batch.status = BatchStatus.EXPIRED
+    db.flush()
+    return batch
+
+
+def _take_fifo(db: Session, bank_id: int, blood_type: BloodType, component: Optional[BloodComponent],
+               units: int, today: Optional[date]) -> List[Tuple[BloodBatch, int]]:
+    # Every batch holds at least one unit, so ``units`` batches are always enough.
+    batches = db.query(BloodBatch).filter(
+        *_available(bank_id, blood_type, component, today)
+    ).order_by(BloodBatch.collected_on, BloodBatch.id).limit(units).with_for_update().all()
+    taken = []
+    for batch in batches:
+        if units <= 0:
+            break
+        take = min(units, batch.units_remaining)
+        batch.units_remaining -= take
+        if batch.units_remaining == 0:
+            batch.status = BatchStatus.ISSUED
+        taken.append((batch, take))
+        units -= take
+    return taken
+
+
+def dispatch(
+    db: Session,
+    bank_id: int,
+    blood_type: BloodType,
+    units: int,
+    component: BloodComponent = BloodComponent.WHOLE_BLOOD,
+    destination: Optional[str] = None,
+) -> Tuple[BloodDispatch, List[Tuple[BloodBatch, int]]]:
+    """Issue ``units`` from the oldest usable batches and log the dispatch.
+
+    Returns the dispatch and the (batch, units taken) pairs. Raises
+    ``InsufficientStock`` when there are not enough usable units; the caller
+    rolls back.
+    """
+    today = date.today()
+    stock = lock_stock(db, bank_id, blood_type)
+    taken = _take_fifo(db, bank_id, blood_type, component, units, today)
+    issued = sum(take for _, take in taken)
+    if issued < units:
+        raise InsufficientStock(f"Only {issued} usable units of {blood_type.value} {component.value} available")
+
+    stock.units_available = (stock.units_available or 0) - issued
+    record = BloodDispatch(
+        blood_bank_id=bank_id, blood_type=blood_type, component=component, units=issued, destination=destination
+    )
+    db.add(record)
+    db.flush()
+    return record, taken
+
+
+def set_stock(db: Session, bank_id: int, blood_type: BloodType, units: int) -> BloodInventory:
+    """Apply a stock-take count for a (bank, type).
+
+    A surplus is received as a whole blood batch collected today; a shortfall
+    is written off oldest batch first (expired but not yet swept batches
+    included). Write-offs are not dispatches and are not logged as demand.
+    The total drops only by the units the batches could give up, so it keeps
+    matching them.
+    """
+    stock = lock_stock(db, bank_id, blood_type)
+    difference = max(units, 0) - (stock.units_available or 0)
+    if difference > 0:
+        receive_batch(db, bank_id, blood_type, difference)
+    elif difference < 0:
+        taken = _take_fifo(db, bank_id, blood_type, None, -difference, None)
+        stock.units_available -= sum(take for _, take in taken)
+    db.flush()
+    return stock
+
+
+def expired_groups(today: date):
+    """(bank, type) pairs that have available batches past their expiry date."""
+    return select(BloodBatch.blood_bank_id, BloodBatch.blood_type).where(
+        BloodBatch.status == BatchStatus.AVAILABLE, BloodBatch.expires_on < today
+    ).distinct()
+
+
+def expire_batches(bind: Engine, today: Optional[date] = None) -> Dict[str, int]:
+    """Retire available batches past their expiry date; returns the batches and units retired.
+
+    Returns an empty dict when another process holds the lock.
+    """
+    today = today or date.today()
+    expired = (BloodBatch.status == BatchStatus.AVAILABLE, BloodBatch.expires_on < today)
+    totals = {"batches": 0, "units": 0}
+    with advisory_lock(bind, LOCK_NAME) as acquired:
+        if not acquired:
+            return {}
+        with bind.connect() as conn:
+            groups = conn.execute(expired_groups(today)).all()
+        for bank_id, blood_type in groups:
+            with bind.begin() as conn:
+                conn.execute(select(BloodInventory.id).where(
+                    BloodInventory.blood_bank_id == bank_id,
+                    BloodInventory.blood_type == blood_type,
+                ).with_for_update())
+                in_group = (BloodBatch.blood_bank_id == bank_id, BloodBatch.blood_type == blood_type, *expired)
+                batches, units = conn.execute(
+                    select(func.count(BloodBatch.id), func.coalesce(func.sum(BloodBatch.units_remaining), 0))
+                    .where(*in_group)
+                ).one()
+                conn.execute(update(BloodBatch).where(*in_group).values(status=BatchStatus.EXPIRED))
+                conn.execute(
+                    update(BloodInventory)
+                    .where(BloodInventory.blood_bank_id == bank_id, BloodInventory.blood_type == blood_type)
+                    .values(units_available=BloodInventory.units_available - units)
+                )
+            totals["batches"] += batches
+            totals["units"] += units
+    return totals
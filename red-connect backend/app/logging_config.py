@@ -0,0 +1,143 @@
+"""
+Non-blocking log pipeline.
+
+Every logger ends in one ``QueueHandler`` on the root logger. The thread
+that logs only stamps the record with the current request id and puts it on
+an in-process queue; a ``QueueListener`` thread formats it (one JSON object
+per line, or plain text with ``LOG_FORMAT=text``) and writes it to stderr. A
+slow or blocked log consumer therefore delays the listener, not requests.
+When ``LOG_QUEUE_SIZE`` records are waiting, further records are dropped and
+counted in ``dropped_records()`` instead of blocking.
+
+``DB_ECHO`` logs every SQL statement through the same pipeline (the engine's
+own ``echo`` would add a synchronous handler).
+"""
+import atexit
+import logging
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+import orjson
+
+from app.config import settings
+from app.request_log import request_id_var
+
+# Attributes every LogRecord has; anything else was passed with ``extra=``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, request id and ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps records with the id of the request being served.
+
+    Attached to the queue handler, so it runs on the thread that emits the
+    record, before it is queued; that is where ``request_id_var`` holds the
+    request's id. On the listener thread the variable is always unset, so the
+    filter must not move to the listener's handlers.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        if record.request_id is None:
+            record.request_id = "-"
+        return super().format(record)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Puts records on the queue as they are, dropping them when it is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue is in-process, so the record need not be made picklable;
+        # merging the arguments and formatting tracebacks is left to the listener.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def _output_handler() -> logging.Handler:
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else _TextFormatter(TEXT_FORMAT))
+    return handler
+
+
+def _start_listener() -> None:
+    global _listener
+    log_queue = queue.Queue(settings.LOG_QUEUE_SIZE)
+    _handler.queue = log_queue
+    _listener = QueueListener(log_queue, _output_handler(), respect_handler_level=True)
+    _listener.start()
+
+
+def configure_logging() -> None:
+    """Route all logging through the queue (once per process)."""
+    global _handler
+    if _handler is not None:
+        return
+    _handler = NonBlockingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    _handler.addFilter(RequestIdFilter())
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO if settings.DB_ECHO else logging.WARNING)
+
+    _start_listener()
+    atexit.register(stop_logging)
+    # Threads do not survive fork: a preforked worker (gunicorn --preload)
+    # gets a queue and listener of its own.
+    os.register_at_fork(after_in_child=_start_listener)
+
+
+def stop_logging() -> None:
+    """Write the records still queued and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_records() -> int:
+    return _handler.dropped if _handler is not None else 0
@@ -0,0 +1,329 @@
+"""
+Emergency donor matching.
+
+``EligibilityIndex`` keeps, per donor blood type, NumPy arrays of donor ids
+(sorted), coordinates, a location key and the date range in which each donor
+may donate. A query for a recipient scans only the compatible types with
+vectorized masks, so it stays in the low milliseconds with a million donors.
+
+The index is built lazily from ``donors`` and updated incrementally when
+donations are recorded or donor profiles change. Other workers' writes are
+picked up by a periodic background rebuild, and the final candidates are
+re-checked against the database before they are returned.
+
+Searches do not take the index lock. Buckets are therefore never resized in
+place: adding a donor builds a new bucket and swaps it in with one
+assignment, so a search always reads arrays of the same length and order.
+Profile and eligibility changes overwrite single elements of the current
+bucket.
+"""
+import logging
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import BloodType, Donor
+
+logger = logging.getLogger(__name__)
+
+# Minimum gap between whole-blood donations
+DEFERRAL_DAYS = 90
+MIN_AGE_YEARS = 18
+MAX_AGE_YEARS = 65
+MIN_WEIGHT_KG = 45.0
+
+# Red cell compatibility: recipient type -> donor types it can receive
+COMPATIBLE_DONORS: Dict[BloodType, List[BloodType]] = {
+    BloodType.O_NEGATIVE: [BloodType.O_NEGATIVE],
+    BloodType.O_POSITIVE: [BloodType.O_POSITIVE, BloodType.O_NEGATIVE],
+    BloodType.A_NEGATIVE: [BloodType.A_NEGATIVE, BloodType.O_NEGATIVE],
+    BloodType.A_POSITIVE: [BloodType.A_POSITIVE, BloodType.A_NEGATIVE, BloodType.O_POSITIVE, BloodType.O_NEGATIVE],
+    BloodType.B_NEGATIVE: [BloodType.B_NEGATIVE, BloodType.O_NEGATIVE],
+    BloodType.B_POSITIVE: [BloodType.B_POSITIVE, BloodType.B_NEGATIVE, BloodType.O_POSITIVE, BloodType.O_NEGATIVE],
+    BloodType.AB_NEGATIVE: [BloodType.AB_NEGATIVE, BloodType.A_NEGATIVE, BloodType.B_NEGATIVE, BloodType.O_NEGATIVE],
+    BloodType.AB_POSITIVE: list(BloodType),
+}
+
+_NEVER = np.iinfo(np.int32).max
+_EARTH_RADIUS_KM = 6371.0
+_KM_PER_DEGREE = 111.2
+
+
+def _add_years(day: date, years: int) -> date:
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:  # 29 February
+        return day.replace(year=day.year + years, day=28)
+
+
+def eligibility_window(last_donation_date: Optional[date], date_of_birth: Optional[date],
+                       weight: Optional[float]) -> tuple:
+    """Return (eligible_from, eligible_until) as date ordinals."""
+    if weight is not None and weight < MIN_WEIGHT_KG:
+        return _NEVER, 0
+    eligible_from = 0
+    eligible_until = _NEVER
+    if last_donation_date:
+        eligible_from = (last_donation_date + timedelta(days=DEFERRAL_DAYS)).toordinal()
+    if date_of_birth:
+        eligible_from = max(eligible_from, _add_years(date_of_birth, MIN_AGE_YEARS).toordinal())
+        eligible_until = _add_years(date_of_birth, MAX_AGE_YEARS + 1).toordinal() - 1
+    return eligible_from, eligible_until
+
+
+def city_key(city: Optional[str]) -> str:
+    return (city or "").strip().lower()
+
+
+def location_key(city: Optional[str], state: Optional[str]) -> str:
+    return f"{city_key(city)}|{(state or '').strip().lower()}"
+
+
+class _Bucket:
+    """Column arrays for the donors of one blood type, sorted by donor id."""
+
+    __slots__ = ("ids", "lat", "lon", "location", "eligible_from", "eligible_until")
+
+    def __init__(self, ids, lat, lon, location, eligible_from, eligible_until):
+        order = np.argsort(ids, kind="stable")
+        self.ids = np.asarray(ids, dtype=np.int64)[order]
+        self.lat = np.asarray(lat, dtype=np.float64)[order]
+        self.lon = np.asarray(lon, dtype=np.float64)[order]
+        self.location = np.asarray(location, dtype=np.int32)[order]
+        self.eligible_from = np.asarray(eligible_from, dtype=np.int32)[order]
+        self.eligible_until = np.asarray(eligible_until, dtype=np.int32)[order]
+
+    def position(self, donor_id: int) -> Optional[int]:
+        index = int(np.searchsorted(self.ids, donor_id))
+        if index < len(self.ids) and self.ids[index] == donor_id:
+            return index
+        return None
+
+    def inserted(self, donor_id, lat, lon, location, eligible_from, eligible_until) -> "_Bucket":
+        """A copy of the bucket with the donor added; this bucket is left as it is."""
+        index = int(np.searchsorted(self.ids, donor_id))
+        bucket = _Bucket.__new__(_Bucket)
+        bucket.ids = np.insert(self.ids, index, donor_id)
+        bucket.lat = np.insert(self.lat, index, lat)
+        bucket.lon = np.insert(self.lon, index, lon)
+        bucket.location = np.insert(self.location, index, location)
+        bucket.eligible_from = np.insert(self.eligible_from, index, eligible_from)
+        bucket.eligible_until = np.insert(self.eligible_until, index, eligible_until)
+        return bucket
+
+    def remove(self, index: int) -> None:
+        # Cheaper than compacting the arrays: the slot can never match again.
+        self.eligible_from[index] = _NEVER
+        self.eligible_until[index] = 0
+
+
+class EligibilityIndex:
+    """In-memory index of donors by blood type, location and eligibility window."""
+
+    def __init__(self, ttl_seconds: float = 600.0):
+        self.ttl_seconds = ttl_seconds
+        self._buckets: Dict[BloodType, _Bucket] = {}
+        self._locations: Dict[str, int] = {}
+        # City -> ids of its locations (one per state it appears in), for searches without a state
+        self._cities: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self._built_at = None
+        self._refreshing = False
+
+    # -- building ----------------------------------------------------------
+
+    @staticmethod
+    def _add_location(locations: Dict[str, int], cities: Dict[str, List[int]], city, state) -> int:
+        key = location_key(city, state)
+        location = locations.get(key)
+        if location is None:
+            location = locations[key] = len(locations)
+            cities.setdefault(city_key(city), []).append(location)
+        return location
+
+    def build(self, db: Session) -> int:
+        """(Re)load the whole index from ``donors``; returns the donor count."""
+        started = time.perf_counter()
+        columns = {blood_type: ([], [], [], [], [], []) for blood_type in BloodType}
+        locations: Dict[str, int] = {}
+        cities: Dict[str, List[int]] = {}
+        rows = db.query(
+            Donor.id, Donor.blood_type, Donor.latitude, Donor.longitude, Donor.city, Donor.state,
+            Donor.last_donation_date, Donor.date_of_birth, Donor.weight,
+        ).yield_per(20000)
+        count = 0
+        for donor_id, blood_type, lat, lon, city, state, last_donation, dob, weight in rows:
+            ids, lats, lons, locs, froms, untils = columns[blood_type]
+            location = self._add_location(locations, cities, city, state)
+            eligible_from, eligible_until = eligibility_window(last_donation, dob, weight)
+            ids.append(donor_id)
+            lats.append(np.nan if lat is None else lat)
+            lons.append(np.nan if lon is None else lon)
+            locs.append(location)
+            froms.append(eligible_from)
+            untils.append(eligible_until)
+            count += 1
+        buckets = {blood_type: _Bucket(*arrays) for blood_type, arrays in columns.items()}
+        with self._lock:
+            self._buckets = buckets
+            self._locations = locations
+            self._cities = cities
+            self._built_at = time.monotonic()
+        logger.info(f"Matching index built: {count} donors in {time.perf_counter() - started:.2f}s")
+        return count
+
+    def ensure_built(self, session_factory) -> None:
+        """Build on first use; afterwards refresh in the background once stale."""
+        if self._built_at is None:
+            with self._lock:
+                needs_build = self._built_at is None
+            if needs_build:
+                db = session_factory()
+                try:
+                    self.build(db)
+                finally:
+                    db.close()
+            return
+        if time.monotonic() - self._built_at > self.ttl_seconds and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._refresh, args=(session_factory,), daemon=True).start()
+
+    def _refresh(self, session_factory) -> None:
+        db = session_factory()
+        try:
+            self.build(db)
+        except Exception as e:
+            logger.error(f"Matching index refresh failed: {e}")
+        finally:
+            db.close()
+            self._refreshing = False
+
+    # -- incremental maintenance ------------------------------------------
+
+    def upsert_donor(self, donor: Donor) -> None:
+        """Apply a new or changed donor profile."""
+        if self._built_at is None:
+            return
+        eligible_from, eligible_until = eligibility_window(
+            donor.last_donation_date, donor.date_of_birth, donor.weight
+        )
+        lat = np.nan if donor.latitude is None else donor.latitude
+        lon = np.nan if donor.longitude is None else donor.longitude
+        blood_type = BloodType(donor.blood_type)
+        with self._lock:
+            location = self._add_location(self._locations, self._cities, donor.city, donor.state)
+            for other_type, bucket in self._buckets.items():
+                index = bucket.position(donor.id)
+                if index is None:
+                    continue
+                if other_type != blood_type:
+                    bucket.remove(index)
+                    continue
+                bucket.lat[index] = lat
+                bucket.lon[index] = lon
+                bucket.location[index] = location
+                bucket.eligible_from[index] = eligible_from
+                bucket.eligible_until[index] = eligible_until
+                return
+            self._buckets[blood_type] = self._buckets[blood_type].inserted(
+                donor.id, lat, lon, location, eligible_from, eligible_until
+            )
+
+    def record_donation(self, donor_id: int, blood_type, donation_date: date) -> None:
+        """Defer a donor after a donation without reloading their profile."""
+        if self._built_at is None:
+            return
+        deferred_until = (donation_date + timedelta(days=DEFERRAL_DAYS)).toordinal()
+        with self._lock:
+            bucket = self._buckets.get(BloodType(blood_type))
+            index = bucket.position(donor_id) if bucket is not None else None
+            if index is not None and bucket.eligible_from[index] < deferred_until:
+                bucket.eligible_from[index] = deferred_until
+
+    # -- querying ------------------------------------------------------------
+
+    def search(self, recipient_type: BloodType, *, latitude: Optional[float] = None,
+               longitude: Optional[float] = None, city: Optional[str] = None, state: Optional[str] = None,
+               radius_km: float = 25.0, limit: int = 50, on_date: Optional[date] = None) -> List[tuple]:
+        """Rank eligible, compatible donors near a location.
+
+        With coordinates, donors within ``radius_km`` are ranked by distance
+        (donors without coordinates in the same city follow); otherwise donors
+        in ``city``/``state`` are returned, or in ``city`` in any state when
+        ``state`` is not given. Exact type matches rank ahead of
+        other compatible types. Returns ``(donor_id, blood_type, distance_km)``
+        tuples; ``distance_km`` is None when unknown.
+        """
+        today = (on_date or date.today()).toordinal()
+        # A rebuild replaces both together; an insert swaps in a new bucket rather than growing one
+        with self._lock:
+            buckets = self._buckets
+            if not city:
+                places = []
+            elif state:
+                location = self._locations.get(location_key(city, state))
+                places = [] if location is None else [location]
+            else:
+                places = list(self._cities.get(city_key(city), ()))
+        use_coordinates = latitude is not None and longitude is not None
+        if not use_coordinates and not places:
+            return []
+
+        ranked = []
+        for preference, donor_type in enumerate(COMPATIBLE_DONORS[recipient_type]):
+            bucket = buckets.get(donor_type)
+            if bucket is None or not len(bucket.ids):
+                continue
+            eligible = (bucket.eligible_from <= today) & (bucket.eligible_until >= today)
+            exact = 0 if donor_type == recipient_type else 1
+
+            if use_coordinates:
+                # Bounding box first (cheap), exact great-circle distance on the survivors.
+                dlat = radius_km / _KM_PER_DEGREE
+                dlon = radius_km / (_KM_PER_DEGREE * max(np.cos(np.radians(latitude)), 0.01))
+                near = eligible & (np.abs(bucket.lat - latitude) <= dlat) & (np.abs(bucket.lon - longitude) <= dlon)
+                candidates = np.flatnonzero(near)
+                if len(candidates):
+                    distances = haversine_km(latitude, longitude, bucket.lat[candidates], bucket.lon[candidates])
+                    inside = distances <= radius_km
+                    candidates, distances = candidates[inside], distances[inside]
+                    if len(candidates) > limit:
+                        keep = np.argpartition(distances, limit)[:limit]
+                        candidates, distances = candidates[keep], distances[keep]
+                    ranked.extend(
+                        ((exact, 0, float(d), preference), int(bucket.ids[i]), donor_type, float(d))
+                        for i, d in zip(candidates, distances)
+                    )
+
+            if places:
+                same_city = eligible & np.isin(bucket.location, places)
+                if use_coordinates:
+                    same_city &= np.isnan(bucket.lat)
+                for i in np.flatnonzero(same_city)[:limit]:
+                    ranked.append(((exact, 1, 0.0, preference), int(bucket.ids[i]), donor_type, None))
+
+        ranked.sort(key=lambda item: item[0])
+        return [(donor_id, donor_type, distance) for _, donor_id, donor_type, distance in ranked[:limit]]
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distances in km from one point to arrays of points."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * _EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def is_eligible(last_donation_date: Optional[date], date_of_birth: Optional[date], weight: Optional[float],
+                on_date: Optional[date] = None) -> bool:
+    eligible_from, eligible_until = eligibility_window(last_donation_date, date_of_birth, weight)
+    today = (on_date or date.today()).toordinal()
+    return eligible_from <= today <= eligible_until
+
+
+eligibility_index = EligibilityIndex(ttl_seconds=settings.MATCHING_INDEX_TTL_SECONDS)
@@ -0,0 +1,122 @@
+"""
+Versioned schema migrations.
+
+Each migration module defines ``VERSION``, ``DESCRIPTION`` and
+``upgrade(conn)`` and is listed in ``MIGRATIONS`` below. Applied versions are
+recorded in the ``schema_version`` table, one row per migration.
+
+Migrations are written to be re-runnable (tables, columns and indexes are only
+created when missing) because ``v0001`` builds tables from the current models:
+on a fresh database later migrations find their objects already present and
+simply record themselves as applied.
+"""
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, select
+from sqlalchemy.engine import Connection, Engine
+
+from app.database import advisory_lock
+from app.migrations import (
+    v0001_initial,
+    v0002_workload_indexes,
+    v0003_donor_coordinates,
+    v0004_notifications,
+    v0005_donation_archive,
+    v0006_event_registrations,
+    v0007_blood_batches,
+    v0008_blood_forecasts,
+    v0009_idempotency_keys,
+    v0010_audit_log,
+    v0011_notification_backoff,
+    v0012_certificates_without_donation_fk,
+)
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = [
+    v0001_initial,
+    v0002_workload_indexes,
+    v0003_donor_coordinates,
+    v0004_notifications,
+    v0005_donation_archive,
+    v0006_event_registrations,
+    v0007_blood_batches,
+    v0008_blood_forecasts,
+    v0009_idempotency_keys,
+    v0010_audit_log,
+    v0011_notification_backoff,
+    v0012_certificates_without_donation_fk,
+]
+
+LATEST_VERSION = MIGRATIONS[-1].VERSION
+
+_metadata = MetaData()
+
+schema_version = Table(
+    "schema_version",
+    _metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def current_version(conn: Connection) -> int:
+    """Return the highest applied migration version (0 for an empty database)."""
+    if not conn.dialect.has_table(conn, schema_version.name):
+        return 0
+    return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+@contextmanager
+def _migration_lock(engine: Engine):
+    """Serialize migrations across processes (MySQL named lock)."""
+    with advisory_lock(engine, "red_connect_migrations", timeout=60) as acquired:
+        if not acquired:
+            raise RuntimeError("Timed out waiting for the migration lock")
+        yield
+
+
+def check_version(engine: Engine) -> int:
+    """Verify the database is at ``LATEST_VERSION`` without touching any other table.
+
+    Raises ``RuntimeError`` if migrations are pending; returns the version.
+    """
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version < LATEST_VERSION:
+        raise RuntimeError(
+            f"Database schema is at version {version}, expected {LATEST_VERSION}. "
+            "Run: python manage.py migrate"
+        )
+    return version
+
+
+def pending_migrations(engine: Engine) -> list:
+    with engine.connect() as conn:
+        version = current_version(conn)
+    return [m for m in MIGRATIONS if m.VERSION > version]
+
+
+def upgrade(engine: Engine, target: int = None) -> list:
+    """Apply pending migrations up to ``target`` (default: latest).
+
+    Returns the list of versions that were applied.
+    """
+    applied = []
+    with _migration_lock(engine):
+        _metadata.create_all(bind=engine)
+        for migration in pending_migrations(engine):
+            if target is not None and migration.VERSION > target:
+                break
+            logger.info("Applying migration %04d: %s", migration.VERSION, migration.DESCRIPTION)
+            with engine.begin() as conn:
+                migration.upgrade(conn)
+                conn.execute(schema_version.insert().values(
+                    version=migration.VERSION,
+                    description=migration.DESCRIPTION,
+                    applied_at=datetime.utcnow(),
+                ))
+            applied.append(migration.VERSION)
+    return applied
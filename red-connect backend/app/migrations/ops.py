@@ -0,0 +1,58 @@
+"""
+Idempotent DDL helpers used by migrations.
+
+Each helper inspects the live schema first, so a migration can be re-run (or
+run against a database whose tables were created from newer models) safely.
+"""
+from sqlalchemy import Index, MetaData, Table, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import Column, CreateColumn
+
+
+def create_tables(conn: Connection, *tables: Table) -> None:
+    """Create the given tables (and their indexes) if they do not exist."""
+    for table in tables:
+        table.create(bind=conn, checkfirst=True)
+
+
+def add_column(conn: Connection, column: Column) -> None:
+    """Add a model column to its existing table if it is missing."""
+    table = column.table
+    existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    if column.name in existing:
+        return
+    ddl = CreateColumn(column).compile(dialect=conn.dialect)
+    conn.exec_driver_sql(f"ALTER TABLE {conn.dialect.identifier_preparer.format_table(table)} ADD COLUMN {ddl}")
+
+
+def create_index(conn: Connection, index: Index) -> None:
+    """Create an index if no index with the same name exists on its table."""
+    existing = {ix["name"] for ix in inspect(conn).get_indexes(index.table.name)}
+    if index.name not in existing:
+        index.create(bind=conn)
+
+
+
+def drop_index(conn: Connection, table_name: str, index_name: str) -> None:
+    """Drop an index if it exists on the table."""
+    table = Table(table_name, MetaData(), autoload_with=conn)
+    for index in table.indexes:
+        if index.name == index_name:
+            index.drop(bind=conn)
+
+
+def drop_foreign_key(conn: Connection, table_name: str, referred_table: str) -> None:
+    """Drop the table's foreign keys to ``referred_table``, if any.
+
+    SQLite cannot drop a constraint in place and does not enforce foreign keys
+    unless asked to, so there it is left alone.
+    """
+    if conn.dialect.name == "sqlite":
+        return
+    preparer = conn.dialect.identifier_preparer
+    keyword = "FOREIGN KEY" if conn.dialect.name == "mysql" else "CONSTRAINT"
+    for fk in inspect(conn).get_foreign_keys(table_name):
+        if fk.get("name") and fk["referred_table"] == referred_table:
+            conn.exec_driver_sql(
+                f"ALTER TABLE {preparer.quote(table_name)} DROP {keyword} {preparer.quote(fk['name'])}"
+            )
@@ -0,0 +1,24 @@
+"""
+Baseline schema: the tables that used to be created by ``create_all`` at startup.
+"""
+from sqlalchemy.engine import Connection
+from app.migrations import ops
+
+VERSION = 1
+DESCRIPTION = "Baseline tables"
+
+
+def upgrade(conn: Connection) -> None:
+    from app.models import User, Donor, Organizer, BloodBank, BloodInventory, Event, Donation, Certificate
+
+    ops.create_tables(
+        conn,
+        User.__table__,
+        Donor.__table__,
+        Organizer.__table__,
+        BloodBank.__table__,
+        BloodInventory.__table__,
+        Event.__table__,
+        Donation.__table__,
+        Certificate.__table__,
+    )
@@ -0,0 +1,46 @@
+"""
+Composite indexes matching the filter and ORDER BY shapes of the list endpoints.
+
+    events         list_events / get_upcoming_events / get_my_events
+    donations      get_my_donations / list_donations
+    certificates   get_my_certificates / get_donor_certificates / list_certificates
+    blood_banks    list_blood_banks / get_states / get_cities_by_state
+    blood_inventory  get_bank_inventory (and the create_inventory upsert)
+    donors, organizers  list_donors / list_organizers
+"""
+from sqlalchemy.engine import Connection
+from app.migrations import ops
+
+VERSION = 2
+DESCRIPTION = "Workload-driven secondary indexes"
+
+INDEXES = {
+    "donors": ["ix_donors_type_city_state", "ix_donors_city_state", "ix_donors_state"],
+    "organizers": ["ix_organizers_city_state", "ix_organizers_state", "ix_organizers_verified"],
+    "blood_banks": ["ix_blood_banks_state_city", "ix_blood_banks_city", "ix_blood_banks_category"],
+    "blood_inventory": ["uq_blood_inventory_bank_type"],
+    "events": [
+        "ix_events_city_state_date",
+        "ix_events_state_date",
+        "ix_events_status_date",
+        "ix_events_event_date",
+        "ix_events_organizer_date",
+    ],
+    "donations": [
+        "ix_donations_donor_date",
+        "ix_donations_status_date",
+        "ix_donations_date",
+        "ix_donations_event_status",
+    ],
+    "certificates": ["ix_certificates_donor_issue", "ix_certificates_status_created", "ix_certificates_created"],
+}
+
+
+def upgrade(conn: Connection) -> None:
+    from app.models import Base
+
+    for table_name, index_names in INDEXES.items():
+        table = Base.metadata.tables[table_name]
+        by_name = {index.name: index for index in table.indexes}
+        for name in index_names:
+            ops.create_index(conn, by_name[name])
@@ -0,0 +1,15 @@
+"""
+Donor coordinates for emergency matching by distance.
+"""
+from sqlalchemy.engine import Connection
+from app.migrations import ops
+
+VERSION = 3
+DESCRIPTION = "Donor latitude/longitude"
+
+
+def upgrade(conn: Connection) -> None:
+    from app.models import Donor
+
+    ops.add_column(conn, Donor.__table__.c.latitude)
+    ops.add_column(conn, Donor.__table__.c.longitude)
@@ -0,0 +1,14 @@
+"""
+Notification outbox for messages to donors.
+"""
+from sqlalchemy.engine import Connection
+from app.migrations import ops
+
+VERSION = 4
+DESCRIPTION = "Notifications table"
+
+
+def upgrade(conn: Connection) -> None:
+    from app.models import Notification
+
+    ops.create_tables(conn, Notification.__table__)
@@ -0,0 +1,14 @@
+"""
+Per-donor totals of archived donations, so donor counters survive archiving.
+"""
+from sqlalchemy.engine import Connection
+from app.migrations import ops
+
+VERSION = 5
+DESCRIPTION = "Archived donation totals"
+
+
+def upgrade(conn: Connection) -> None:
+    from app.models import ArchivedDonationTotal
+
+    ops.create_tables(conn, ArchivedDonationTotal.__table__)
@@ -0,0 +1,20 @@
+"""
+Event registrations with a FIFO waitlist, and a kind on notifications so a
+waitlist promotion is not mistaken for the event announcement already sent.
+"""
+from sqlalchemy.engine import Connection
+from app.migrations import ops
+
+VERSION = 6
+DESCRIPTION = "Event registrations and waitlist"
+
+
+def upgrade(conn: Connection) -> None:
+    from app.models import EventRegistration, Notification
+
+    ops.create_tables(conn, EventRegistration.__table__)
+    ops.add_column(conn, Notification.__table__.c.kind)
+    by_name = {index.name: index for index in Notification.__table__.indexes}
+    # Create the wider unique index first: on MySQL it also backs the event_id foreign key
+    ops.create_index(conn, by_name["uq_notifications_event_donor_channel_kind"])
+    ops.drop_index(conn, "notifications", "uq_notifications_event_donor_channel")
@@ -0,0 +1,50 @@
+"""
+Batch-level blood inventory and the dispatch log.
+
+Existing ``blood_inventory`` counts become one whole blood batch each,
+collected on the row's ``last_updated`` date, so the per-(bank, type) totals
+keep matching the batches. The next expiry sweep retires those that are
+already past their shelf life.
+"""
+from datetime import date
+
+from sqlalchemy import exists, insert, select
+from sqlalchemy.engine import Connection
+from app.migrations import ops
+
+VERSION = 7
+DESCRIPTION = "Blood batches and dispatches"
+
+
+def upgrade(conn: Connection) -> None:
+    from app.inventory import expiry_date
+    from app.models import BatchStatus, BloodBatch, BloodComponent, BloodDispatch, BloodInventory
+
+    ops.create_tables(conn, BloodBatch.__table__, BloodDispatch.__table__)
+
+    rows = conn.execute(
+        select(BloodInventory.blood_bank_id, BloodInventory.blood_type, BloodInventory.units_available,
+               BloodInventory.last_updated)
+        .where(
+            BloodInventory.units_available > 0,
+            ~exists().where(
+                BloodBatch.blood_bank_id == BloodInventory.blood_bank_id,
+                BloodBatch.blood_type == BloodInventory.blood_type,
+            ),
+        )
+    ).all()
+    if rows:
+        batches = []
+        for bank_id, blood_type, units, last_updated in rows:
+            collected_on = last_updated.date() if last_updated else date.today()
+            batches.append({
+                "blood_bank_id": bank_id,
+                "blood_type": blood_type,
+                "component": BloodComponent.WHOLE_BLOOD,
+                "units_received": units,
+                "units_remaining": units,
+                "collected_on": collected_on,
+                "expires_on": expiry_date(BloodComponent.WHOLE_BLOOD, collected_on),
+                "status": BatchStatus.AVAILABLE,
+            })
+        conn.execute(insert(BloodBatch), batches)
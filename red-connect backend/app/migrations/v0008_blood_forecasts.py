@@ -0,0 +1,14 @@
+"""
+Stored demand forecasts per blood bank and blood type.
+"""
+from sqlalchemy.engine import Connection
+from app.migrations import ops
+
+VERSION = 8
+DESCRIPTION = "Blood demand forecasts"
+
+
+def upgrade(conn: Connection) -> None:
+    from app.models import BloodForecast
+
+    ops.create_tables(conn, BloodForecast.__table__)
@@ -0,0 +1,14 @@
+"""
+Stored results of requests sent with an Idempotency-Key.
+"""
+from sqlalchemy.engine import Connection
+from app.migrations import ops
+
+VERSION = 9
+DESCRIPTION = "Idempotency keys"
+
+
+def upgrade(conn: Connection) -> None:
+    from app.models import IdempotencyKey
+
+    ops.create_tables(conn, IdempotencyKey.__table__)
@@ -0,0 +1,14 @@
+"""
+Audit log of changes to donations, certificates and blood stock.
+"""
+from sqlalchemy.engine import Connection
+from app.migrations import ops
+
+VERSION = 10
+DESCRIPTION = "Audit log"
+
+
+def upgrade(conn: Connection) -> None:
+    from app.models import AuditLog
+
+    ops.create_tables(conn, AuditLog.__table__)
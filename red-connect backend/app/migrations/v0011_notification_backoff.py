@@ -0,0 +1,14 @@
+"""
+Retry time of notifications whose delivery failed.
+"""
+from sqlalchemy.engine import Connection
+from app.migrations import ops
+
+VERSION = 11
+DESCRIPTION = "Notification retry backoff"
+
+
+def upgrade(conn: Connection) -> None:
+    from app.models import Notification
+
+    ops.add_column(conn, Notification.__table__.c.next_attempt_at)
@@ -0,0 +1,15 @@
+"""
+Drop the foreign key from certificates to donations.
+
+Certificates stay in their table when the donation they were issued for is
+archived (see app/archive.py), so the reference may point at an archived row.
+"""
+from sqlalchemy.engine import Connection
+from app.migrations import ops
+
+VERSION = 12
+DESCRIPTION = "Certificates without a donation foreign key"
+
+
+def upgrade(conn: Connection) -> None:
+    ops.drop_foreign_key(conn, "certificates", "donations")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Date, Boolean, Float
+from sqlalchemy import BINARY, Column, Integer, String, DateTime, ForeignKey, Enum, Text, Date, Boolean, Float, Index, LargeBinary, SmallInteger
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -23,6 +23,17 @@ class BankCategory(str, enum.Enum):
     GOVERNMENT = "Government"
     PRIVATE = "Private"
 
+class BloodComponent(str, enum.Enum):
+    WHOLE_BLOOD = "whole_blood"
+    RED_CELLS = "red_cells"
+    PLATELETS = "platelets"
+    PLASMA = "plasma"
+
+class BatchStatus(str, enum.Enum):
+    AVAILABLE = "available"
+    ISSUED = "issued"  # every unit dispatched
+    EXPIRED = "expired"
+
 class EventStatus(str, enum.Enum):
     UPCOMING = "upcoming"
     ONGOING = "ongoing"
@@ -39,6 +50,24 @@ class CertificateStatus(str, enum.Enum):
     ISSUED = "issued"
     REVOKED = "revoked"
 
+class NotificationChannel(str, enum.Enum):
+    EMAIL = "email"
+    SMS = "sms"
+
+class NotificationStatus(str, enum.Enum):
+    QUEUED = "queued"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+class NotificationKind(str, enum.Enum):
+    ANNOUNCEMENT = "announcement"  # organizer invites donors to the event
+    WAITLIST_PROMOTED = "waitlist_promoted"  # a waitlisted donor got a place
+
+class RegistrationStatus(str, enum.Enum):
+    REGISTERED = "registered"
+    WAITLISTED = "waitlisted"
+
 # User Model (Base for Donors and Organizers)
 class User(Base):
     __tablename__ = "users"
@@ -69,6 +98,8 @@ class Donor(Base):
     city = Column(String(100))
     state = Column(String(100))
     pincode = Column(String(10))
+    latitude = Column(Float)
+    longitude = Column(Float)
     last_donation_date = Column(Date)
     total_donations = Column(Integer, default=0)
     weight = Column(Float)  # in kg
@@ -81,6 +112,12 @@ class Donor(Base):
     donations = relationship("Donation", back_populates="donor")
     certificates = relationship("Certificate", back_populates="donor_profile")
 
+    __table_args__ = (
+        Index("ix_donors_type_city_state", "blood_type", "city", "state"),
+        Index("ix_donors_city_state", "city", "state"),
+        Index("ix_donors_state", "state"),
+    )
+
 # Organizer Model
 class Organizer(Base):
     __tablename__ = "organizers"
@@ -103,6 +140,12 @@ class Organizer(Base):
     user = relationship("User", back_populates="organizer_profile")
     events = relationship("Event", back_populates="organizer")
 
+    __table_args__ = (
+        Index("ix_organizers_city_state", "city", "state"),
+        Index("ix_organizers_state", "state"),
+        Index("ix_organizers_verified", "verified"),
+    )
+
 # Blood Bank Model
 class BloodBank(Base):
     __tablename__ = "blood_banks"
@@ -125,6 +168,13 @@ class BloodBank(Base):
     
     # Relationships
     inventory = relationship("BloodInventory", back_populates="blood_bank")
+    batches = relationship("BloodBatch", back_populates="blood_bank")
+
+    __table_args__ = (
+        Index("ix_blood_banks_state_city", "state", "city"),
+        Index("ix_blood_banks_city", "city"),
+        Index("ix_blood_banks_category", "category"),
+    )
 
 # Blood Inventory Model
 class BloodInventory(Base):
@@ -133,12 +183,107 @@ class BloodInventory(Base):
     id = Column(Integer, primary_key=True, index=True)
     blood_bank_id = Column(Integer, ForeignKey("blood_banks.id"), nullable=False)
     blood_type = Column(Enum(BloodType), nullable=False)
-    units_available = Column(Integer, default=0)
+    units_available = Column(Integer, default=0)  # usable units across batches, kept in step by app/inventory.py
     last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     blood_bank = relationship("BloodBank", back_populates="inventory")
 
+    __table_args__ = (
+        Index("uq_blood_inventory_bank_type", "blood_bank_id", "blood_type", unique=True),
+    )
+
+# Blood Batch Model (units collected together, with their expiry)
+class BloodBatch(Base):
+    __tablename__ = "blood_batches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    blood_bank_id = Column(Integer, ForeignKey("blood_banks.id"), nullable=False)
+    blood_type = Column(Enum(BloodType), nullable=False)
+    component = Column(Enum(BloodComponent), default=BloodComponent.WHOLE_BLOOD, nullable=False)
+    units_received = Column(Integer, nullable=False)
+    units_remaining = Column(Integer, nullable=False)
+    collected_on = Column(Date, nullable=False)
+    expires_on = Column(Date, nullable=False)  # collected_on + the component's shelf life
+    status = Column(Enum(BatchStatus), default=BatchStatus.AVAILABLE, nullable=False)
+    received_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    blood_bank = relationship("BloodBank", back_populates="batches")
+
+    __table_args__ = (
+        # FIFO issuing: oldest available batch of a bank, type and component first
+        Index("ix_blood_batches_fifo", "blood_bank_id", "blood_type", "component", "status", "collected_on", "id"),
+        # Expiry sweep: available batches past their date
+        Index("ix_blood_batches_status_expiry", "status", "expires_on"),
+    )
+
+# Blood Dispatch Model (units issued from a bank, the demand history)
+class BloodDispatch(Base):
+    __tablename__ = "blood_dispatches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    blood_bank_id = Column(Integer, ForeignKey("blood_banks.id"), nullable=False)
+    blood_type = Column(Enum(BloodType), nullable=False)
+    component = Column(Enum(BloodComponent), nullable=False)
+    units = Column(Integer, nullable=False)
+    destination = Column(String(255))  # hospital or ward
+    dispatched_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_blood_dispatches_bank_type_date", "blood_bank_id", "blood_type", "dispatched_at"),
+        Index("ix_blood_dispatches_date", "dispatched_at"),
+    )
+
+# Blood Forecast Model (latest demand forecast per bank and type, see app/forecasting.py)
+class BloodForecast(Base):
+    __tablename__ = "blood_forecasts"
+    
+    blood_bank_id = Column(Integer, ForeignKey("blood_banks.id"), primary_key=True, autoincrement=False)
+    blood_type = Column(Enum(BloodType), primary_key=True)
+    horizon_days = Column(Integer, nullable=False)
+    daily_demand = Column(Text, nullable=False)  # JSON list, one value per day of the horizon
+    demand = Column(Float, nullable=False)  # expected units over the horizon
+    demand_high = Column(Float, nullable=False)  # 90th percentile
+    units_available = Column(Integer, nullable=False)  # stock when computed
+    days_of_cover = Column(Integer)  # days until demand exceeds stock; NULL if it lasts the horizon
+    shortfall = Column(Float, nullable=False)  # demand_high - stock, if positive
+    computed_at = Column(DateTime, nullable=False)
+
+# Idempotency Key Model (stored results of POST/PUT requests, see app/idempotency.py)
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    
+    key_hash = Column(BINARY(32), primary_key=True)  # SHA-256 of caller, method, path and Idempotency-Key
+    request_hash = Column(BINARY(32), nullable=False)  # SHA-256 of the request body
+    status_code = Column(SmallInteger)  # NULL while the first request is running
+    content_type = Column(String(100))
+    body = Column(LargeBinary)
+    expires_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires", "expires_at"),
+    )
+
+# Audit Log Model (ORM changes to audited tables, written in batches by app/audit.py)
+class AuditLog(Base):
+    __tablename__ = "audit_log"
+    
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False)  # when the change was flushed
+    actor_user_id = Column(Integer)  # no foreign key: entries outlive users; NULL for background jobs
+    entity = Column(String(50), nullable=False)  # table name
+    entity_id = Column(Integer)
+    action = Column(String(10), nullable=False)  # insert, update or delete
+    changes = Column(Text, nullable=False)  # JSON: new values (insert), [old, new] pairs (update), last values (delete)
+    
+    __table_args__ = (
+        Index("ix_audit_log_entity_record", "entity", "entity_id", "created_at"),
+        Index("ix_audit_log_entity_created", "entity", "created_at"),
+        Index("ix_audit_log_actor_created", "actor_user_id", "created_at"),
+        Index("ix_audit_log_created", "created_at"),
+    )
+
 # Event Model (Blood Donation Camps)
 class Event(Base):
     __tablename__ = "events"
@@ -163,6 +308,38 @@ class Event(Base):
     # Relationships
     organizer = relationship("Organizer", back_populates="events")
     donations = relationship("Donation", back_populates="event")
+    notifications = relationship("Notification", back_populates="event", passive_deletes=True)
+    registrations = relationship("EventRegistration", back_populates="event", passive_deletes=True)
+
+    __table_args__ = (
+        Index("ix_events_city_state_date", "city", "state", "event_date", "status"),
+        Index("ix_events_state_date", "state", "event_date"),
+        Index("ix_events_status_date", "status", "event_date"),
+        Index("ix_events_event_date", "event_date"),
+        Index("ix_events_organizer_date", "organizer_id", "event_date"),
+    )
+
+# Event Registration Model (confirmed places and the FIFO waitlist, see app/waitlist.py)
+class EventRegistration(Base):
+    __tablename__ = "event_registrations"
+    
+    id = Column(Integer, primary_key=True, index=True)  # increasing, so also the waitlist order
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
+    donor_id = Column(Integer, ForeignKey("donors.id"), nullable=False)
+    status = Column(Enum(RegistrationStatus), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    promoted_at = Column(DateTime)  # moved off the waitlist
+    
+    # Relationships
+    event = relationship("Event", back_populates="registrations")
+
+    __table_args__ = (
+        # One registration per donor and event
+        Index("uq_event_registrations_event_donor", "event_id", "donor_id", unique=True),
+        # Head of an event's waitlist: first rows of (event_id, WAITLISTED) by id
+        Index("ix_event_registrations_event_status", "event_id", "status", "id"),
+        Index("ix_event_registrations_donor", "donor_id"),
+    )
 
 # Donation Model
 class Donation(Base):
@@ -183,14 +360,25 @@ class Donation(Base):
     # Relationships
     donor = relationship("Donor", back_populates="donations")
     event = relationship("Event", back_populates="donations")
-    certificate = relationship("Certificate", back_populates="donation", uselist=False)
+    certificate = relationship(
+        "Certificate", primaryjoin="Donation.id == foreign(Certificate.donation_id)",
+        back_populates="donation", uselist=False
+    )
+
+    __table_args__ = (
+        Index("ix_donations_donor_date", "donor_id", "donation_date"),
+        Index("ix_donations_status_date", "status", "donation_date"),
+        Index("ix_donations_date", "donation_date"),
+        Index("ix_donations_event_status", "event_id", "status"),
+    )
 
 # Certificate Model
 class Certificate(Base):
     __tablename__ = "certificates"
     
     id = Column(Integer, primary_key=True, index=True)
-    donation_id = Column(Integer, ForeignKey("donations.id"), unique=True, nullable=False)
+    # No foreign key: certificates stay here when their donation is archived (see app/archive.py)
+    donation_id = Column(Integer, unique=True, nullable=False)
     donor_id = Column(Integer, ForeignKey("donors.id"), nullable=False)
     certificate_number = Column(String(100), unique=True, nullable=False)
     issue_date = Column(Date, nullable=False)
@@ -204,5 +392,50 @@ class Certificate(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    donation = relationship("Donation", back_populates="certificate")
+    donation = relationship(
+        "Donation", primaryjoin="foreign(Certificate.donation_id) == Donation.id", back_populates="certificate"
+    )
     donor_profile = relationship("Donor", back_populates="certificates")
+
+    __table_args__ = (
+        Index("ix_certificates_donor_issue", "donor_id", "issue_date"),
+        Index("ix_certificates_status_created", "status", "created_at"),
+        Index("ix_certificates_created", "created_at"),
+    )
+
+# Per-donor totals of the donations moved to the archive (see app/archive.py)
+class ArchivedDonationTotal(Base):
+    __tablename__ = "archived_donation_totals"
+    
+    donor_id = Column(Integer, ForeignKey("donors.id"), primary_key=True, autoincrement=False)
+    year = Column(Integer, primary_key=True, autoincrement=False)
+    donations = Column(Integer, default=0, nullable=False)  # not cancelled
+    last_donation_date = Column(Date)
+
+# Notification Model (outbox of messages to donors)
+class Notification(Base):
+    __tablename__ = "notifications"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    donor_id = Column(Integer, ForeignKey("donors.id"), nullable=False)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
+    channel = Column(Enum(NotificationChannel), nullable=False)
+    status = Column(Enum(NotificationStatus), default=NotificationStatus.QUEUED, nullable=False)
+    kind = Column(Enum(NotificationKind), default=NotificationKind.ANNOUNCEMENT, server_default=NotificationKind.ANNOUNCEMENT.name, nullable=False)
+    message = Column(Text)  # Optional note from the organizer
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(String(255))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    claimed_at = Column(DateTime)
+    next_attempt_at = Column(DateTime)  # after a failed delivery: not claimed again before this
+    sent_at = Column(DateTime)
+    
+    # Relationships
+    event = relationship("Event", back_populates="notifications")
+
+    __table_args__ = (
+        # One message of each kind per donor, event and channel
+        Index("uq_notifications_event_donor_channel_kind", "event_id", "donor_id", "channel", "kind", unique=True),
+        Index("ix_notifications_status_channel", "status", "channel", "id"),
+        Index("ix_notifications_donor", "donor_id"),
+    )
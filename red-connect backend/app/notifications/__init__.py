@@ -0,0 +1,42 @@
+"""
+Notifications to donors (email and SMS) sent through an outbox table.
+
+``enqueue_event_notifications`` is called from request handlers; ``notifier``
+is the process-wide dispatcher started with the app (or by
+``python manage.py send-notifications``).
+"""
+from app.config import settings
+from app.database import SessionLocal
+from app.notifications.dispatcher import NotificationDispatcher, enqueue_event_notifications, queue_promotion_notifications
+from app.notifications.transports import (
+    FileTransport,
+    HttpSmsTransport,
+    OutboundMessage,
+    SmtpTransport,
+    SocketTransport,
+    Transport,
+    build_transport,
+)
+
+notifier = NotificationDispatcher(
+    SessionLocal,
+    batch_size=settings.NOTIFY_BATCH_SIZE,
+    max_attempts=settings.NOTIFY_MAX_ATTEMPTS,
+    retry_base_seconds=settings.NOTIFY_RETRY_BASE_SECONDS,
+    retry_max_seconds=settings.NOTIFY_RETRY_MAX_SECONDS,
+    poll_seconds=settings.NOTIFY_POLL_SECONDS,
+)
+
+__all__ = [
+    "NotificationDispatcher",
+    "enqueue_event_notifications",
+    "queue_promotion_notifications",
+    "notifier",
+    "Transport",
+    "OutboundMessage",
+    "FileTransport",
+    "SocketTransport",
+    "SmtpTransport",
+    "HttpSmsTransport",
+    "build_transport",
+]
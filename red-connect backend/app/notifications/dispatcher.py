@@ -0,0 +1,345 @@
+"""
+Notification outbox: enqueueing and the background sender.
+
+Requests only insert ``notifications`` rows (one INSERT ... SELECT per
+channel, skipping donors already notified about the event) and wake the
+dispatcher. The dispatcher claims batches with ``SELECT ... FOR UPDATE SKIP
+LOCKED`` so several processes can send without picking the same rows, hands
+each batch to the channel's transport and writes the delivery states back in
+one executemany UPDATE. A failed message goes back to the queue with a
+``next_attempt_at`` that doubles with every attempt, so a flaky transport
+does not use up ``max_attempts`` within a few polls.
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import DateTime, Integer, and_, exists, insert, literal, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+
+from app.models import (
+    BloodType,
+    Donor,
+    Event,
+    Notification,
+    NotificationChannel,
+    NotificationKind,
+    NotificationStatus,
+    User,
+)
+from app.notifications.transports import OutboundMessage, Transport, build_transport
+
+logger = logging.getLogger(__name__)
+
+SMS_MAX_LENGTH = 320
+# A batch claimed by a process that died is picked up again after this long
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def _enqueue_statement(
+    event: Event,
+    channel: NotificationChannel,
+    kind: NotificationKind,
+    blood_types: Optional[List[BloodType]],
+    donor_ids: Optional[List[int]],
+    message: Optional[str],
+    now: datetime,
+):
+    existing = aliased(Notification)
+    donors = select(
+        Donor.id,
+        literal(event.id, Integer),
+        literal(channel, Notification.channel.type),
+        literal(kind, Notification.kind.type),
+        literal(NotificationStatus.QUEUED, Notification.status.type),
+        literal(message, Notification.message.type),
+        literal(0, Integer),
+        literal(now, DateTime),
+    ).join(User, User.id == Donor.user_id).where(
+        User.is_active == True,
+        ~exists().where(
+            existing.event_id == event.id,
+            existing.donor_id == Donor.id,
+            existing.channel == channel,
+            existing.kind == kind,
+        ),
+    )
+    if donor_ids is not None:
+        donors = donors.where(Donor.id.in_(donor_ids))
+    else:
+        donors = donors.where(Donor.city == event.city, Donor.state == event.state)
+    if blood_types:
+        donors = donors.where(Donor.blood_type.in_(blood_types))
+    if channel == NotificationChannel.SMS:
+        donors = donors.where(Donor.phone.isnot(None), Donor.phone != "")
+
+    return insert(Notification).from_select(
+        ["donor_id", "event_id", "channel", "kind", "status", "message", "attempts", "created_at"], donors
+    )
+
+
+def enqueue_event_notifications(
+    db: Session,
+    event: Event,
+    channels: Iterable[NotificationChannel],
+    blood_types: Optional[List[BloodType]] = None,
+    donor_ids: Optional[List[int]] = None,
+    message: Optional[str] = None,
+) -> int:
+    """Queue one message per active donor and channel; returns how many were queued.
+
+    Without ``donor_ids`` the event's city and state select the donors. Donors
+    who already have a message for this event on a channel are skipped.
+    """
+    now = datetime.utcnow()
+    queued = 0
+    for channel in channels:
+        statement = _enqueue_statement(
+            event, channel, NotificationKind.ANNOUNCEMENT, blood_types, donor_ids, message, now
+        )
+        try:
+            queued += db.execute(statement).rowcount
+            db.commit()
+        except IntegrityError:
+            # A concurrent request queued some of the same donors; the retry skips them.
+            db.rollback()
+            queued += db.execute(statement).rowcount
+            db.commit()
+    return queued
+
+
+def queue_promotion_notifications(
+    db: Session,
+    event: Event,
+    donor_ids: List[int],
+    channels: Iterable[NotificationChannel],
+) -> int:
+    """Queue "you have a place" messages for donors promoted off the waitlist.
+
+    Runs in the caller's transaction and does not commit, so the messages are
+    stored together with the promotion or not at all. A donor is told about a
+    promotion once per event and channel.
+    """
+    if not donor_ids:
+        return 0
+    now = datetime.utcnow()
+    return sum(
+        db.execute(_enqueue_statement(
+            event, channel, NotificationKind.WAITLIST_PROMOTED, None, donor_ids, None, now
+        )).rowcount
+        for channel in channels
+    )
+
+
+def render(channel: NotificationChannel, row) -> tuple:
+    """Return (subject, body) for a claimed notification row."""
+    when = row.event_date.strftime("%d %b %Y")
+    if row.start_time:
+        when = f"{when}, {row.start_time}"
+    promoted = row.kind == NotificationKind.WAITLIST_PROMOTED
+    if promoted:
+        subject = f"You're registered: {row.title} on {row.event_date:%d %b}"
+    else:
+        subject = f"Blood donation camp: {row.title} on {row.event_date:%d %b}"
+    if channel == NotificationChannel.SMS:
+        if promoted:
+            body = f"Red Connect: a place opened up, you're now registered for {row.title} at {row.venue}, {row.city} on {when}."
+        else:
+            body = f"Red Connect: {row.title} at {row.venue}, {row.city} on {when}."
+        if row.message:
+            body = f"{body} {row.message}"
+        return subject, body[:SMS_MAX_LENGTH]
+
+    lines = [f"Hello {row.full_name},", ""]
+    if promoted:
+        lines.append(f"A place opened up and you are now registered for {row.title} at {row.venue}, {row.city} on {when}.")
+    else:
+        lines.append(f"{row.title} is being held at {row.venue}, {row.city} on {when}.")
+    if row.message:
+        lines += ["", row.message]
+    lines += ["", "Thank you for saving lives,", "Red Connect"]
+    return subject, "\n".join(lines)
+
+
+class NotificationDispatcher:
+    """Sends queued notifications in batches, one background thread per channel.
+
+    Channels are independent so a slow or rate-limited SMS provider does not
+    hold back email.
+    """
+
+    def __init__(self, session_factory, transports: Optional[Dict[NotificationChannel, Transport]] = None,
+                 batch_size: int = 200, max_attempts: int = 3, poll_seconds: float = 5.0,
+                 retry_base_seconds: float = 30.0, retry_max_seconds: float = 3600.0):
+        self.session_factory = session_factory
+        self._transports = transports
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.stats = {"sent": 0, "failed": 0, "retried": 0}
+        self._stats_lock = threading.Lock()
+        self._wake = {channel: threading.Event() for channel in NotificationChannel}
+        self._stop = threading.Event()
+        self._threads = []
+
+    @property
+    def transports(self) -> Dict[NotificationChannel, Transport]:
+        # Built on first use so a misconfigured transport fails the sender, not imports.
+        if self._transports is None:
+            transports = {}
+            for channel in NotificationChannel:
+                transport = build_transport(channel)
+                if transport is not None:
+                    transports[channel] = transport
+            self._transports = transports
+        return self._transports
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def start(self) -> None:
+        if any(thread.is_alive() for thread in self._threads):
+            return
+        self._stop.clear()
+        try:
+            channels = list(self.transports)
+        except ValueError as e:
+            logger.error(f"❌ Notifications disabled: {e}")
+            return
+        self._threads = [
+            threading.Thread(target=self.run, args=([channel],), name=f"notify-{channel.value}", daemon=True)
+            for channel in channels
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        for event in self._wake.values():
+            event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self) -> None:
+        """Start sending now instead of at the next poll."""
+        for event in self._wake.values():
+            event.set()
+
+    def run(self, channels: Optional[List[NotificationChannel]] = None) -> None:
+        """Send until stopped; ``channels`` defaults to every configured channel."""
+        channels = channels or list(self.transports)
+        if not channels:
+            logger.warning("⚠️ No notification transports configured")
+            return
+        wake = self._wake[channels[0]] if len(channels) == 1 else threading.Event()
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once(channels)
+            except Exception as e:
+                logger.error(f"❌ Notification dispatch failed: {e}")
+                processed = 0
+            if not processed:
+                wake.wait(self.poll_seconds)
+                wake.clear()
+
+    def run_once(self, channels: Optional[List[NotificationChannel]] = None) -> int:
+        """Send one batch per channel; returns the number of messages processed."""
+        processed = 0
+        for channel in channels or list(self.transports):
+            transport = self.transports[channel]
+            rows = self._claim(channel)
+            if not rows:
+                continue
+            messages, undeliverable = [], {}
+            for row in rows:
+                recipient = row.email if channel == NotificationChannel.EMAIL else row.phone
+                if not recipient:
+                    undeliverable[row.id] = "no recipient address"
+                    continue
+                subject, body = render(channel, row)
+                messages.append(OutboundMessage(row.id, channel, recipient, subject, body))
+            results = transport.send_batch(messages) if messages else {}
+            results.update(undeliverable)
+            self._record(results, {row.id: row.attempts for row in rows}, permanent=set(undeliverable))
+            processed += len(rows)
+        return processed
+
+    # -- database ----------------------------------------------------------
+
+    def _claim(self, channel: NotificationChannel) -> list:
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            ids = [notification_id for (notification_id,) in db.query(Notification.id).filter(
+                Notification.channel == channel,
+                or_(
+                    and_(Notification.status == NotificationStatus.QUEUED,
+                         or_(Notification.next_attempt_at.is_(None), Notification.next_attempt_at <= now)),
+                    and_(Notification.status == NotificationStatus.SENDING,
+                         Notification.claimed_at < now - CLAIM_TIMEOUT),
+                ),
+            ).order_by(Notification.id).limit(self.batch_size).with_for_update(skip_locked=True).all()]
+            if not ids:
+                db.commit()
+                return []
+
+            db.query(Notification).filter(Notification.id.in_(ids)).update({
+                Notification.status: NotificationStatus.SENDING,
+                Notification.claimed_at: now,
+                Notification.attempts: Notification.attempts + 1,
+            }, synchronize_session=False)
+            rows = db.query(
+                Notification.id, Notification.attempts, Notification.kind, Notification.message,
+                User.email, Donor.phone, Donor.full_name,
+                Event.title, Event.event_date, Event.start_time, Event.venue, Event.city,
+            ).join(Donor, Donor.id == Notification.donor_id).join(
+                User, User.id == Donor.user_id
+            ).join(Event, Event.id == Notification.event_id).filter(
+                Notification.id.in_(ids)
+            ).all()
+            db.commit()
+            return rows
+        finally:
+            db.close()
+
+    def retry_delay(self, attempts: int) -> timedelta:
+        """Wait before the next try of a message that has failed ``attempts`` times."""
+        seconds = self.retry_base_seconds * 2 ** max(attempts - 1, 0)
+        return timedelta(seconds=min(seconds, self.retry_max_seconds))
+
+    def _record(self, results: Dict[int, Optional[str]], attempts: Dict[int, int], permanent=frozenset()) -> None:
+        now = datetime.utcnow()
+        updates = []
+        counts = {"sent": 0, "failed": 0, "retried": 0}
+        for notification_id, error in results.items():
+            next_attempt_at = None
+            if error is None:
+                status, sent_at = NotificationStatus.SENT, now
+                counts["sent"] += 1
+            elif notification_id in permanent or attempts[notification_id] >= self.max_attempts:
+                status, sent_at = NotificationStatus.FAILED, None
+                counts["failed"] += 1
+            else:
+                status, sent_at = NotificationStatus.QUEUED, None
+                next_attempt_at = now + self.retry_delay(attempts[notification_id])
+                counts["retried"] += 1
+            updates.append({
+                "id": notification_id, "status": status, "sent_at": sent_at, "error": error,
+                "next_attempt_at": next_attempt_at,
+            })
+        if not updates:
+            return
+        with self._stats_lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+        db = self.session_factory()
+        try:
+            db.execute(update(Notification), updates)
+            db.commit()
+        finally:
+            db.close()
@@ -0,0 +1,223 @@
+"""
+Delivery transports.
+
+A transport sends a batch of messages for one channel over a single
+connection, paced by its own rate limit, and reports a per-message error
+(``None`` when delivered). Production uses SMTP for email and an HTTP
+gateway for SMS; the file and socket sinks write one JSON line per message
+for local development and tests.
+"""
+import json
+import smtplib
+import socket
+import threading
+import time
+import urllib.request
+from email.message import EmailMessage
+from typing import Dict, List, NamedTuple, Optional
+
+from app.config import settings
+from app.models import NotificationChannel
+
+
+class OutboundMessage(NamedTuple):
+    id: int
+    channel: NotificationChannel
+    recipient: str
+    subject: str
+    body: str
+
+
+class RateLimiter:
+    """Token bucket: at most ``rate`` messages per second, bursts of up to ``rate``."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+class Transport:
+    """Base class: subclasses implement ``deliver`` and optionally ``open``/``close``."""
+
+    name = "base"
+
+    def __init__(self, rate_per_second: float = 0):
+        self.limiter = RateLimiter(rate_per_second)
+
+    def open(self) -> None:
+        pass
+
+    def deliver(self, message: OutboundMessage) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def send_batch(self, messages: List[OutboundMessage]) -> Dict[int, Optional[str]]:
+        try:
+            self.open()
+        except Exception as e:
+            error = f"{self.name}: {e}"[:255]
+            return {message.id: error for message in messages}
+
+        results = {}
+        try:
+            for message in messages:
+                self.limiter.acquire()
+                try:
+                    self.deliver(message)
+                    results[message.id] = None
+                except Exception as e:
+                    results[message.id] = f"{self.name}: {e}"[:255]
+        finally:
+            try:
+                self.close()
+            except Exception:
+                pass
+        return results
+
+
+def _as_json_line(message: OutboundMessage) -> bytes:
+    return (json.dumps({
+        "id": message.id,
+        "channel": message.channel.value,
+        "to": message.recipient,
+        "subject": message.subject,
+        "body": message.body,
+    }) + "\n").encode("utf-8")
+
+
+class FileTransport(Transport):
+    """Appends each message to a local NDJSON file."""
+
+    name = "file"
+    _lock = threading.Lock()
+
+    def __init__(self, path: str, rate_per_second: float = 0):
+        super().__init__(rate_per_second)
+        self.path = path
+        self._lines = []
+
+    def open(self) -> None:
+        self._lines = []
+
+    def deliver(self, message: OutboundMessage) -> None:
+        self._lines.append(_as_json_line(message))
+
+    def close(self) -> None:
+        with self._lock, open(self.path, "ab") as sink:
+            sink.writelines(self._lines)
+        self._lines = []
+
+
+class SocketTransport(Transport):
+    """Writes each message as a JSON line to a TCP listener (e.g. ``nc -lk 9025``)."""
+
+    name = "socket"
+
+    def __init__(self, address: str, rate_per_second: float = 0):
+        super().__init__(rate_per_second)
+        host, _, port = address.rpartition(":")
+        self.address = (host or "127.0.0.1", int(port))
+        self._socket = None
+
+    def open(self) -> None:
+        self._socket = socket.create_connection(self.address, timeout=10)
+
+    def deliver(self, message: OutboundMessage) -> None:
+        self._socket.sendall(_as_json_line(message))
+
+    def close(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+class SmtpTransport(Transport):
+    """Sends email over one SMTP session per batch."""
+
+    name = "smtp"
+
+    def __init__(self, rate_per_second: float = 0):
+        super().__init__(rate_per_second)
+        self._smtp = None
+
+    def open(self) -> None:
+        self._smtp = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=30)
+        if settings.SMTP_STARTTLS:
+            self._smtp.starttls()
+        if settings.SMTP_USER:
+            self._smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+
+    def deliver(self, message: OutboundMessage) -> None:
+        email = EmailMessage()
+        email["From"] = settings.SMTP_FROM
+        email["To"] = message.recipient
+        email["Subject"] = message.subject
+        email.set_content(message.body)
+        self._smtp.send_message(email)
+
+    def close(self) -> None:
+        if self._smtp is not None:
+            self._smtp.quit()
+            self._smtp = None
+
+
+class HttpSmsTransport(Transport):
+    """Posts each SMS as JSON to a gateway URL."""
+
+    name = "http"
+
+    def __init__(self, url: str, token: str = "", rate_per_second: float = 0):
+        super().__init__(rate_per_second)
+        self.url = url
+        self.token = token
+
+    def deliver(self, message: OutboundMessage) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"to": message.recipient, "message": message.body}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        if self.token:
+            request.add_header("Authorization", f"Bearer {self.token}")
+        with urllib.request.urlopen(request, timeout=10) as response:
+            response.read()
+
+
+def build_transport(channel: NotificationChannel) -> Optional[Transport]:
+    """Create the transport configured for a channel, or None when disabled."""
+    if channel == NotificationChannel.EMAIL:
+        kind, rate = settings.NOTIFY_EMAIL_TRANSPORT, settings.NOTIFY_EMAIL_RATE
+    else:
+        kind, rate = settings.NOTIFY_SMS_TRANSPORT, settings.NOTIFY_SMS_RATE
+
+    if kind == "file":
+        return FileTransport(settings.NOTIFY_FILE_PATH, rate)
+    if kind == "socket":
+        return SocketTransport(settings.NOTIFY_SOCKET_ADDRESS, rate)
+    if kind == "smtp" and channel == NotificationChannel.EMAIL:
+        return SmtpTransport(rate)
+    if kind == "http" and channel == NotificationChannel.SMS:
+        if not settings.SMS_GATEWAY_URL:
+            raise ValueError("NOTIFY_SMS_TRANSPORT=http needs SMS_GATEWAY_URL")
+        return HttpSmsTransport(settings.SMS_GATEWAY_URL, settings.SMS_GATEWAY_TOKEN, rate)
+    if kind != "none":
+        raise ValueError(f"Unsupported {channel.value} transport: {kind!r}")
+    return None
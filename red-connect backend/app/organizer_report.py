@@ -0,0 +1,177 @@
+"""
+Per-event results for organizers (``GET /api/organizers/me/report``).
+
+Every metric comes from one grouped query: the organizer's events in the date
+range, left-joined to their donations and to those donations' issued
+certificates, grouped by event, blood type and donation status. That gives a
+handful of rows per event (one per blood type and status present), which are
+folded into the per-event report and the totals in Python. The waitlist size
+is a correlated count on the ``(event_id, status, id)`` registrations index.
+
+Reports are cached per organizer and date range for
+``ORGANIZER_REPORT_CACHE_TTL_SECONDS``. Changes to the organizer's events, to
+donations made at them, to their certificates and to registrations drop all
+of that organizer's cached reports in the worker that handled the change;
+other workers catch up within the TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, Optional
+
+import orjson
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import (
+    Certificate,
+    CertificateStatus,
+    Donation,
+    DonationStatus,
+    Event,
+    EventRegistration,
+    RegistrationStatus,
+)
+
+
+def build_report(db: Session, organizer_id: int, from_date: Optional[date] = None, to_date: Optional[date] = None) -> dict:
+    """Per-event donations, units and certificates for an organizer's events, with totals."""
+    waitlisted = select(func.count(EventRegistration.id)).where(
+        EventRegistration.event_id == Event.id,
+        EventRegistration.status == RegistrationStatus.WAITLISTED,
+    ).correlate(Event).scalar_subquery()
+    event_columns = (
+        Event.id, Event.title, Event.event_date, Event.city, Event.status,
+        Event.registered_participants, Event.max_participants,
+    )
+    query = db.query(
+        *event_columns,
+        waitlisted.label("waitlisted"),
+        Donation.blood_type,
+        Donation.status.label("donation_status"),
+        func.count(Donation.id).label("donations"),
+        func.coalesce(func.sum(Donation.units), 0).label("units"),
+        func.count(Certificate.id).label("certificates"),
+    ).outerjoin(
+        Donation, Donation.event_id == Event.id
+    ).outerjoin(
+        Certificate, and_(Certificate.donation_id == Donation.id, Certificate.status == CertificateStatus.ISSUED)
+    ).filter(Event.organizer_id == organizer_id)
+    if from_date:
+        query = query.filter(Event.event_date >= from_date)
+    if to_date:
+        query = query.filter(Event.event_date <= to_date)
+    rows = query.group_by(*event_columns, Donation.blood_type, Donation.status).order_by(Event.event_date, Event.id).all()
+
+    events: Dict[int, dict] = {}
+    for row in rows:
+        event = events.get(row.id)
+        if event is None:
+            event = events[row.id] = {
+                "event_id": row.id,
+                "title": row.title,
+                "event_date": row.event_date,
+                "city": row.city,
+                "status": row.status,
+                "registered": row.registered_participants or 0,
+                "waitlisted": row.waitlisted,
+                "max_participants": row.max_participants,
+                "donations": 0,
+                "donations_by_status": {},
+                "units_collected": 0.0,
+                "by_blood_type": {},
+                "certificates_issued": 0,
+            }
+        if not row.donations:
+            # The event's row when it has no donations
+            continue
+        event["donations"] += row.donations
+        by_status = event["donations_by_status"]
+        by_status[row.donation_status.value] = by_status.get(row.donation_status.value, 0) + row.donations
+        by_type = event["by_blood_type"].setdefault(row.blood_type.value, {"donations": 0, "units_collected": 0.0})
+        by_type["donations"] += row.donations
+        if row.donation_status == DonationStatus.COMPLETED:
+            event["units_collected"] += float(row.units)
+            by_type["units_collected"] += float(row.units)
+        event["certificates_issued"] += row.certificates
+
+    totals = {"events": len(events), "registered": 0, "donations": 0, "units_collected": 0.0,
+              "certificates_issued": 0, "by_blood_type": {}}
+    for event in events.values():
+        for key in ("registered", "donations", "units_collected", "certificates_issued"):
+            totals[key] += event[key]
+        for blood_type, counts in event["by_blood_type"].items():
+            total = totals["by_blood_type"].setdefault(blood_type, {"donations": 0, "units_collected": 0.0})
+            total["donations"] += counts["donations"]
+            total["units_collected"] += counts["units_collected"]
+
+    return {
+        "from": from_date,
+        "to": to_date,
+        "events": list(events.values()),
+        "totals": totals,
+        "generated_at": datetime.utcnow(),
+    }
+
+
+class ReportCache:
+    """Encoded reports per organizer and date range; organizers least recently used evicted first."""
+
+    def __init__(self, ttl_seconds: float = 300, max_organizers: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_organizers = max_organizers
+        self._reports: "OrderedDict[int, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, organizer_id: int, key: tuple) -> Optional[bytes]:
+        """The cached body, or None when missing or expired."""
+        with self._lock:
+            entry = self._reports.get(organizer_id, {}).get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            self._reports.move_to_end(organizer_id)
+            return entry[0]
+
+    def put(self, organizer_id: int, key: tuple, body: bytes) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            reports = self._reports.setdefault(organizer_id, {})
+            # Drop this organizer's expired ranges so arbitrary ranges cannot pile up
+            for stale in [k for k, (_, expires) in reports.items() if expires <= now]:
+                del reports[stale]
+            reports[key] = (body, now + self.ttl_seconds)
+            self._reports.move_to_end(organizer_id)
+            while len(self._reports) > self.max_organizers:
+                self._reports.popitem(last=False)
+
+    def invalidate(self, organizer_id: Optional[int]) -> None:
+        """Drop every cached report of an organizer (their data changed)."""
+        if organizer_id is None:
+            return
+        with self._lock:
+            self._reports.pop(organizer_id, None)
+
+
+def organizer_of_event(db: Session, event_id: Optional[int]) -> Optional[int]:
+    """The organizer of an event, for invalidating reports after a donation or certificate change."""
+    if event_id is None:
+        return None
+    return db.query(Event.organizer_id).filter(Event.id == event_id).scalar()
+
+
+def organizer_of_donation(db: Session, donation_id: int) -> Optional[int]:
+    """The organizer of the event a donation was made at, if any (for certificate changes)."""
+    return db.query(Event.organizer_id).join(Donation, Donation.event_id == Event.id).filter(
+        Donation.id == donation_id
+    ).scalar()
+
+
+def encode_report(report: dict) -> bytes:
+    return orjson.dumps(report)
+
+
+report_cache = ReportCache(ttl_seconds=settings.ORGANIZER_REPORT_CACHE_TTL_SECONDS)
@@ -0,0 +1,110 @@
+"""
+MySQL RANGE partitioning of ``donations`` and ``events`` by year.
+
+With one partition per year, queries on recent dates only touch the newest
+partitions (partition pruning), each year's rows and index pages stay
+together, and archiving a closed year ends by dropping its emptied partition
+instead of leaving holes in one large table.
+
+MySQL requires the partitioning column in every unique key, including the
+primary key, and InnoDB rejects any foreign key on a partitioned table or
+referring to one. ``partition_table`` therefore widens the primary key to
+``(id, <date>)`` and drops exactly those foreign keys; the ones between other
+tables stay. Integrity of the dropped references, including the ON DELETE
+CASCADE from notifications and event registrations to events, is then up to
+the application: ``delete_event`` and ``archive_year`` delete those rows
+explicitly. Partitioning is an explicit step
+(``python manage.py partition``), not a migration, and does nothing on other
+databases.
+"""
+from typing import Dict, List, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+# table -> partitioning column
+PARTITIONED_TABLES = {
+    "donations": "donation_date",
+    "events": "event_date",
+}
+
+# Rows older than the first yearly partition, and rows past the last one
+OLDEST_PARTITION = "p_old"
+FUTURE_PARTITION = "p_future"
+
+
+def supported(conn: Connection) -> bool:
+    return conn.dialect.name == "mysql"
+
+
+def partitions(conn: Connection, table: str) -> Dict[str, Optional[str]]:
+    """Partition name -> upper bound (``VALUES LESS THAN``), in order; empty if not partitioned."""
+    rows = conn.execute(text(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    ), {"table": table})
+    return {name: description for name, description in rows}
+
+
+def _year_partitions(names) -> List[int]:
+    return sorted(int(name[1:]) for name in names if name[1:].isdigit())
+
+
+def _year_definition(year: int) -> str:
+    return f"PARTITION p{year} VALUES LESS THAN ('{year + 1}-01-01')"
+
+
+def _drop_foreign_keys(conn: Connection, table: str) -> List[str]:
+    """Drop the foreign keys InnoDB forbids once ``table`` is partitioned: its own and those referring to it."""
+    inspector = inspect(conn)
+    dropped = []
+    for other in inspector.get_table_names():
+        for fk in inspector.get_foreign_keys(other):
+            if fk.get("name") and (other == table or fk["referred_table"] == table):
+                conn.exec_driver_sql(f"ALTER TABLE `{other}` DROP FOREIGN KEY `{fk['name']}`")
+                dropped.append(f"{other}.{fk['name']}")
+    return dropped
+
+
+def partition_table(conn: Connection, table: str, first_year: int, last_year: int) -> List[str]:
+    """Partition ``table`` by year, ``first_year`` through ``last_year``; returns the dropped foreign keys.
+
+    Older rows go to ``p_old`` and later ones to ``p_future``. Rebuilds the
+    table, so run it in a maintenance window.
+    """
+    column = PARTITIONED_TABLES[table]
+    dropped = _drop_foreign_keys(conn, table)
+    conn.exec_driver_sql(f"ALTER TABLE `{table}` DROP PRIMARY KEY, ADD PRIMARY KEY (`id`, `{column}`)")
+    definitions = [f"PARTITION {OLDEST_PARTITION} VALUES LESS THAN ('{first_year}-01-01')"]
+    definitions += [_year_definition(year) for year in range(first_year, last_year + 1)]
+    definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    conn.exec_driver_sql(
+        f"ALTER TABLE `{table}` PARTITION BY RANGE COLUMNS(`{column}`) ({', '.join(definitions)})"
+    )
+    return dropped
+
+
+def add_year_partitions(conn: Connection, table: str, last_year: int) -> List[int]:
+    """Split yearly partitions up to ``last_year`` off ``p_future``; returns the years added."""
+    years = _year_partitions(partitions(conn, table))
+    start = years[-1] + 1 if years else last_year
+    added = list(range(start, last_year + 1))
+    if added:
+        definitions = [_year_definition(year) for year in added]
+        definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+        conn.exec_driver_sql(
+            f"ALTER TABLE `{table}` REORGANIZE PARTITION {FUTURE_PARTITION} INTO ({', '.join(definitions)})"
+        )
+    return added
+
+
+def drop_empty_year_partition(conn: Connection, table: str, year: int) -> bool:
+    """Drop ``p<year>`` once archiving has emptied it; returns whether it was dropped."""
+    name = f"p{year}"
+    if name not in partitions(conn, table):
+        return False
+    if conn.exec_driver_sql(f"SELECT 1 FROM `{table}` PARTITION ({name}) LIMIT 1").first() is not None:
+        return False
+    conn.exec_driver_sql(f"ALTER TABLE `{table}` DROP PARTITION {name}")
+    return True
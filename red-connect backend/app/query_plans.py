@@ -0,0 +1,134 @@
+"""
+EXPLAIN checks for the list endpoints.
+
+Each entry in ``LIST_QUERIES`` builds one filter/ORDER BY shape with the same
+query builder the router uses, so the plans checked are the plans the app
+runs. ``check_query_plans`` runs EXPLAIN for every shape and reports the ones
+the database would answer with a full table scan. Run it against a database
+with production-like volume (see ``init_db.py --bulk``); on near-empty tables
+MySQL may prefer a scan regardless of the available indexes.
+"""
+from datetime import date
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session
+from app.inventory import expired_groups
+from app.models import BankCategory, BloodType, CertificateStatus, DonationStatus, EventStatus
+from app.routers import audit, blood_banks, certificates, donations, donors, events, organizers
+
+_TODAY = date(2025, 1, 1)
+_LAST_YEAR = date(2024, 1, 1)
+
+# name -> function of a session returning the query (or Core statement)
+LIST_QUERIES = {
+    "events.list_events?city": lambda db: events.list_events_query(db, city="Mumbai").limit(10),
+    "events.list_events?city&state": lambda db: events.list_events_query(
+        db, city="Mumbai", state="Maharashtra"
+    ).limit(10),
+    "events.list_events?state": lambda db: events.list_events_query(db, state="Maharashtra").limit(10),
+    "events.list_events?status": lambda db: events.list_events_query(db, status=EventStatus.COMPLETED).limit(10),
+    "events.list_events?from_date&to_date": lambda db: events.list_events_query(
+        db, from_date=_LAST_YEAR, to_date=_TODAY
+    ).limit(10),
+    "events.get_upcoming_events": lambda db: events.upcoming_events_query(db).limit(10),
+    "events.get_upcoming_events?city": lambda db: events.upcoming_events_query(db, city="Mumbai").limit(10),
+    "events.get_my_events": lambda db: events.my_events_query(db, 1),
+    # donations
+    "donations.get_my_donations": lambda db: donations.my_donations_query(db, 1),
+    "donations.list_donations?status": lambda db: donations.list_donations_query(
+        db, status=DonationStatus.COMPLETED
+    ).limit(10),
+    "donations.list_donations?from_date": lambda db: donations.list_donations_query(
+        db, from_date=_LAST_YEAR
+    ).limit(10),
+    # certificates
+    "certificates.get_my_certificates": lambda db: certificates.donor_certificates_query(db, 1),
+    "certificates.list_certificates?status": lambda db: certificates.list_certificates_query(
+        db, status=CertificateStatus.ISSUED
+    ).limit(10),
+    # blood banks
+    "blood_banks.list_blood_banks?state": lambda db: blood_banks.list_blood_banks_query(db, state="Karnataka").limit(10),
+    "blood_banks.list_blood_banks?city": lambda db: blood_banks.list_blood_banks_query(db, city="Hubli").limit(10),
+    "blood_banks.list_blood_banks?category": lambda db: blood_banks.list_blood_banks_query(
+        db, category=BankCategory.GOVERNMENT
+    ).limit(10),
+    "blood_banks.get_states": lambda db: blood_banks.states_query(db),
+    "blood_banks.get_cities_by_state": lambda db: blood_banks.cities_query(db, "Karnataka"),
+    "blood_banks.get_bank_inventory": lambda db: blood_banks.bank_inventory_query(db, 1),
+    "blood_banks.get_bank_batches": lambda db: blood_banks.bank_batches_query(db, 1),
+    # inventory expiry sweep
+    "inventory.expire_batches": lambda db: expired_groups(_TODAY),
+    # donors / organizers
+    "donors.list_donors?blood_type&city": lambda db: donors.list_donors_query(
+        db, blood_type=BloodType.O_NEGATIVE, city="Mumbai"
+    ).limit(10),
+    "donors.list_donors?city": lambda db: donors.list_donors_query(db, city="Mumbai").limit(10),
+    "donors.list_donors?state": lambda db: donors.list_donors_query(db, state="Maharashtra").limit(10),
+    "organizers.list_organizers?city": lambda db: organizers.list_organizers_query(db, city="Mumbai").limit(10),
+    "organizers.list_organizers?verified": lambda db: organizers.list_organizers_query(db, verified=True).limit(10),
+    # audit log
+    "audit.list_audit_log?entity&entity_id": lambda db: audit.audit_log_query(
+        db, entity="donations", entity_id=1
+    ).limit(100),
+    "audit.list_audit_log?entity&from": lambda db: audit.audit_log_query(
+        db, entity="donations", from_time=_LAST_YEAR
+    ).limit(100),
+    "audit.list_audit_log?actor_user_id": lambda db: audit.audit_log_query(db, actor_user_id=1).limit(100),
+    "audit.list_audit_log?from&to": lambda db: audit.audit_log_query(
+        db, from_time=_LAST_YEAR, to_time=_TODAY
+    ).limit(100),
+}
+
+# Shapes that cannot use an index by design; they are listed so the check
+# documents them instead of silently skipping them.
+KNOWN_SCANS = {
+    # available_blood_types is a comma-separated string matched with LIKE '%..%'
+    "blood_banks.list_blood_banks?blood_type": lambda db: blood_banks.list_blood_banks_query(
+        db, blood_type="O-"
+    ).limit(10),
+}
+
+
+def _compile(engine: Engine, statement) -> str:
+    if isinstance(statement, Query):
+        statement = statement.statement
+    return str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+
+
+def _full_scans(engine: Engine, conn, sql: str) -> list:
+    """Return the tables the plan reads with a full scan.
+
+    Walking a whole non-covering index (typically to satisfy ORDER BY while
+    filtering on an unindexed column) counts as a full scan too; walking a
+    covering index does not (e.g. ``SELECT DISTINCT state``).
+    """
+    dialect = engine.dialect.name
+    if dialect == "mysql":
+        rows = conn.exec_driver_sql(f"EXPLAIN {sql}").mappings().all()
+        return [
+            row["table"] for row in rows
+            if row["type"] == "ALL" or (row["type"] == "index" and "Using index" not in (row["Extra"] or ""))
+        ]
+    if dialect == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+        scans = []
+        for row in rows:
+            detail = row[-1]
+            if detail.startswith("SCAN ") and "COVERING INDEX" not in detail:
+                scans.append(detail.split()[1])
+        return scans
+    raise NotImplementedError(f"EXPLAIN check is not implemented for {dialect}")
+
+
+def check_query_plans(engine: Engine) -> dict:
+    """EXPLAIN every list query shape.
+
+    Returns ``{name: [tables scanned]}`` for the shapes that fall back to a
+    full scan (empty dict when every shape uses an index).
+    """
+    failures = {}
+    with Session(engine) as db, engine.connect() as conn:
+        for name, build in LIST_QUERIES.items():
+            scanned = _full_scans(engine, conn, _compile(engine, build(db)))
+            if scanned:
+                failures[name] = scanned
+    return failures
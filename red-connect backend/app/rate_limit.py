@@ -0,0 +1,262 @@
+"""
+Token-bucket rate limiting for the credential endpoints.
+
+Login and registration each run a bcrypt hash or verify, so they are the
+cheapest way to exhaust the API's CPU. ``RateLimitMiddleware`` throttles
+them before the request body reaches FastAPI: per client IP, per email
+address in the JSON body and, optionally, per route across all clients.
+Throttled requests get ``429`` with a ``Retry-After`` header. The per-client
+buckets are checked first, so a client that is already throttled does not
+use up the route's shared budget.
+
+Bucket state lives in a ``BucketStore``. ``MemoryBucketStore`` (the default)
+keeps two floats per key with LRU eviction, so limits are per process;
+``RedisBucketStore`` shares them between workers and hosts.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+import orjson
+
+from app.config import settings
+
+# Routes that hash or verify a password
+CREDENTIAL_ROUTES = (
+    "/api/auth/login",
+    "/api/auth/donor/login",
+    "/api/auth/organizer/login",
+    "/api/auth/donor/register",
+    "/api/auth/organizer/register",
+)
+
+# Bodies larger than this are not inspected for an email (they still count per IP)
+MAX_INSPECTED_BODY = 16 * 1024
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+class Limit:
+    """``capacity`` requests in a burst, refilled at ``rate`` per second."""
+
+    __slots__ = ("capacity", "rate")
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+
+    @classmethod
+    def parse(cls, value: str) -> Optional["Limit"]:
+        """Parse ``"10/minute"`` (or ``"10/60"`` seconds); empty or ``0`` disables.
+
+        Raises ``ValueError`` for anything else that is not a positive count
+        over a positive period.
+        """
+        value = (value or "").strip().lower()
+        if not value or value in ("0", "off", "none"):
+            return None
+        count, _, period = value.partition("/")
+        period = period.strip() or "second"
+        try:
+            capacity = float(count)
+            seconds = _PERIODS.get(period.rstrip("s")) or float(period)
+        except ValueError:
+            raise ValueError(f"Invalid rate limit {value!r}: expected e.g. '10/minute' or '10/60'") from None
+        if not (0 < capacity < math.inf and 0 < seconds < math.inf):
+            raise ValueError(
+                f"Invalid rate limit {value!r}: count and period must be positive (use '0' to disable)"
+            )
+        return cls(capacity, capacity / seconds)
+
+    def __repr__(self) -> str:
+        return f"Limit(capacity={self.capacity:g}, rate={self.rate:g}/s)"
+
+
+class BucketStore:
+    """Storage for token buckets; implement ``take`` to plug in a shared backend."""
+
+    def take(self, key: str, limit: Limit, now: float) -> float:
+        """Consume one token; return 0 if allowed, else seconds until one is available."""
+        raise NotImplementedError
+
+
+class MemoryBucketStore(BucketStore):
+    """Per-process buckets: key -> [tokens, updated], least recently used evicted first."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: Limit, now: float) -> float:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [limit.capacity, now]
+                if len(self._buckets) > self.max_keys:
+                    # An evicted bucket was idle longest; it restarts full.
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(limit.capacity, bucket[0] + (now - bucket[1]) * limit.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / limit.rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RedisBucketStore(BucketStore):
+    """Buckets shared through Redis, updated atomically by a Lua script."""
+
+    _SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 't') or ARGV[1])
+local updated = tonumber(redis.call('HGET', KEYS[1], 'u') or ARGV[3])
+local capacity, rate, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 't', tokens, 'u', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis  # optional dependency, only needed for this backend
+
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self._SCRIPT)
+        self.prefix = prefix
+
+    def take(self, key: str, limit: Limit, now: float) -> float:
+        # Redis buckets use wall-clock time so all clients agree on it.
+        return float(self._script(keys=[self.prefix + key], args=[limit.capacity, limit.rate, time.time()]))
+
+
+def build_store() -> BucketStore:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisBucketStore(settings.RATE_LIMIT_REDIS_URL)
+    if settings.RATE_LIMIT_BACKEND != "memory":
+        raise ValueError(f"Unsupported RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND!r}")
+    return MemoryBucketStore(settings.RATE_LIMIT_MAX_KEYS)
+
+
+def _email_from_body(body: bytes) -> Optional[str]:
+    if not body or len(body) > MAX_INSPECTED_BODY:
+        return None
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return None
+    email = payload.get("email") if isinstance(payload, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying token-bucket limits to ``routes``.
+
+    Plain ASGI rather than ``@app.middleware("http")`` so the body can be read
+    once and replayed to the endpoint without wrapping every other request.
+    """
+
+    def __init__(self, app, store: Optional[BucketStore] = None, routes: Iterable[str] = CREDENTIAL_ROUTES,
+                 per_ip: Optional[Limit] = None, per_email: Optional[Limit] = None,
+                 per_route: Optional[Limit] = None, trust_forwarded: bool = False):
+        self.app = app
+        self.store = store or MemoryBucketStore()
+        self.routes = frozenset(route.rstrip("/") for route in routes)
+        self.per_ip = per_ip
+        self.per_email = per_email
+        self.per_route = per_route
+        self.trust_forwarded = trust_forwarded
+        self.throttled: Dict[str, int] = {"route": 0, "ip": 0, "email": 0}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"].rstrip("/") not in self.routes:
+            await self.app(scope, receive, send)
+            return
+
+        now = time.monotonic()
+        # The per-IP bucket is shared by all credential routes, so alternating
+        # between login endpoints does not multiply an attacker's budget.
+        ip_key = f"ip:{self._client_ip(scope)}"
+        if self.per_ip is not None and await self._throttled(send, "ip", ip_key, self.per_ip, now):
+            return
+
+        if self.per_email is not None:
+            body, more_body = await self._read_body(receive)
+            email = _email_from_body(body)
+            if email is not None and await self._throttled(send, "email", f"email:{email}", self.per_email, now):
+                return
+            receive = self._replay(body, more_body, receive)
+
+        # Last, so requests rejected per client do not count against everyone
+        route_key = f"route:{scope['path'].rstrip('/')}"
+        if self.per_route is not None and await self._throttled(send, "route", route_key, self.per_route, now):
+            return
+
+        await self.app(scope, receive, send)
+
+    async def _throttled(self, send, scope_name: str, key: str, limit: Limit, now: float) -> bool:
+        """Take a token from ``key``; when there is none, send the ``429`` and return True."""
+        wait = self.store.take(key, limit, now)
+        if wait:
+            await self._reject(send, scope_name, wait)
+            return True
+        return False
+
+    def _client_ip(self, scope) -> str:
+        if self.trust_forwarded:
+            for name, value in scope.get("headers", ()):
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    async def _read_body(receive) -> Tuple[bytes, bool]:
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return b"".join(chunks), False
+            chunk = message.get("body", b"")
+            chunks.append(chunk)
+            size += len(chunk)
+            if not message.get("more_body", False):
+                return b"".join(chunks), False
+            if size > MAX_INSPECTED_BODY:
+                return b"".join(chunks), True
+
+    @staticmethod
+    def _replay(body: bytes, more_body: bool, receive):
+        sent = False
+
+        async def replay():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": more_body}
+            return await receive()
+
+        return replay
+
+    async def _reject(self, send, scope_name: str, wait: float) -> None:
+        self.throttled[scope_name] += 1
+        retry_after = max(1, math.ceil(wait))
+        body = orjson.dumps({"detail": f"Too many requests. Try again in {retry_after} seconds."})
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
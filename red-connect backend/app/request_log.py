@@ -0,0 +1,147 @@
+"""
+Per-request logging: correlation ids, SQL capture and the access log.
+
+``RequestLogMiddleware`` gives every request an id (the caller's
+``X-Request-ID`` if it sent a sane one, otherwise a new one), returns it in
+the ``X-Request-ID`` response header and keeps it in a context variable, so
+every log record emitted while serving the request carries it, including
+records from endpoints running in the thread pool.
+
+While a request is served, statements executed on any engine are counted and
+timed; the first ``LOG_SLOW_SQL_MAX`` are kept with their duration. When the
+request finishes it is logged once:
+
+* requests slower than ``LOG_SLOW_REQUEST_MS`` as a WARNING on
+  ``red_connect.slow``, with the statements they ran;
+* requests to ``LOG_SAMPLED_PATHS`` (health checks and other high-volume
+  routes) only with probability ``LOG_SAMPLE_RATE``, unless they failed;
+* everything else always, as an INFO on ``red_connect.access``.
+"""
+import logging
+import random
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Iterable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+access_logger = logging.getLogger("red_connect.access")
+slow_logger = logging.getLogger("red_connect.slow")
+
+MAX_REQUEST_ID_LENGTH = 128
+MAX_LOGGED_STATEMENT = 2000
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+class RequestSql:
+    """Statements run while serving one request."""
+
+    __slots__ = ("count", "seconds", "statements", "max_statements")
+
+    def __init__(self, max_statements: int = 50):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: List[dict] = []
+        self.max_statements = max_statements
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        if len(self.statements) < self.max_statements:
+            self.statements.append({"sql": statement, "ms": seconds * 1000})
+
+
+_request_sql: ContextVar[Optional[RequestSql]] = ContextVar("request_sql", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _request_sql.get() is not None:
+        context._request_log_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    sql = _request_sql.get()
+    started = getattr(context, "_request_log_started", None)
+    if sql is not None and started is not None:
+        sql.add(statement, time.perf_counter() - started)
+
+
+def _request_id(scope) -> str:
+    for name, value in scope.get("headers", ()):
+        if name == b"x-request-id":
+            candidate = value.decode("latin-1").strip()
+            if 0 < len(candidate) <= MAX_REQUEST_ID_LENGTH and candidate.isprintable():
+                return candidate
+            break
+    return uuid.uuid4().hex
+
+
+class RequestLogMiddleware:
+    """ASGI middleware setting the request id and writing the access and slow-request logs."""
+
+    def __init__(self, app, slow_ms: float = 500, sampled_paths: Iterable[str] = (),
+                 sample_rate: float = 0.01, max_statements: int = 50):
+        self.app = app
+        self.slow_ms = slow_ms
+        self.sampled_paths = tuple(path for path in sampled_paths if path)
+        self.sample_rate = sample_rate
+        self.max_statements = max_statements
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _request_id(scope)
+        header = (b"x-request-id", request_id.encode("latin-1"))
+        sql = RequestSql(self.max_statements)
+        id_token = request_id_var.set(request_id)
+        sql_token = _request_sql.set(sql)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": [*message.get("headers", ()), header]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            self._log(scope, status_code, (time.perf_counter() - started) * 1000, sql)
+            _request_sql.reset(sql_token)
+            request_id_var.reset(id_token)
+
+    def _log(self, scope, status_code: int, elapsed_ms: float, sql: RequestSql) -> None:
+        path = scope["path"]
+        slow = elapsed_ms >= self.slow_ms
+        sampled = status_code < 500 and path.startswith(self.sampled_paths)
+        if sampled and not slow and random.random() >= self.sample_rate:
+            return
+        client = scope.get("client")
+        http = {
+            "method": scope["method"],
+            "path": path,
+            "status": status_code,
+            "duration_ms": round(elapsed_ms, 2),
+            "sql_count": sql.count,
+            "sql_ms": round(sql.seconds * 1000, 2),
+            "client": client[0] if client else None,
+        }
+        if slow:
+            statements = [
+                {"sql": entry["sql"][:MAX_LOGGED_STATEMENT], "ms": round(entry["ms"], 2)} for entry in sql.statements
+            ]
+            slow_logger.warning("slow request", extra={"http": http, "sql": statements})
+        else:
+            if sampled:
+                # Each logged request stands for 1 / sample_rate of them
+                http["sample_rate"] = self.sample_rate
+            access_logger.info("request", extra={"http": http})
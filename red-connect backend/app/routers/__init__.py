@@ -1,4 +1,4 @@
 # Routers package initialization
-from . import auth, donors, organizers, blood_banks, donations, events, certificates
+from . import auth, donors, organizers, blood_banks, donations, events, certificates, matching, audit
 
-__all__ = ['auth', 'donors', 'organizers', 'blood_banks', 'donations', 'events', 'certificates']
+__all__ = ['auth', 'donors', 'organizers', 'blood_banks', 'donations', 'events', 'certificates', 'matching', 'audit']
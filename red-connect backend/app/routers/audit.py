@@ -0,0 +1,73 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_read_db
+from app.models import User, AuditLog
+from app.schemas import AuditLogResponse, AuditWriterStats
+from app.auth import get_current_user
+from app.audit import audit_writer, changes_of
+from app.config import settings
+
+router = APIRouter()
+
+def _require_admin(current_user: User) -> None:
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can read the audit log"
+        )
+
+def audit_log_query(
+    db: Session,
+    entity: Optional[str] = None,
+    entity_id: Optional[int] = None,
+    actor_user_id: Optional[int] = None,
+    from_time: Optional[datetime] = None,
+    to_time: Optional[datetime] = None
+):
+    """List query shared with the EXPLAIN checks in app/query_plans.py."""
+    query = db.query(AuditLog)
+    if entity:
+        query = query.filter(AuditLog.entity == entity)
+    if entity_id is not None:
+        query = query.filter(AuditLog.entity_id == entity_id)
+    if actor_user_id is not None:
+        query = query.filter(AuditLog.actor_user_id == actor_user_id)
+    if from_time:
+        query = query.filter(AuditLog.created_at >= from_time)
+    if to_time:
+        query = query.filter(AuditLog.created_at <= to_time)
+    return query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+
+@router.get("/", response_model=List[AuditLogResponse])
+def list_audit_log(
+    entity: Optional[str] = Query(None, description="Table name, e.g. donations"),
+    entity_id: Optional[int] = None,
+    actor_user_id: Optional[int] = None,
+    from_time: Optional[datetime] = Query(None, alias="from"),
+    to_time: Optional[datetime] = Query(None, alias="to"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Audit log entries, newest first, filtered by entity, record, actor and time (Admin only)."""
+    _require_admin(current_user)
+    if entity_id is not None and entity is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="entity_id requires entity"
+        )
+    
+    query = audit_log_query(
+        db, entity=entity, entity_id=entity_id, actor_user_id=actor_user_id, from_time=from_time, to_time=to_time
+    )
+    entries = query.offset(skip).limit(limit).all()
+    return [{**entry.__dict__, "changes": changes_of(entry)} for entry in entries]
+
+@router.get("/stats", response_model=AuditWriterStats)
+def get_audit_stats(current_user: User = Depends(get_current_user)):
+    """Audit writer counters for this worker, including entries dropped on overflow (Admin only)."""
+    _require_admin(current_user)
+    return {"enabled": settings.AUDIT_ENABLED, "buffered": audit_writer.buffered, **audit_writer.stats}
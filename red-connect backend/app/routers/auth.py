@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from datetime import timedelta
 from app.database import get_db
 from app.models import User, Donor, Organizer, UserRole
@@ -9,9 +9,11 @@ from app.auth import (
     verify_password,
     get_password_hash,
     create_access_token,
+    token_claims,
     get_current_user
 )
 from app.config import settings
+from app.matching import eligibility_index
 
 router = APIRouter()
 
@@ -47,6 +49,8 @@ def register_donor(donor_data: DonorCreate, db: Session = Depends(get_db)):
         city=donor_data.city,
         state=donor_data.state,
         pincode=donor_data.pincode,
+        latitude=donor_data.latitude,
+        longitude=donor_data.longitude,
         weight=donor_data.weight,
         medical_conditions=donor_data.medical_conditions,
         emergency_contact=donor_data.emergency_contact
@@ -54,11 +58,12 @@ def register_donor(donor_data: DonorCreate, db: Session = Depends(get_db)):
     db.add(donor)
     db.commit()
     db.refresh(donor)
+    eligibility_index.upsert_donor(donor)
     
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email, "user_id": user.id, "role": user.role},
+        data=token_claims(user),
         expires_delta=access_token_expires
     )
     
@@ -111,7 +116,7 @@ def register_organizer(organizer_data: OrganizerCreate, db: Session = Depends(ge
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email, "user_id": user.id, "role": user.role},
+        data=token_claims(user),
         expires_delta=access_token_expires
     )
     
@@ -125,7 +130,7 @@ def register_organizer(organizer_data: OrganizerCreate, db: Session = Depends(ge
 @router.post("/donor/login", response_model=Token)
 def login_donor(user_credentials: UserLogin, db: Session = Depends(get_db)):
     """Login for donors only."""
-    user = db.query(User).filter(
+    user = db.query(User).options(joinedload(User.donor_profile)).filter(
         User.email == user_credentials.email,
         User.role == UserRole.DONOR
     ).first()
@@ -146,7 +151,7 @@ def login_donor(user_credentials: UserLogin, db: Session = Depends(get_db)):
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email, "user_id": user.id, "role": user.role},
+        data=token_claims(user),
         expires_delta=access_token_expires
     )
     
@@ -160,7 +165,7 @@ def login_donor(user_credentials: UserLogin, db: Session = Depends(get_db)):
 @router.post("/organizer/login", response_model=Token)
 def login_organizer(user_credentials: UserLogin, db: Session = Depends(get_db)):
     """Login for organizers only."""
-    user = db.query(User).filter(
+    user = db.query(User).options(joinedload(User.organizer_profile)).filter(
         User.email == user_credentials.email,
         User.role == UserRole.ORGANIZER
     ).first()
@@ -181,7 +186,7 @@ def login_organizer(user_credentials: UserLogin, db: Session = Depends(get_db)):
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email, "user_id": user.id, "role": user.role},
+        data=token_claims(user),
         expires_delta=access_token_expires
     )
     
@@ -195,7 +200,9 @@ def login_organizer(user_credentials: UserLogin, db: Session = Depends(get_db)):
 @router.post("/login", response_model=Token)
 def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     """Generic login endpoint - returns error if same email exists for multiple roles."""
-    users = db.query(User).filter(User.email == user_credentials.email).all()
+    users = db.query(User).options(
+        joinedload(User.donor_profile), joinedload(User.organizer_profile)
+    ).filter(User.email == user_credentials.email).all()
     
     if not users:
         raise HTTPException(
@@ -229,7 +236,7 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email, "user_id": user.id, "role": user.role},
+        data=token_claims(user),
         expires_delta=access_token_expires
     )
     
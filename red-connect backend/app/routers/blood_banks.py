@@ -1,19 +1,89 @@
+import math
+import time
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.database import get_db
-from app.models import BloodBank, BloodInventory
+from app.database import get_db, get_read_db
+from app.models import BatchStatus, BloodBank, BloodBatch, BloodComponent, BloodForecast, BloodInventory, BloodType
 from app.schemas import (
+    BatchResponse,
     BloodBankCreate,
     BloodBankUpdate,
     BloodBankResponse,
     BloodInventoryCreate,
     BloodInventoryUpdate,
-    BloodInventoryResponse
+    BloodInventoryResponse,
+    BloodBatchCreate,
+    BloodBatchResponse,
+    BloodDispatchRequest,
+    BloodDispatchResponse,
+    BloodForecastResponse,
+    TransferPlanRequest,
+    TransferPlanResponse
 )
+from app.serialization import batch_response, parse_ids, response_columns, row_response, rows_response, select_fields, with_id
+from app.inventory import InsufficientStock, dispatch, receive_batch, set_stock
+from app.forecasting import forecast
+from app.transfers import plan_transfers
 
 router = APIRouter()
 
+BANK_COLUMNS = response_columns(BloodBank, BloodBankResponse)
+INVENTORY_COLUMNS = response_columns(BloodInventory, BloodInventoryResponse)
+BATCH_COLUMNS = response_columns(BloodBatch, BloodBatchResponse)
+
+# List query builders, shared with the EXPLAIN checks in app/query_plans.py
+
+def list_blood_banks_query(
+    db: Session,
+    columns: List = BANK_COLUMNS,
+    state: Optional[str] = None,
+    city: Optional[str] = None,
+    category: Optional[str] = None,
+    blood_type: Optional[str] = None
+):
+    query = db.query(*columns)
+    
+    if state:
+        query = query.filter(BloodBank.state == state)
+    if city:
+        query = query.filter(BloodBank.city == city)
+    if category:
+        query = query.filter(BloodBank.category == category)
+    if blood_type:
+        query = query.filter(BloodBank.available_blood_types.contains(blood_type))
+    
+    return query
+
+def bank_inventory_query(db: Session, bank_id: int, columns: List = INVENTORY_COLUMNS):
+    return db.query(*columns).filter(BloodInventory.blood_bank_id == bank_id)
+
+def bank_batches_query(
+    db: Session,
+    bank_id: int,
+    columns: List = BATCH_COLUMNS,
+    blood_type: Optional[BloodType] = None,
+    component: Optional[BloodComponent] = None
+):
+    query = db.query(*columns).filter(
+        BloodBatch.blood_bank_id == bank_id,
+        BloodBatch.status == BatchStatus.AVAILABLE
+    )
+    
+    if blood_type:
+        query = query.filter(BloodBatch.blood_type == blood_type)
+    if component:
+        query = query.filter(BloodBatch.component == component)
+    
+    return query.order_by(BloodBatch.blood_type, BloodBatch.component, BloodBatch.collected_on, BloodBatch.id)
+
+def states_query(db: Session):
+    return db.query(BloodBank.state).distinct()
+
+def cities_query(db: Session, state: str):
+    return db.query(BloodBank.city).filter(BloodBank.state == state).distinct()
+
 # Blood Bank CRUD Operations
 @router.post("/", response_model=BloodBankResponse, status_code=status.HTTP_201_CREATED)
 def create_blood_bank(
@@ -35,33 +105,126 @@ def list_blood_banks(
     city: Optional[str] = None,
     category: Optional[str] = None,
     blood_type: Optional[str] = None,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
-    """List all blood banks with optional filters."""
-    query = db.query(BloodBank)
-    
-    if state:
-        query = query.filter(BloodBank.state == state)
-    if city:
-        query = query.filter(BloodBank.city == city)
-    if category:
-        query = query.filter(BloodBank.category == category)
-    if blood_type:
-        query = query.filter(BloodBank.available_blood_types.contains(blood_type))
-    
+    """List all blood banks with optional filters; ``fields`` picks the returned fields (e.g. ``id,name,city,phone``)."""
+    query = list_blood_banks_query(
+        db, select_fields(BANK_COLUMNS, fields), state=state, city=city, category=category, blood_type=blood_type
+    )
     banks = query.offset(skip).limit(limit).all()
-    return banks
+    return rows_response(banks)
+
+@router.get("/batch", response_model=BatchResponse[BloodBankResponse])
+def get_blood_banks_batch(
+    ids: str = Query(..., description="Comma-separated ids, e.g. 1,2,3"),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Get several blood banks by ID in one query, in request order, with the IDs not found."""
+    bank_ids = parse_ids(ids)
+    banks = db.query(*with_id(select_fields(BANK_COLUMNS, fields), BloodBank.id)).filter(
+        BloodBank.id.in_(bank_ids)
+    ).all()
+    return batch_response(banks, bank_ids)
 
 @router.get("/{bank_id}", response_model=BloodBankResponse)
-def get_blood_bank(bank_id: int, db: Session = Depends(get_db)):
+def get_blood_bank(bank_id: int, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
     """Get a specific blood bank by ID."""
-    bank = db.query(BloodBank).filter(BloodBank.id == bank_id).first()
+    bank = db.query(*select_fields(BANK_COLUMNS, fields)).filter(BloodBank.id == bank_id).first()
     if not bank:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Blood bank not found"
         )
-    return bank
+    return row_response(bank)
+
+@router.get("/{bank_id}/forecast", response_model=List[BloodForecastResponse])
+def get_bank_forecast(bank_id: int, db: Session = Depends(get_read_db)):
+    """Get the demand forecast per blood type for a bank, with the types expected to run short."""
+    bank = db.query(BloodBank.id).filter(BloodBank.id == bank_id).first()
+    if not bank:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Blood bank not found"
+        )
+    
+    rows = [
+        {column.name: getattr(row, column.name) for column in BloodForecast.__table__.columns}
+        for row in db.query(BloodForecast).filter(BloodForecast.blood_bank_id == bank_id).all()
+    ]
+    if not rows:
+        # Not computed yet (new bank, or before the first scheduled refresh)
+        rows = forecast(db.connection(), bank_ids=[bank_id])
+    
+    return [
+        {**row, "daily_demand": orjson.loads(row["daily_demand"]), "runs_short": row["shortfall"] > 0}
+        for row in sorted(rows, key=lambda row: row["shortfall"], reverse=True)
+    ]
+
+@router.post("/transfers/plan", response_model=TransferPlanResponse)
+def plan_blood_transfers(request: TransferPlanRequest, db: Session = Depends(get_read_db)):
+    """Plan transfers that cover shortages from other banks' surpluses at the least total distance.
+    
+    Target levels come from the request, else from the stored demand forecast
+    (its high estimate), else from ``default_target``; pairs with none are left alone.
+    """
+    if not request.state and not request.bank_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give a state or bank_ids"
+        )
+    
+    query = db.query(BloodBank.id, BloodBank.latitude, BloodBank.longitude)
+    if request.state:
+        query = query.filter(BloodBank.state == request.state)
+    if request.bank_ids:
+        query = query.filter(BloodBank.id.in_(request.bank_ids))
+    banks = query.all()
+    if not banks:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No blood banks found"
+        )
+    bank_ids = [bank.id for bank in banks]
+    coordinates = {
+        bank.id: (bank.latitude, bank.longitude)
+        for bank in banks
+        if bank.latitude is not None and bank.longitude is not None
+    }
+    
+    stock = {
+        (row.blood_bank_id, row.blood_type): row.units_available or 0
+        for row in db.query(
+            BloodInventory.blood_bank_id, BloodInventory.blood_type, BloodInventory.units_available
+        ).filter(BloodInventory.blood_bank_id.in_(bank_ids))
+    }
+    targets = {}
+    if request.default_target is not None:
+        targets = {(bank_id, blood_type): request.default_target for bank_id in bank_ids for blood_type in BloodType}
+    for row in db.query(
+        BloodForecast.blood_bank_id, BloodForecast.blood_type, BloodForecast.demand_high
+    ).filter(BloodForecast.blood_bank_id.in_(bank_ids)):
+        targets[(row.blood_bank_id, row.blood_type)] = math.ceil(row.demand_high)
+    in_scope = set(bank_ids)
+    for target in request.targets:
+        if target.blood_bank_id in in_scope:
+            targets[(target.blood_bank_id, target.blood_type)] = target.units
+    
+    started = time.perf_counter()
+    plan = plan_transfers(
+        stock, targets, coordinates,
+        radius_km=request.radius_km,
+        neighbours=request.neighbours,
+        allow_substitutions=request.allow_substitutions,
+    )
+    return {
+        **plan,
+        "banks": len(bank_ids),
+        "total_units": sum(transfer["units"] for transfer in plan["transfers"]),
+        "total_unit_km": round(sum(transfer["units"] * transfer["distance_km"] for transfer in plan["transfers"]), 1),
+        "solve_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
 
 @router.put("/{bank_id}", response_model=BloodBankResponse)
 def update_blood_bank(
@@ -105,7 +268,7 @@ def create_inventory(
     inventory: BloodInventoryCreate,
     db: Session = Depends(get_db)
 ):
-    """Create or update blood inventory for a blood bank."""
+    """Set the stock count of a blood type at a bank (stock-take); the difference is received or written off as batches."""
     # Check if bank exists
     bank = db.query(BloodBank).filter(BloodBank.id == inventory.blood_bank_id).first()
     if not bank:
@@ -114,39 +277,94 @@ def create_inventory(
             detail="Blood bank not found"
         )
     
-    # Check if inventory already exists
-    existing_inventory = db.query(BloodInventory).filter(
-        BloodInventory.blood_bank_id == inventory.blood_bank_id,
-        BloodInventory.blood_type == inventory.blood_type
-    ).first()
-    
-    if existing_inventory:
-        existing_inventory.units_available = inventory.units_available
-        db.commit()
-        db.refresh(existing_inventory)
-        return existing_inventory
+    stock = set_stock(db, inventory.blood_bank_id, inventory.blood_type, inventory.units_available)
+    db.commit()
+    db.refresh(stock)
+    return stock
+
+@router.post("/inventory/batches", response_model=BloodBatchResponse, status_code=status.HTTP_201_CREATED)
+def receive_blood_batch(
+    batch: BloodBatchCreate,
+    db: Session = Depends(get_db)
+):
+    """Receive a batch of units; its expiry date follows from the component's shelf life."""
+    bank = db.query(BloodBank).filter(BloodBank.id == batch.blood_bank_id).first()
+    if not bank:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Blood bank not found"
+        )
     
-    new_inventory = BloodInventory(**inventory.model_dump())
-    db.add(new_inventory)
+    new_batch = receive_batch(
+        db, batch.blood_bank_id, batch.blood_type, batch.units,
+        component=batch.component, collected_on=batch.collected_on
+    )
     db.commit()
-    db.refresh(new_inventory)
-    return new_inventory
+    db.refresh(new_batch)
+    return new_batch
+
+@router.post("/inventory/dispatch", response_model=BloodDispatchResponse, status_code=status.HTTP_201_CREATED)
+def dispatch_blood(
+    request: BloodDispatchRequest,
+    db: Session = Depends(get_db)
+):
+    """Issue units from a bank, oldest usable batches first."""
+    try:
+        record, taken = dispatch(
+            db, request.blood_bank_id, request.blood_type, request.units,
+            component=request.component, destination=request.destination
+        )
+    except InsufficientStock as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    batches = [
+        {"batch_id": batch.id, "units": units, "collected_on": batch.collected_on, "expires_on": batch.expires_on}
+        for batch, units in taken
+    ]
+    db.commit()
+    
+    return {
+        "id": record.id,
+        "blood_bank_id": record.blood_bank_id,
+        "blood_type": record.blood_type,
+        "component": record.component,
+        "units": record.units,
+        "destination": record.destination,
+        "dispatched_at": record.dispatched_at,
+        "batches": batches
+    }
 
 @router.get("/inventory/{bank_id}", response_model=List[BloodInventoryResponse])
-def get_bank_inventory(bank_id: int, db: Session = Depends(get_db)):
-    """Get all blood inventory for a specific bank."""
-    bank = db.query(BloodBank).filter(BloodBank.id == bank_id).first()
+def get_bank_inventory(bank_id: int, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
+    """Get usable units per blood type for a specific bank (expired units excluded)."""
+    bank = db.query(BloodBank.id).filter(BloodBank.id == bank_id).first()
     if not bank:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Blood bank not found"
         )
     
-    inventory = db.query(BloodInventory).filter(
-        BloodInventory.blood_bank_id == bank_id
-    ).all()
+    inventory = bank_inventory_query(db, bank_id, select_fields(INVENTORY_COLUMNS, fields)).all()
     
-    return inventory
+    return rows_response(inventory)
+
+@router.get("/inventory/{bank_id}/batches", response_model=List[BloodBatchResponse])
+def get_bank_batches(
+    bank_id: int,
+    blood_type: Optional[BloodType] = None,
+    component: Optional[BloodComponent] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """List a bank's available batches in issuing order (oldest first)."""
+    query = bank_batches_query(
+        db, bank_id, select_fields(BATCH_COLUMNS, fields), blood_type=blood_type, component=component
+    )
+    batches = query.all()
+    return rows_response(batches)
 
 @router.put("/inventory/{inventory_id}", response_model=BloodInventoryResponse)
 def update_inventory(
@@ -154,7 +372,7 @@ def update_inventory(
     inventory_update: BloodInventoryUpdate,
     db: Session = Depends(get_db)
 ):
-    """Update blood inventory units."""
+    """Set the stock count of an inventory row (stock-take); the difference is received or written off as batches."""
     inventory = db.query(BloodInventory).filter(BloodInventory.id == inventory_id).first()
     if not inventory:
         raise HTTPException(
@@ -162,22 +380,20 @@ def update_inventory(
             detail="Inventory not found"
         )
     
-    inventory.units_available = inventory_update.units_available
+    inventory = set_stock(db, inventory.blood_bank_id, inventory.blood_type, inventory_update.units_available)
     db.commit()
     db.refresh(inventory)
     return inventory
 
 @router.get("/states/list")
-def get_states(db: Session = Depends(get_db)):
+def get_states(db: Session = Depends(get_read_db)):
     """Get list of all unique states where blood banks are located."""
-    states = db.query(BloodBank.state).distinct().all()
+    states = states_query(db).all()
     return {"states": [state[0] for state in states if state[0]]}
 
 @router.get("/cities/{state}")
-def get_cities_by_state(state: str, db: Session = Depends(get_db)):
+def get_cities_by_state(state: str, db: Session = Depends(get_read_db)):
     """Get list of cities in a specific state."""
-    cities = db.query(BloodBank.city).filter(
-        BloodBank.state == state
-    ).distinct().all()
+    cities = cities_query(db, state).all()
     return {"cities": [city[0] for city in cities if city[0]]}
 
@@ -1,15 +1,35 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime, date
 from app.database import get_db
 from app.models import User, Certificate, Donation, Donor, CertificateStatus
-from app.schemas import CertificateCreate, CertificateUpdate, CertificateResponse
-from app.auth import get_current_donor, get_current_user
+from app.schemas import BatchResponse, CertificateCreate, CertificateUpdate, CertificateResponse
+from app.auth import get_current_donor_profile, get_current_user
+from app.serialization import batch_response, parse_ids, response_columns, row_response, rows_response, select_fields, with_id
+from app.dashboard import dashboard_cache
+from app.organizer_report import organizer_of_donation, organizer_of_event, report_cache
 import uuid
 
 router = APIRouter()
 
+CERTIFICATE_COLUMNS = response_columns(Certificate, CertificateResponse)
+
+# List query builders, shared with the EXPLAIN checks in app/query_plans.py
+
+def donor_certificates_query(db: Session, donor_id: int, columns: List = CERTIFICATE_COLUMNS):
+    return db.query(*columns).filter(
+        Certificate.donor_id == donor_id
+    ).order_by(Certificate.issue_date.desc())
+
+def list_certificates_query(db: Session, columns: List = CERTIFICATE_COLUMNS, status: Optional[str] = None):
+    query = db.query(*columns)
+    
+    if status:
+        query = query.filter(Certificate.status == status)
+    
+    return query.order_by(Certificate.created_at.desc())
+
 def generate_certificate_number() -> str:
     """Generate a unique certificate number"""
     return f"CERT-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
@@ -63,36 +83,65 @@ def create_certificate(
     db.add(new_certificate)
     db.commit()
     db.refresh(new_certificate)
+    dashboard_cache.invalidate(new_certificate.donor_id)
+    report_cache.invalidate(organizer_of_event(db, donation.event_id))
     
     return new_certificate
 
 @router.get("/my-certificates", response_model=List[CertificateResponse])
 def get_my_certificates(
-    current_user: User = Depends(get_current_donor),
+    fields: Optional[str] = None,
+    donor: Donor = Depends(get_current_donor_profile),
     db: Session = Depends(get_db)
 ):
     """Get all certificates for the current donor"""
-    donor = db.query(Donor).filter(Donor.user_id == current_user.id).first()
-    if not donor:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Donor profile not found"
-        )
+    certificates = donor_certificates_query(db, donor.id, select_fields(CERTIFICATE_COLUMNS, fields)).all()
+    
+    return rows_response(certificates)
+
+@router.get("/batch", response_model=BatchResponse[CertificateResponse])
+def get_certificates_batch(
+    ids: str = Query(..., description="Comma-separated ids, e.g. 1,2,3"),
+    fields: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get several certificates by ID in one query, in request order.
     
-    certificates = db.query(Certificate).filter(
-        Certificate.donor_id == donor.id
-    ).order_by(Certificate.issue_date.desc()).all()
+    Donors only see their own; other donors' certificates are listed as forbidden.
+    """
+    certificate_ids = parse_ids(ids)
+    rows = db.query(
+        Certificate.donor_id.label("owner_id"), *with_id(select_fields(CERTIFICATE_COLUMNS, fields), Certificate.id)
+    ).filter(Certificate.id.in_(certificate_ids)).all()
     
-    return certificates
+    # Access is decided once for the caller, then applied to every row
+    allowed_owners = None
+    if current_user.role == "donor":
+        donor = current_user.donor_profile
+        allowed_owners = {donor.id} if donor is not None else set()
+    certificates, forbidden = [], []
+    for row in rows:
+        certificate = row._asdict()
+        owner_id = certificate.pop("owner_id")
+        if allowed_owners is not None and owner_id not in allowed_owners:
+            forbidden.append(certificate["id"])
+        else:
+            certificates.append(certificate)
+    
+    return batch_response(certificates, certificate_ids, forbidden)
 
 @router.get("/{certificate_id}", response_model=CertificateResponse)
 def get_certificate(
     certificate_id: int,
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific certificate by ID"""
-    certificate = db.query(Certificate).filter(Certificate.id == certificate_id).first()
+    certificate = db.query(
+        Certificate.donor_id.label("owner_id"), *select_fields(CERTIFICATE_COLUMNS, fields)
+    ).filter(Certificate.id == certificate_id).first()
     if not certificate:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -101,14 +150,16 @@ def get_certificate(
     
     # Check if user has access to this certificate
     if current_user.role == "donor":
-        donor = db.query(Donor).filter(Donor.user_id == current_user.id).first()
-        if certificate.donor_id != donor.id:
+        donor = current_user.donor_profile
+        if donor is None or certificate.owner_id != donor.id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to view this certificate"
             )
     
-    return certificate
+    certificate = certificate._asdict()
+    del certificate["owner_id"]
+    return row_response(certificate)
 
 @router.put("/{certificate_id}", response_model=CertificateResponse)
 def update_certificate(
@@ -138,6 +189,8 @@ def update_certificate(
     
     db.commit()
     db.refresh(certificate)
+    dashboard_cache.invalidate(certificate.donor_id)
+    report_cache.invalidate(organizer_of_donation(db, certificate.donation_id))
     return certificate
 
 @router.delete("/{certificate_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -161,14 +214,18 @@ def delete_certificate(
             detail="Certificate not found"
         )
     
+    organizer_id = organizer_of_donation(db, certificate.donation_id)
     db.delete(certificate)
     db.commit()
+    dashboard_cache.invalidate(certificate.donor_id)
+    report_cache.invalidate(organizer_id)
     
     return None
 
 @router.get("/donor/{donor_id}", response_model=List[CertificateResponse])
 def get_donor_certificates(
     donor_id: int,
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -180,17 +237,16 @@ def get_donor_certificates(
             detail="Not authorized to view donor certificates"
         )
     
-    certificates = db.query(Certificate).filter(
-        Certificate.donor_id == donor_id
-    ).order_by(Certificate.issue_date.desc()).all()
+    certificates = donor_certificates_query(db, donor_id, select_fields(CERTIFICATE_COLUMNS, fields)).all()
     
-    return certificates
+    return rows_response(certificates)
 
 @router.get("/", response_model=List[CertificateResponse])
 def list_certificates(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     status: str = Query(None),
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -202,11 +258,7 @@ def list_certificates(
             detail="Not authorized to list certificates"
         )
     
-    query = db.query(Certificate)
-    
-    if status:
-        query = query.filter(Certificate.status == status)
-    
-    certificates = query.order_by(Certificate.created_at.desc()).offset(skip).limit(limit).all()
+    query = list_certificates_query(db, select_fields(CERTIFICATE_COLUMNS, fields), status=status)
+    certificates = query.offset(skip).limit(limit).all()
     
-    return certificates
+    return rows_response(certificates)
@@ -1,72 +1,112 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
-from app.database import get_db
+from app.database import get_db, get_read_db, SessionLocal
 from app.models import User, Donation, Donor
 from app.schemas import DonationCreate, DonationUpdate, DonationResponse
-from app.auth import get_current_donor, get_current_user
+from app.auth import get_current_donor_profile, get_current_user
+from app.serialization import response_columns, row_response, rows_response, select_fields
+from app.matching import eligibility_index
+from app.donor_stats import counts_toward_total, record_donation_added, record_donations_changed
+from app.archive import export_ndjson, monthly_totals
+from app.dashboard import dashboard_cache
+from app.organizer_report import organizer_of_event, report_cache
 
 router = APIRouter()
 
+DONATION_COLUMNS = response_columns(Donation, DonationResponse)
+
+# List query builders, shared with the EXPLAIN checks in app/query_plans.py
+
+def my_donations_query(db: Session, donor_id: int, columns: List = DONATION_COLUMNS):
+    return db.query(*columns).filter(
+        Donation.donor_id == donor_id
+    ).order_by(Donation.donation_date.desc())
+
+def list_donations_query(
+    db: Session,
+    columns: List = DONATION_COLUMNS,
+    status: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None
+):
+    query = db.query(*columns)
+    
+    if status:
+        query = query.filter(Donation.status == status)
+    if from_date:
+        query = query.filter(Donation.donation_date >= from_date)
+    if to_date:
+        query = query.filter(Donation.donation_date <= to_date)
+    
+    return query.order_by(Donation.donation_date.desc())
+
 @router.post("/", response_model=DonationResponse, status_code=status.HTTP_201_CREATED)
 def create_donation(
     donation: DonationCreate,
-    current_user: User = Depends(get_current_donor),
+    donor: Donor = Depends(get_current_donor_profile),
     db: Session = Depends(get_db)
 ):
     """Create a new donation record."""
-    # Get donor profile
-    donor = db.query(Donor).filter(Donor.user_id == current_user.id).first()
-    if not donor:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Donor profile not found"
-        )
-    
     new_donation = Donation(
         donor_id=donor.id,
         **donation.model_dump()
     )
     
     db.add(new_donation)
-    db.commit()
-    db.refresh(new_donation)
     
-    # Update donor statistics
-    donor.total_donations += 1
-    donor.last_donation_date = donation.donation_date
+    # Update donor statistics in the same transaction
+    record_donation_added(db, donor.id, donation.donation_date)
     db.commit()
+    db.refresh(new_donation)
+    eligibility_index.record_donation(donor.id, donor.blood_type, donation.donation_date)
+    dashboard_cache.invalidate(donor.id)
+    report_cache.invalidate(organizer_of_event(db, new_donation.event_id))
     
     return new_donation
 
 @router.get("/my-donations", response_model=List[DonationResponse])
 def get_my_donations(
-    current_user: User = Depends(get_current_donor),
+    fields: Optional[str] = None,
+    donor: Donor = Depends(get_current_donor_profile),
     db: Session = Depends(get_db)
 ):
     """Get all donations for the current donor."""
-    donor = db.query(Donor).filter(Donor.user_id == current_user.id).first()
-    if not donor:
+    donations = my_donations_query(db, donor.id, select_fields(DONATION_COLUMNS, fields)).all()
+    
+    return rows_response(donations)
+
+@router.get("/export")
+def export_donations(
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Export donations in a date range as NDJSON, including archived years (organizer/admin access)."""
+    if current_user.role not in ["organizer", "admin"]:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Donor profile not found"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only organizers and admins can export donations"
         )
     
-    donations = db.query(Donation).filter(
-        Donation.donor_id == donor.id
-    ).order_by(Donation.donation_date.desc()).all()
-    
-    return donations
+    return StreamingResponse(
+        export_ndjson(SessionLocal, "donations", DONATION_COLUMNS, from_date, to_date),
+        media_type="application/x-ndjson"
+    )
 
 @router.get("/{donation_id}", response_model=DonationResponse)
 def get_donation(
     donation_id: int,
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific donation by ID."""
-    donation = db.query(Donation).filter(Donation.id == donation_id).first()
+    donation = db.query(
+        Donation.donor_id.label("owner_id"), *select_fields(DONATION_COLUMNS, fields)
+    ).filter(Donation.id == donation_id).first()
     if not donation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -75,24 +115,27 @@ def get_donation(
     
     # Check if user has access to this donation
     if current_user.role == "donor":
-        donor = db.query(Donor).filter(Donor.user_id == current_user.id).first()
-        if donation.donor_id != donor.id:
+        donor = current_user.donor_profile
+        if donor is None or donation.owner_id != donor.id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to view this donation"
             )
     
-    return donation
+    donation = donation._asdict()
+    del donation["owner_id"]
+    return row_response(donation)
 
 @router.put("/{donation_id}", response_model=DonationResponse)
 def update_donation(
     donation_id: int,
     donation_update: DonationUpdate,
-    current_user: User = Depends(get_current_donor),
+    donor: Donor = Depends(get_current_donor_profile),
     db: Session = Depends(get_db)
 ):
     """Update a donation record."""
-    donation = db.query(Donation).filter(Donation.id == donation_id).first()
+    # Lock the row so concurrent status changes adjust the donor's total once each
+    donation = db.query(Donation).filter(Donation.id == donation_id).with_for_update().first()
     if not donation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -100,29 +143,42 @@ def update_donation(
         )
     
     # Check if user owns this donation
-    donor = db.query(Donor).filter(Donor.user_id == current_user.id).first()
     if donation.donor_id != donor.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to update this donation"
         )
     
+    counted_before = counts_toward_total(donation.status)
+    date_before = donation.donation_date
+    event_before = donation.event_id
+    
     update_data = donation_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(donation, key, value)
     
+    delta = int(counts_toward_total(donation.status)) - int(counted_before)
+    stats_changed = delta != 0 or donation.donation_date != date_before
+    if stats_changed:
+        db.flush()
+        record_donations_changed(db, donor.id, delta)
     db.commit()
     db.refresh(donation)
+    if stats_changed:
+        eligibility_index.upsert_donor(donor)
+    dashboard_cache.invalidate(donor.id)
+    for event_id in {event_before, donation.event_id}:
+        report_cache.invalidate(organizer_of_event(db, event_id))
     return donation
 
 @router.delete("/{donation_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_donation(
     donation_id: int,
-    current_user: User = Depends(get_current_donor),
+    donor: Donor = Depends(get_current_donor_profile),
     db: Session = Depends(get_db)
 ):
     """Delete a donation record."""
-    donation = db.query(Donation).filter(Donation.id == donation_id).first()
+    donation = db.query(Donation).filter(Donation.id == donation_id).with_for_update().first()
     if not donation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -130,18 +186,22 @@ def delete_donation(
         )
     
     # Check if user owns this donation
-    donor = db.query(Donor).filter(Donor.user_id == current_user.id).first()
     if donation.donor_id != donor.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to delete this donation"
         )
     
+    organizer_id = organizer_of_event(db, donation.event_id)
     db.delete(donation)
+    db.flush()
     
-    # Update donor statistics
-    donor.total_donations = max(0, donor.total_donations - 1)
+    # Update donor statistics in the same transaction
+    record_donations_changed(db, donor.id, -1 if counts_toward_total(donation.status) else 0)
     db.commit()
+    eligibility_index.upsert_donor(donor)
+    dashboard_cache.invalidate(donor.id)
+    report_cache.invalidate(organizer_id)
     
     return None
 
@@ -152,26 +212,19 @@ def list_donations(
     status: Optional[str] = None,
     from_date: Optional[date] = None,
     to_date: Optional[date] = None,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
     """List all donations with optional filters (admin/organizer access)."""
-    query = db.query(Donation)
-    
-    if status:
-        query = query.filter(Donation.status == status)
-    if from_date:
-        query = query.filter(Donation.donation_date >= from_date)
-    if to_date:
-        query = query.filter(Donation.donation_date <= to_date)
-    
-    donations = query.order_by(
-        Donation.donation_date.desc()
-    ).offset(skip).limit(limit).all()
+    query = list_donations_query(
+        db, select_fields(DONATION_COLUMNS, fields), status=status, from_date=from_date, to_date=to_date
+    )
+    donations = query.offset(skip).limit(limit).all()
     
-    return donations
+    return rows_response(donations)
 
 @router.get("/stats/summary")
-def get_donation_stats(db: Session = Depends(get_db)):
+def get_donation_stats(db: Session = Depends(get_read_db)):
     """Get donation statistics."""
     from sqlalchemy import func
     
@@ -189,3 +242,11 @@ def get_donation_stats(db: Session = Depends(get_db)):
         "total_units_collected": float(total_units)
     }
 
+@router.get("/stats/monthly")
+def get_monthly_donation_stats(
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Get donation counts and units per month (whole months), including archived years."""
+    return monthly_totals(db, "donations", from_date, to_date)
@@ -1,46 +1,77 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from typing import List, Optional
+from app.database import get_db, get_read_db
 from app.models import User, Donor
-from app.schemas import DonorResponse, DonorUpdate
-from app.auth import get_current_donor
+from app.schemas import BatchResponse, DonorDashboard, DonorResponse, DonorUpdate
+from app.auth import get_current_donor_profile
+from app.serialization import batch_response, parse_ids, pick_fields, response_columns, row_response, rows_response, select_fields, with_id
+from app.matching import eligibility_index
+from app.dashboard import build_dashboard, dashboard_cache
 
 router = APIRouter()
 
-@router.get("/me", response_model=DonorResponse)
-def get_donor_profile(
-    current_user: User = Depends(get_current_donor),
-    db: Session = Depends(get_db)
+# Donor columns plus the account fields DonorResponse takes from User
+DONOR_COLUMNS = [*response_columns(Donor, DonorResponse), User.email, User.created_at]
+
+def _donors_query(db: Session, columns: List):
+    """Select ``columns``, joining users only when an account field is among them."""
+    query = db.query(*columns)
+    if any(column.class_ is User for column in columns):
+        query = query.join(User, User.id == Donor.user_id)
+    return query
+
+def list_donors_query(
+    db: Session,
+    columns: List = DONOR_COLUMNS,
+    blood_type: Optional[str] = None,
+    city: Optional[str] = None,
+    state: Optional[str] = None
 ):
-    """Get current donor's profile."""
-    donor = db.query(Donor).filter(Donor.user_id == current_user.id).first()
-    if not donor:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Donor profile not found"
-        )
+    """List query shared with the EXPLAIN checks in app/query_plans.py."""
+    query = _donors_query(db, columns)
     
-    return {
+    if blood_type:
+        query = query.filter(Donor.blood_type == blood_type)
+    if city:
+        query = query.filter(Donor.city == city)
+    if state:
+        query = query.filter(Donor.state == state)
+    
+    # Ordered, so pages are the same whichever fields are requested
+    return query.order_by(Donor.id)
+
+@router.get("/me", response_model=DonorResponse)
+def get_donor_profile(fields: Optional[str] = None, donor: Donor = Depends(get_current_donor_profile)):
+    """Get current donor's profile."""
+    profile = {
         **donor.__dict__,
-        "email": current_user.email,
-        "created_at": current_user.created_at
+        "email": donor.user.email,
+        "created_at": donor.user.created_at
     }
+    if fields:
+        return row_response(pick_fields(profile, select_fields(DONOR_COLUMNS, fields)))
+    return profile
+
+@router.get("/me/dashboard", response_model=DonorDashboard)
+async def get_donor_dashboard(donor: Donor = Depends(get_current_donor_profile)):
+    """Everything the donor home screen shows, in one response (cached briefly per donor)."""
+    # async so that cache hits are answered on the event loop; a rebuild runs
+    # its queries concurrently on the thread pool.
+    body = dashboard_cache.get(donor.id)
+    if body is None:
+        body = await build_dashboard(donor)
+        dashboard_cache.put(donor.id, body)
+    return Response(content=body, media_type="application/json")
 
 @router.put("/me", response_model=DonorResponse)
 def update_donor_profile(
     donor_update: DonorUpdate,
-    current_user: User = Depends(get_current_donor),
+    donor: Donor = Depends(get_current_donor_profile),
     db: Session = Depends(get_db)
 ):
     """Update current donor's profile."""
-    donor = db.query(Donor).filter(Donor.user_id == current_user.id).first()
-    if not donor:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Donor profile not found"
-        )
-    
     # Update fields
     update_data = donor_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
@@ -48,30 +79,39 @@ def update_donor_profile(
     
     db.commit()
     db.refresh(donor)
+    eligibility_index.upsert_donor(donor)
+    dashboard_cache.invalidate(donor.id)
     
     return {
         **donor.__dict__,
-        "email": current_user.email,
-        "created_at": current_user.created_at
+        "email": donor.user.email,
+        "created_at": donor.user.created_at
     }
 
+@router.get("/batch", response_model=BatchResponse[DonorResponse])
+def get_donors_batch(
+    ids: str = Query(..., description="Comma-separated ids, e.g. 1,2,3"),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Get several donors by ID (public information) in one query, in request order, with the IDs not found."""
+    donor_ids = parse_ids(ids)
+    donors = _donors_query(db, with_id(select_fields(DONOR_COLUMNS, fields), Donor.id)).filter(
+        Donor.id.in_(donor_ids)
+    ).all()
+    return batch_response(donors, donor_ids)
+
 @router.get("/{donor_id}", response_model=DonorResponse)
-def get_donor_by_id(donor_id: int, db: Session = Depends(get_db)):
+def get_donor_by_id(donor_id: int, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
     """Get donor by ID (public information)."""
-    donor = db.query(Donor).filter(Donor.id == donor_id).first()
+    donor = _donors_query(db, select_fields(DONOR_COLUMNS, fields)).filter(Donor.id == donor_id).first()
     if not donor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Donor not found"
         )
     
-    user = db.query(User).filter(User.id == donor.user_id).first()
-    
-    return {
-        **donor.__dict__,
-        "email": user.email,
-        "created_at": user.created_at
-    }
+    return row_response(donor)
 
 @router.get("/", response_model=List[DonorResponse])
 def list_donors(
@@ -80,28 +120,12 @@ def list_donors(
     blood_type: str = None,
     city: str = None,
     state: str = None,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
     """List donors with optional filters."""
-    query = db.query(Donor)
-    
-    if blood_type:
-        query = query.filter(Donor.blood_type == blood_type)
-    if city:
-        query = query.filter(Donor.city == city)
-    if state:
-        query = query.filter(Donor.state == state)
-    
+    query = list_donors_query(db, select_fields(DONOR_COLUMNS, fields), blood_type=blood_type, city=city, state=state)
     donors = query.offset(skip).limit(limit).all()
     
-    result = []
-    for donor in donors:
-        user = db.query(User).filter(User.id == donor.user_id).first()
-        result.append({
-            **donor.__dict__,
-            "email": user.email,
-            "created_at": user.created_at
-        })
-    
-    return result
+    return rows_response(donors)
 
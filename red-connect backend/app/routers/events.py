@@ -1,29 +1,75 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
-from app.database import get_db
-from app.models import User, Event, Organizer
-from app.schemas import EventCreate, EventUpdate, EventResponse
-from app.auth import get_current_organizer, get_current_user
+from app.database import get_db, get_read_db, SessionLocal
+from app.models import User, Event, EventRegistration, EventStatus, Organizer, Donor, Notification, RegistrationStatus
+from app.schemas import BatchResponse, EventCreate, EventUpdate, EventResponse, EventRegistrationResponse, EventNotifyRequest, EventNotifyResponse, NotificationSummary
+from app.auth import get_current_organizer_profile, get_current_donor_profile, get_current_user
+from app.serialization import batch_response, parse_ids, response_columns, row_response, rows_response, select_fields, with_id
+from app.notifications import enqueue_event_notifications, notifier
+from app.archive import export_ndjson, monthly_totals
+from app.config import settings
+from app import waitlist
+from app.calendar_feed import FEED_COLUMNS, MAX_EVENTS, calendar_cache, calendar_name, feed_response, render_calendar
+from app.organizer_report import report_cache
 
 router = APIRouter()
 
+EVENT_COLUMNS = response_columns(Event, EventResponse)
+
+# List query builders, shared with the EXPLAIN checks in app/query_plans.py
+
+def my_events_query(db: Session, organizer_id: int, columns: List = EVENT_COLUMNS):
+    return db.query(*columns).filter(
+        Event.organizer_id == organizer_id
+    ).order_by(Event.event_date.desc())
+
+def list_events_query(
+    db: Session,
+    columns: List = EVENT_COLUMNS,
+    status: Optional[str] = None,
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None
+):
+    query = db.query(*columns)
+    
+    if status:
+        query = query.filter(Event.status == status)
+    if city:
+        query = query.filter(Event.city == city)
+    if state:
+        query = query.filter(Event.state == state)
+    if from_date:
+        query = query.filter(Event.event_date >= from_date)
+    if to_date:
+        query = query.filter(Event.event_date <= to_date)
+    
+    return query.order_by(Event.event_date.asc())
+
+def upcoming_events_query(db: Session, columns: List = EVENT_COLUMNS, city: Optional[str] = None, state: Optional[str] = None):
+    # Statuses are kept current by the scheduler (app/event_status.py), so this
+    # is a range read on the (status, event_date) index.
+    query = db.query(*columns).filter(Event.status == EventStatus.UPCOMING)
+    
+    if city:
+        query = query.filter(Event.city == city)
+    if state:
+        query = query.filter(Event.state == state)
+    
+    return query.order_by(Event.event_date.asc())
+
 @router.post("/", response_model=EventResponse, status_code=status.HTTP_201_CREATED)
 def create_event(
     event: EventCreate,
-    current_user: User = Depends(get_current_organizer),
+    organizer: Organizer = Depends(get_current_organizer_profile),
     db: Session = Depends(get_db)
 ):
     """Create a new blood donation event."""
-    # Get organizer profile
-    organizer = db.query(Organizer).filter(Organizer.user_id == current_user.id).first()
-    if not organizer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Organizer profile not found"
-        )
-    
     new_event = Event(
         organizer_id=organizer.id,
         **event.model_dump()
@@ -32,26 +78,20 @@ def create_event(
     db.add(new_event)
     db.commit()
     db.refresh(new_event)
+    calendar_cache.invalidate()
+    report_cache.invalidate(organizer.id)
     return new_event
 
 @router.get("/my-events", response_model=List[EventResponse])
 def get_my_events(
-    current_user: User = Depends(get_current_organizer),
+    fields: Optional[str] = None,
+    organizer: Organizer = Depends(get_current_organizer_profile),
     db: Session = Depends(get_db)
 ):
     """Get all events created by the current organizer."""
-    organizer = db.query(Organizer).filter(Organizer.user_id == current_user.id).first()
-    if not organizer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Organizer profile not found"
-        )
-    
-    events = db.query(Event).filter(
-        Event.organizer_id == organizer.id
-    ).order_by(Event.event_date.desc()).all()
+    events = my_events_query(db, organizer.id, select_fields(EVENT_COLUMNS, fields)).all()
     
-    return events
+    return rows_response(events)
 
 @router.get("/", response_model=List[EventResponse])
 def list_events(
@@ -62,24 +102,16 @@ def list_events(
     state: Optional[str] = None,
     from_date: Optional[date] = None,
     to_date: Optional[date] = None,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
-    """List all events with optional filters."""
-    query = db.query(Event)
-    
-    if status:
-        query = query.filter(Event.status == status)
-    if city:
-        query = query.filter(Event.city == city)
-    if state:
-        query = query.filter(Event.state == state)
-    if from_date:
-        query = query.filter(Event.event_date >= from_date)
-    if to_date:
-        query = query.filter(Event.event_date <= to_date)
-    
-    events = query.order_by(Event.event_date.asc()).offset(skip).limit(limit).all()
-    return events
+    """List all events with optional filters; ``fields`` picks the returned fields (e.g. ``id,title,event_date``)."""
+    query = list_events_query(
+        db, select_fields(EVENT_COLUMNS, fields),
+        status=status, city=city, state=state, from_date=from_date, to_date=to_date
+    )
+    events = query.offset(skip).limit(limit).all()
+    return rows_response(events)
 
 @router.get("/upcoming", response_model=List[EventResponse])
 def get_upcoming_events(
@@ -87,44 +119,96 @@ def get_upcoming_events(
     limit: int = Query(10, ge=1, le=100),
     city: Optional[str] = None,
     state: Optional[str] = None,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
     """Get upcoming events."""
-    from datetime import datetime
+    query = upcoming_events_query(db, select_fields(EVENT_COLUMNS, fields), city=city, state=state)
+    events = query.offset(skip).limit(limit).all()
+    return rows_response(events)
+
+def _render_calendar(city: Optional[str], state: Optional[str]) -> bytes:
+    db = SessionLocal()
+    try:
+        query = db.query(*FEED_COLUMNS).filter(
+            Event.status.in_([EventStatus.UPCOMING, EventStatus.ONGOING])
+        )
+        if city:
+            query = query.filter(Event.city == city)
+        if state:
+            query = query.filter(Event.state == state)
+        events = query.order_by(Event.event_date.asc(), Event.id.asc()).limit(MAX_EVENTS).all()
+        return render_calendar(events, calendar_name(city, state))
+    finally:
+        db.close()
+
+@router.get("/calendar.ics", response_class=Response)
+async def get_events_calendar(
+    request: Request,
+    city: Optional[str] = None,
+    state: Optional[str] = None
+):
+    """iCalendar feed of upcoming events for calendar subscriptions (supports ETag/If-Modified-Since)."""
+    # async so that cache hits and 304s are answered on the event loop; only a
+    # rebuild goes to a thread and the database.
+    key = calendar_cache.key(city, state)
+    feed = calendar_cache.get(key)
+    if feed is None:
+        body = await asyncio.to_thread(_render_calendar, *key)
+        feed = calendar_cache.put(key, body)
+    return feed_response(request, feed, settings.CALENDAR_CACHE_TTL_SECONDS)
+
+@router.get("/export")
+def export_events(
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Export events in a date range as NDJSON, including archived years (organizer/admin access)."""
+    if current_user.role not in ["organizer", "admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only organizers and admins can export events"
+        )
     
-    query = db.query(Event).filter(
-        Event.event_date >= datetime.now().date(),
-        Event.status == "upcoming"
+    return StreamingResponse(
+        export_ndjson(SessionLocal, "events", EVENT_COLUMNS, from_date, to_date),
+        media_type="application/x-ndjson"
     )
-    
-    if city:
-        query = query.filter(Event.city == city)
-    if state:
-        query = query.filter(Event.state == state)
-    
-    events = query.order_by(Event.event_date.asc()).offset(skip).limit(limit).all()
-    return events
+
+@router.get("/batch", response_model=BatchResponse[EventResponse])
+def get_events_batch(
+    ids: str = Query(..., description="Comma-separated ids, e.g. 1,2,3"),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Get several events by ID in one query, in request order, with the IDs not found."""
+    event_ids = parse_ids(ids)
+    events = db.query(*with_id(select_fields(EVENT_COLUMNS, fields), Event.id)).filter(
+        Event.id.in_(event_ids)
+    ).all()
+    return batch_response(events, event_ids)
 
 @router.get("/{event_id}", response_model=EventResponse)
-def get_event(event_id: int, db: Session = Depends(get_db)):
+def get_event(event_id: int, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
     """Get a specific event by ID."""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = db.query(*select_fields(EVENT_COLUMNS, fields)).filter(Event.id == event_id).first()
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Event not found"
         )
-    return event
+    return row_response(event)
 
 @router.put("/{event_id}", response_model=EventResponse)
 def update_event(
     event_id: int,
     event_update: EventUpdate,
-    current_user: User = Depends(get_current_organizer),
+    organizer: Organizer = Depends(get_current_organizer_profile),
     db: Session = Depends(get_db)
 ):
-    """Update an event."""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    """Update an event; raising the capacity promotes donors from the waitlist."""
+    event = waitlist.lock_event(db, event_id)
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -132,7 +216,6 @@ def update_event(
         )
     
     # Check if user owns this event
-    organizer = db.query(Organizer).filter(Organizer.user_id == current_user.id).first()
     if event.organizer_id != organizer.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -143,14 +226,19 @@ def update_event(
     for key, value in update_data.items():
         setattr(event, key, value)
     
+    promoted = waitlist.promote(db, event) if "max_participants" in update_data else []
     db.commit()
     db.refresh(event)
+    calendar_cache.invalidate()
+    report_cache.invalidate(organizer.id)
+    if promoted:
+        notifier.wake()
     return event
 
 @router.delete("/{event_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_event(
     event_id: int,
-    current_user: User = Depends(get_current_organizer),
+    organizer: Organizer = Depends(get_current_organizer_profile),
     db: Session = Depends(get_db)
 ):
     """Delete an event."""
@@ -162,69 +250,192 @@ def delete_event(
         )
     
     # Check if user owns this event
-    organizer = db.query(Organizer).filter(Organizer.user_id == current_user.id).first()
     if event.organizer_id != organizer.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to delete this event"
         )
     
+    # Deleted here rather than by ON DELETE CASCADE, which a partitioned
+    # events table does not have (see app/partitioning.py)
+    db.query(Notification).filter(Notification.event_id == event.id).delete(synchronize_session=False)
+    db.query(EventRegistration).filter(EventRegistration.event_id == event.id).delete(synchronize_session=False)
     db.delete(event)
     db.commit()
+    calendar_cache.invalidate()
+    report_cache.invalidate(organizer.id)
     return None
 
-@router.post("/{event_id}/register")
+@router.post("/{event_id}/register", response_model=EventRegistrationResponse)
 def register_for_event(
     event_id: int,
-    current_user: User = Depends(get_current_user),
+    donor: Donor = Depends(get_current_donor_profile),
     db: Session = Depends(get_db)
 ):
-    """Register current user (donor) for an event."""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    """Register the current donor for an event, or add them to its waitlist when it is full."""
+    event = waitlist.lock_event(db, event_id)
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Event not found"
         )
     
-    if event.max_participants and event.registered_participants >= event.max_participants:
+    if event.status not in (EventStatus.UPCOMING, EventStatus.ONGOING):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Event is full"
+            detail="Event is not open for registration"
         )
     
-    # Increment registered participants
-    event.registered_participants += 1
+    if waitlist.find_registration(db, event_id, donor.id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Already registered for this event"
+        )
+    
+    registration = waitlist.register(db, event, donor.id)
+    position = waitlist.waitlist_position(db, registration) if registration.status == RegistrationStatus.WAITLISTED else None
     db.commit()
+    report_cache.invalidate(event.organizer_id)
     
+    if position is not None:
+        message = f"Event is full; you are number {position} on the waitlist"
+    else:
+        message = "Successfully registered for event"
     return {
-        "message": "Successfully registered for event",
+        "message": message,
         "event_id": event_id,
-        "event_title": event.title
+        "event_title": event.title,
+        "status": registration.status,
+        "waitlist_position": position
     }
 
+@router.get("/{event_id}/register", response_model=EventRegistrationResponse)
+def get_my_registration(
+    event_id: int,
+    donor: Donor = Depends(get_current_donor_profile),
+    db: Session = Depends(get_db)
+):
+    """Get the current donor's registration for an event, with their waitlist position."""
+    registration = waitlist.find_registration(db, event_id, donor.id)
+    if not registration:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not registered for this event"
+        )
+    
+    waitlisted = registration.status == RegistrationStatus.WAITLISTED
+    return {
+        "message": "On the waitlist" if waitlisted else "Registered",
+        "event_id": event_id,
+        "event_title": registration.event.title,
+        "status": registration.status,
+        "waitlist_position": waitlist.waitlist_position(db, registration) if waitlisted else None
+    }
+
+@router.delete("/{event_id}/register", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_registration(
+    event_id: int,
+    donor: Donor = Depends(get_current_donor_profile),
+    db: Session = Depends(get_db)
+):
+    """Cancel the current donor's registration (or leave the waitlist); the freed place goes to the next waitlisted donor."""
+    event = waitlist.lock_event(db, event_id)
+    registration = waitlist.find_registration(db, event_id, donor.id) if event else None
+    if not registration:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not registered for this event"
+        )
+    
+    promoted = waitlist.cancel(db, event, registration)
+    db.commit()
+    report_cache.invalidate(event.organizer_id)
+    if promoted:
+        notifier.wake()
+    return None
+
+def _get_owned_event(event_id: int, organizer: Organizer, db: Session) -> Event:
+    event = db.query(Event).filter(Event.id == event_id).first()
+    if not event:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found"
+        )
+    
+    if event.organizer_id != organizer.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to notify donors about this event"
+        )
+    return event
+
+@router.post("/{event_id}/notify", response_model=EventNotifyResponse, status_code=status.HTTP_202_ACCEPTED)
+def notify_donors(
+    event_id: int,
+    notify_request: EventNotifyRequest,
+    organizer: Organizer = Depends(get_current_organizer_profile),
+    db: Session = Depends(get_db)
+):
+    """Queue notifications about an event for nearby (or selected) donors; sending happens in the background."""
+    event = _get_owned_event(event_id, organizer, db)
+    
+    queued = enqueue_event_notifications(
+        db,
+        event,
+        channels=dict.fromkeys(notify_request.channels),
+        blood_types=notify_request.blood_types,
+        donor_ids=notify_request.donor_ids,
+        message=notify_request.message
+    )
+    if queued:
+        notifier.wake()
+    
+    return {"event_id": event_id, "queued": queued}
+
+@router.get("/{event_id}/notifications", response_model=List[NotificationSummary])
+def get_notification_summary(
+    event_id: int,
+    organizer: Organizer = Depends(get_current_organizer_profile),
+    db: Session = Depends(get_db)
+):
+    """Get delivery counts per channel and status for an event's notifications."""
+    from sqlalchemy import func
+    
+    _get_owned_event(event_id, organizer, db)
+    
+    rows = db.query(
+        Notification.channel, Notification.status, func.count(Notification.id)
+    ).filter(
+        Notification.event_id == event_id
+    ).group_by(Notification.channel, Notification.status).all()
+    
+    return [{"channel": channel, "status": state, "count": count} for channel, state, count in rows]
+
 @router.get("/stats/summary")
-def get_event_stats(db: Session = Depends(get_db)):
+def get_event_stats(db: Session = Depends(get_read_db)):
     """Get event statistics."""
     from sqlalchemy import func
-    from datetime import datetime
     
-    total_events = db.query(func.count(Event.id)).scalar()
-    upcoming_events = db.query(func.count(Event.id)).filter(
-        Event.event_date >= datetime.now().date(),
-        Event.status == "upcoming"
-    ).scalar()
-    completed_events = db.query(func.count(Event.id)).filter(
-        Event.status == "completed"
-    ).scalar()
-    
-    total_participants = db.query(func.sum(Event.registered_participants)).scalar() or 0
+    # One pass over the status index instead of a count per status
+    rows = db.query(
+        Event.status, func.count(Event.id), func.sum(Event.registered_participants)
+    ).group_by(Event.status).all()
+    counts = {event_status: count for event_status, count, _ in rows}
     
     return {
-        "total_events": total_events,
-        "upcoming_events": upcoming_events,
-        "completed_events": completed_events,
-        "ongoing_events": total_events - upcoming_events - completed_events,
-        "total_participants": total_participants
+        "total_events": sum(counts.values()),
+        "upcoming_events": counts.get(EventStatus.UPCOMING, 0),
+        "completed_events": counts.get(EventStatus.COMPLETED, 0),
+        "ongoing_events": counts.get(EventStatus.ONGOING, 0),
+        "cancelled_events": counts.get(EventStatus.CANCELLED, 0),
+        "total_participants": sum(participants or 0 for _, _, participants in rows)
     }
 
+@router.get("/stats/monthly")
+def get_monthly_event_stats(
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Get event and participant counts per month (whole months), including archived years."""
+    return monthly_totals(db, "events", from_date, to_date)
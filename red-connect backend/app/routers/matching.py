@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+import time
+from app.database import get_db, SessionLocal
+from app.models import User, Donor
+from app.schemas import EmergencyMatchRequest, EmergencyMatchResponse
+from app.auth import get_current_user
+from app.matching import eligibility_index, is_eligible
+
+router = APIRouter()
+
+@router.post("/emergency", response_model=EmergencyMatchResponse)
+def match_emergency(
+    match_request: EmergencyMatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Rank eligible, compatible donors near a recipient (Admin/Organizer only)."""
+    if current_user.role not in ["organizer", "admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only organizers or admins can request emergency matches"
+        )
+
+    has_coordinates = match_request.latitude is not None and match_request.longitude is not None
+    if not has_coordinates and not match_request.city:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide latitude/longitude or a city"
+        )
+
+    started = time.perf_counter()
+    eligibility_index.ensure_built(SessionLocal)
+
+    # Over-fetch: some donors will not respond, and a few may fail the re-check below
+    limit = match_request.limit or min(match_request.units_needed * 5, 500)
+    ranked = eligibility_index.search(
+        match_request.recipient_blood_type,
+        latitude=match_request.latitude,
+        longitude=match_request.longitude,
+        city=match_request.city,
+        state=match_request.state,
+        radius_km=match_request.radius_km,
+        limit=limit
+    )
+
+    # Re-check against the database: the index may lag other workers' writes
+    rows = db.query(
+        Donor.id, Donor.full_name, Donor.phone, Donor.blood_type, Donor.city, Donor.state,
+        Donor.last_donation_date, Donor.date_of_birth, Donor.weight
+    ).join(User, User.id == Donor.user_id).filter(
+        Donor.id.in_([donor_id for donor_id, _, _ in ranked]),
+        User.is_active == True
+    ).all() if ranked else []
+    donors = {row.id: row for row in rows}
+
+    candidates = []
+    for donor_id, donor_type, distance in ranked:
+        donor = donors.get(donor_id)
+        if donor is None or donor.blood_type != donor_type:
+            continue
+        if not is_eligible(donor.last_donation_date, donor.date_of_birth, donor.weight):
+            continue
+        candidates.append({
+            "donor_id": donor.id,
+            "full_name": donor.full_name,
+            "phone": donor.phone,
+            "blood_type": donor.blood_type,
+            "city": donor.city,
+            "state": donor.state,
+            "distance_km": round(distance, 2) if distance is not None else None,
+            "exact_match": donor.blood_type == match_request.recipient_blood_type,
+            "last_donation_date": donor.last_donation_date
+        })
+
+    return {
+        "recipient_blood_type": match_request.recipient_blood_type,
+        "units_needed": match_request.units_needed,
+        "candidates": candidates,
+        "search_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
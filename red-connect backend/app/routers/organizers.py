@@ -1,46 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from typing import List, Optional
+from app.database import get_db, get_read_db
 from app.models import User, Organizer
-from app.schemas import OrganizerResponse, OrganizerUpdate
-from app.auth import get_current_organizer
+from app.schemas import BatchResponse, OrganizerReport, OrganizerResponse, OrganizerUpdate
+from app.auth import get_current_organizer_profile
+from app.organizer_report import build_report, encode_report, report_cache
+from app.serialization import batch_response, parse_ids, pick_fields, response_columns, row_response, rows_response, select_fields, with_id
 
 router = APIRouter()
 
-@router.get("/me", response_model=OrganizerResponse)
-def get_organizer_profile(
-    current_user: User = Depends(get_current_organizer),
-    db: Session = Depends(get_db)
+# Organizer columns plus the account fields OrganizerResponse takes from User
+ORGANIZER_COLUMNS = [*response_columns(Organizer, OrganizerResponse), User.email, User.created_at]
+
+def _organizers_query(db: Session, columns: List):
+    """Select ``columns``, joining users only when an account field is among them."""
+    query = db.query(*columns)
+    if any(column.class_ is User for column in columns):
+        query = query.join(User, User.id == Organizer.user_id)
+    return query
+
+def list_organizers_query(
+    db: Session,
+    columns: List = ORGANIZER_COLUMNS,
+    verified: Optional[bool] = None,
+    city: Optional[str] = None,
+    state: Optional[str] = None
 ):
-    """Get current organizer's profile."""
-    organizer = db.query(Organizer).filter(Organizer.user_id == current_user.id).first()
-    if not organizer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Organizer profile not found"
-        )
+    """List query shared with the EXPLAIN checks in app/query_plans.py."""
+    query = _organizers_query(db, columns)
     
-    return {
+    if verified is not None:
+        query = query.filter(Organizer.verified == verified)
+    if city:
+        query = query.filter(Organizer.city == city)
+    if state:
+        query = query.filter(Organizer.state == state)
+    
+    # Ordered, so pages are the same whichever fields are requested
+    return query.order_by(Organizer.id)
+
+@router.get("/me", response_model=OrganizerResponse)
+def get_organizer_profile(fields: Optional[str] = None, organizer: Organizer = Depends(get_current_organizer_profile)):
+    """Get current organizer's profile."""
+    profile = {
         **organizer.__dict__,
-        "email": current_user.email,
-        "created_at": current_user.created_at
+        "email": organizer.user.email,
+        "created_at": organizer.user.created_at
     }
+    if fields:
+        return row_response(pick_fields(profile, select_fields(ORGANIZER_COLUMNS, fields)))
+    return profile
 
 @router.put("/me", response_model=OrganizerResponse)
 def update_organizer_profile(
     organizer_update: OrganizerUpdate,
-    current_user: User = Depends(get_current_organizer),
+    organizer: Organizer = Depends(get_current_organizer_profile),
     db: Session = Depends(get_db)
 ):
     """Update current organizer's profile."""
-    organizer = db.query(Organizer).filter(Organizer.user_id == current_user.id).first()
-    if not organizer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Organizer profile not found"
-        )
-    
     # Update fields
     update_data = organizer_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
@@ -51,27 +70,55 @@ def update_organizer_profile(
     
     return {
         **organizer.__dict__,
-        "email": current_user.email,
-        "created_at": current_user.created_at
+        "email": organizer.user.email,
+        "created_at": organizer.user.created_at
     }
 
+@router.get("/me/report", response_model=OrganizerReport)
+def get_organizer_report(
+    from_date: Optional[date] = Query(None, alias="from", description="First event date included"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last event date included"),
+    organizer: Organizer = Depends(get_current_organizer_profile),
+    db: Session = Depends(get_read_db)
+):
+    """Registrations, donations by blood type and status, units collected and certificates issued per event."""
+    if from_date and to_date and from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must not be after 'to'"
+        )
+    
+    key = (from_date, to_date)
+    body = report_cache.get(organizer.id, key)
+    if body is None:
+        body = encode_report(build_report(db, organizer.id, from_date, to_date))
+        report_cache.put(organizer.id, key, body)
+    return Response(content=body, media_type="application/json")
+
+@router.get("/batch", response_model=BatchResponse[OrganizerResponse])
+def get_organizers_batch(
+    ids: str = Query(..., description="Comma-separated ids, e.g. 1,2,3"),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Get several organizers by ID (public information) in one query, in request order, with the IDs not found."""
+    organizer_ids = parse_ids(ids)
+    organizers = _organizers_query(db, with_id(select_fields(ORGANIZER_COLUMNS, fields), Organizer.id)).filter(
+        Organizer.id.in_(organizer_ids)
+    ).all()
+    return batch_response(organizers, organizer_ids)
+
 @router.get("/{organizer_id}", response_model=OrganizerResponse)
-def get_organizer_by_id(organizer_id: int, db: Session = Depends(get_db)):
+def get_organizer_by_id(organizer_id: int, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
     """Get organizer by ID (public information)."""
-    organizer = db.query(Organizer).filter(Organizer.id == organizer_id).first()
+    organizer = _organizers_query(db, select_fields(ORGANIZER_COLUMNS, fields)).filter(Organizer.id == organizer_id).first()
     if not organizer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Organizer not found"
         )
     
-    user = db.query(User).filter(User.id == organizer.user_id).first()
-    
-    return {
-        **organizer.__dict__,
-        "email": user.email,
-        "created_at": user.created_at
-    }
+    return row_response(organizer)
 
 @router.get("/", response_model=List[OrganizerResponse])
 def list_organizers(
@@ -80,28 +127,12 @@ def list_organizers(
     verified: bool = None,
     city: str = None,
     state: str = None,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
     """List organizers with optional filters."""
-    query = db.query(Organizer)
-    
-    if verified is not None:
-        query = query.filter(Organizer.verified == verified)
-    if city:
-        query = query.filter(Organizer.city == city)
-    if state:
-        query = query.filter(Organizer.state == state)
-    
+    query = list_organizers_query(db, select_fields(ORGANIZER_COLUMNS, fields), verified=verified, city=city, state=state)
     organizers = query.offset(skip).limit(limit).all()
     
-    result = []
-    for organizer in organizers:
-        user = db.query(User).filter(User.id == organizer.user_id).first()
-        result.append({
-            **organizer.__dict__,
-            "email": user.email,
-            "created_at": user.created_at
-        })
-    
-    return result
+    return rows_response(organizers)
 
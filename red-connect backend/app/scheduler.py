@@ -0,0 +1,53 @@
+"""
+Periodic background jobs run on the web workers' event loop.
+
+A job is a blocking function returning a dict of counts; it runs in the
+thread pool every ``interval_seconds``. Jobs that must not run concurrently
+across workers take a MySQL named lock themselves (see
+``app.database.advisory_lock``) and return an empty dict when they lose it.
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """Runs ``job`` every ``interval_seconds`` (0 disables).
+
+    ``on_change`` is called after a run that reported any non-zero count.
+    """
+
+    def __init__(self, name: str, job: Callable[[], Dict[str, int]], interval_seconds: float = 60.0,
+                 on_change: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.job = job
+        self.interval_seconds = interval_seconds
+        self.on_change = on_change
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.interval_seconds > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                result = await asyncio.to_thread(self.job)
+                if any(result.values()):
+                    logger.info(f"✅ {self.name}: {result}")
+                    if self.on_change is not None:
+                        self.on_change()
+            except Exception as e:
+                logger.error(f"❌ {self.name} failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
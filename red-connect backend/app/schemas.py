@@ -1,7 +1,7 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from datetime import datetime, date
-from typing import Optional, List
-from app.models import UserRole, BloodType, BankCategory, EventStatus, DonationStatus
+from typing import Dict, Generic, Optional, List, TypeVar
+from app.models import UserRole, BloodType, BloodComponent, BatchStatus, BankCategory, EventStatus, DonationStatus, NotificationChannel, NotificationStatus, RegistrationStatus
 
 # User Schemas
 class UserBase(BaseModel):
@@ -25,6 +25,8 @@ class TokenData(BaseModel):
     email: Optional[str] = None
     user_id: Optional[int] = None
     role: Optional[str] = None
+    donor_id: Optional[int] = None
+    organizer_id: Optional[int] = None
 
 # Donor Schemas
 class DonorBase(BaseModel):
@@ -36,6 +38,8 @@ class DonorBase(BaseModel):
     city: Optional[str] = None
     state: Optional[str] = None
     pincode: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     weight: Optional[float] = None
     medical_conditions: Optional[str] = None
     emergency_contact: Optional[str] = None
@@ -53,6 +57,8 @@ class DonorUpdate(BaseModel):
     city: Optional[str] = None
     state: Optional[str] = None
     pincode: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     weight: Optional[float] = None
     medical_conditions: Optional[str] = None
     emergency_contact: Optional[str] = None
@@ -69,6 +75,49 @@ class DonorResponse(DonorBase):
     class Config:
         from_attributes = True
 
+class DashboardProfile(BaseModel):
+    id: int
+    full_name: str
+    blood_type: BloodType
+    city: Optional[str] = None
+    state: Optional[str] = None
+    total_donations: int
+    last_donation_date: Optional[date] = None
+    profile_image: Optional[str] = None
+
+class DashboardDonation(BaseModel):
+    id: int
+    donation_date: date
+    blood_type: BloodType
+    units: float
+    status: DonationStatus
+    event_id: Optional[int] = None
+
+class DashboardCertificate(BaseModel):
+    id: int
+    certificate_number: str
+    issue_date: date
+    status: str
+    certificate_url: Optional[str] = None
+
+class DashboardEvent(BaseModel):
+    id: int
+    title: str
+    event_date: date
+    start_time: Optional[str] = None
+    venue: str
+    city: str
+
+class DonorDashboard(BaseModel):
+    profile: DashboardProfile
+    eligible_now: bool
+    next_eligible_date: Optional[date] = None  # None: no longer eligible (age, weight)
+    recent_donations: List[DashboardDonation]
+    certificates_total: int
+    recent_certificates: List[DashboardCertificate]
+    upcoming_events: List[DashboardEvent]  # in the donor's state, own city first
+    generated_at: datetime
+
 # Organizer Schemas
 class OrganizerBase(BaseModel):
     organization_name: str
@@ -107,6 +156,40 @@ class OrganizerResponse(OrganizerBase):
     class Config:
         from_attributes = True
 
+class ReportBloodType(BaseModel):
+    donations: int
+    units_collected: float  # completed donations only
+
+class ReportEvent(BaseModel):
+    event_id: int
+    title: str
+    event_date: date
+    city: str
+    status: EventStatus
+    registered: int
+    waitlisted: int
+    max_participants: Optional[int] = None
+    donations: int
+    donations_by_status: Dict[DonationStatus, int]
+    units_collected: float  # completed donations only
+    by_blood_type: Dict[BloodType, ReportBloodType]
+    certificates_issued: int
+
+class ReportTotals(BaseModel):
+    events: int
+    registered: int
+    donations: int
+    units_collected: float
+    certificates_issued: int
+    by_blood_type: Dict[BloodType, ReportBloodType]
+
+class OrganizerReport(BaseModel):
+    from_date: Optional[date] = Field(None, alias="from")
+    to_date: Optional[date] = Field(None, alias="to")
+    events: List[ReportEvent]  # by event date
+    totals: ReportTotals
+    generated_at: datetime
+
 # Blood Bank Schemas
 class BloodBankBase(BaseModel):
     name: str
@@ -166,7 +249,109 @@ class BloodInventoryResponse(BloodInventoryBase):
     class Config:
         from_attributes = True
 
+class BloodBatchCreate(BaseModel):
+    blood_bank_id: int
+    blood_type: BloodType
+    component: BloodComponent = BloodComponent.WHOLE_BLOOD
+    units: int = Field(..., gt=0)
+    collected_on: Optional[date] = None  # defaults to today
+
+class BloodBatchResponse(BaseModel):
+    id: int
+    blood_bank_id: int
+    blood_type: BloodType
+    component: BloodComponent
+    units_received: int
+    units_remaining: int
+    collected_on: date
+    expires_on: date
+    status: BatchStatus
+
+    class Config:
+        from_attributes = True
+
+class BloodDispatchRequest(BaseModel):
+    blood_bank_id: int
+    blood_type: BloodType
+    component: BloodComponent = BloodComponent.WHOLE_BLOOD
+    units: int = Field(..., gt=0)
+    destination: Optional[str] = Field(None, max_length=255)
+
+class DispatchedBatch(BaseModel):
+    batch_id: int
+    units: int
+    collected_on: date
+    expires_on: date
+
+class BloodDispatchResponse(BaseModel):
+    id: int
+    blood_bank_id: int
+    blood_type: BloodType
+    component: BloodComponent
+    units: int
+    destination: Optional[str] = None
+    dispatched_at: datetime
+    batches: List[DispatchedBatch]
+
+class BloodForecastResponse(BaseModel):
+    blood_type: BloodType
+    horizon_days: int
+    daily_demand: List[float]  # expected units per day, starting today
+    demand: float
+    demand_high: float  # 90th percentile over the horizon
+    units_available: int
+    days_of_cover: Optional[int] = None  # None: stock lasts the whole horizon
+    shortfall: float
+    runs_short: bool
+    computed_at: datetime
+
+class TransferTarget(BaseModel):
+    blood_bank_id: int
+    blood_type: BloodType
+    units: int = Field(..., ge=0)
+
+class TransferPlanRequest(BaseModel):
+    state: Optional[str] = None
+    bank_ids: Optional[List[int]] = Field(None, max_length=5000)
+    targets: List[TransferTarget] = Field(default_factory=list, max_length=40000)
+    default_target: Optional[int] = Field(None, ge=0)  # for pairs with neither a target nor a forecast
+    radius_km: float = Field(100.0, gt=0, le=1000)
+    neighbours: int = Field(8, ge=1, le=50)  # nearest surplus banks considered per shortage and type
+    allow_substitutions: bool = True
+
+class PlannedTransfer(BaseModel):
+    from_bank_id: int
+    to_bank_id: int
+    blood_type: BloodType  # type sent
+    for_blood_type: BloodType  # type short at the receiving bank
+    units: int
+    distance_km: float
+
+class UnmetShortage(BaseModel):
+    blood_bank_id: int
+    blood_type: BloodType
+    units: int
+
+class TransferPlanResponse(BaseModel):
+    transfers: List[PlannedTransfer]
+    unmet: List[UnmetShortage]
+    banks: int
+    total_units: int
+    total_unit_km: float
+    solve_ms: float
+
 # Event Schemas
+def normalize_event_time(value: Optional[str]) -> Optional[str]:
+    """Zero-padded 24h ``HH:MM``, so event times compare correctly as strings."""
+    if value is None or not value.strip():
+        return None
+    for fmt in ("%H:%M", "%H:%M:%S", "%I:%M %p", "%I:%M%p", "%I %p", "%I%p"):
+        try:
+            return datetime.strptime(value.strip().upper(), fmt).strftime("%H:%M")
+        except ValueError:
+            pass
+    raise ValueError("Time must be HH:MM (24-hour) or H:MM AM/PM")
+
 class EventBase(BaseModel):
     title: str
     description: Optional[str] = None
@@ -180,7 +365,7 @@ class EventBase(BaseModel):
     banner_image: Optional[str] = None
 
 class EventCreate(EventBase):
-    pass
+    _normalize_times = field_validator("start_time", "end_time")(normalize_event_time)
 
 class EventUpdate(BaseModel):
     title: Optional[str] = None
@@ -195,6 +380,8 @@ class EventUpdate(BaseModel):
     status: Optional[EventStatus] = None
     banner_image: Optional[str] = None
 
+    _normalize_times = field_validator("start_time", "end_time")(normalize_event_time)
+
 class EventResponse(EventBase):
     id: int
     organizer_id: int
@@ -206,6 +393,28 @@ class EventResponse(EventBase):
     class Config:
         from_attributes = True
 
+class EventRegistrationResponse(BaseModel):
+    message: str
+    event_id: int
+    event_title: str
+    status: RegistrationStatus
+    waitlist_position: Optional[int] = None  # 1 = next to get a place
+
+class EventNotifyRequest(BaseModel):
+    channels: List[NotificationChannel] = Field(default_factory=lambda: [NotificationChannel.EMAIL], min_length=1)
+    blood_types: Optional[List[BloodType]] = None
+    donor_ids: Optional[List[int]] = Field(None, max_length=10000)  # e.g. from /api/matching/emergency
+    message: Optional[str] = Field(None, max_length=500)
+
+class EventNotifyResponse(BaseModel):
+    event_id: int
+    queued: int
+
+class NotificationSummary(BaseModel):
+    channel: NotificationChannel
+    status: NotificationStatus
+    count: int
+
 # Donation Schemas
 class DonationBase(BaseModel):
     donation_date: date
@@ -233,6 +442,14 @@ class DonationResponse(DonationBase):
     class Config:
         from_attributes = True
 
+# Batch-get Schemas
+ItemT = TypeVar("ItemT")
+
+class BatchResponse(BaseModel, Generic[ItemT]):
+    items: List[ItemT]  # in request order
+    missing: List[int]  # requested ids that do not exist
+    forbidden: List[int] = []  # requested ids the caller may not see
+
 # Filter Schemas
 class BloodBankFilter(BaseModel):
     state: Optional[str] = None
@@ -286,3 +503,49 @@ class DonationWithCertificate(DonationResponse):
 
     class Config:
         from_attributes = True
+
+# Audit Log Schemas
+class AuditLogResponse(BaseModel):
+    id: int
+    created_at: datetime
+    actor_user_id: Optional[int] = None
+    entity: str
+    entity_id: Optional[int] = None
+    action: str
+    changes: dict
+
+class AuditWriterStats(BaseModel):
+    enabled: bool
+    buffered: int
+    written: int
+    batches: int
+    dropped: int  # entries lost because the buffer was full
+    failed: int
+
+# Emergency Matching Schemas
+class EmergencyMatchRequest(BaseModel):
+    recipient_blood_type: BloodType
+    units_needed: int = Field(1, ge=1, le=50)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    city: Optional[str] = None
+    state: Optional[str] = None
+    radius_km: float = Field(25.0, gt=0, le=200)
+    limit: Optional[int] = Field(None, ge=1, le=500)
+
+class DonorMatch(BaseModel):
+    donor_id: int
+    full_name: str
+    phone: Optional[str] = None
+    blood_type: BloodType
+    city: Optional[str] = None
+    state: Optional[str] = None
+    distance_km: Optional[float] = None
+    exact_match: bool
+    last_donation_date: Optional[date] = None
+
+class EmergencyMatchResponse(BaseModel):
+    recipient_blood_type: BloodType
+    units_needed: int
+    candidates: List[DonorMatch]
+    search_ms: float
@@ -0,0 +1,107 @@
+"""
+Fast serialization for list endpoints.
+
+List endpoints used to load ORM objects and let FastAPI validate every row
+against the ``response_model`` before JSON-encoding it with the stdlib encoder.
+Rows read from our own database are trusted, so the fast path selects only the
+columns the response needs (plain row tuples, no identity map), turns them into
+dicts and encodes them with orjson. Returning a ``Response`` skips FastAPI's
+revalidation; ``response_model`` stays on the route for the OpenAPI docs.
+
+GET endpoints take a ``fields=`` parameter (sparse fieldsets): the response
+columns are narrowed to the requested ones before the query is built, so the
+others are neither selected from the database nor encoded.
+
+Batch-get endpoints (``/batch?ids=1,2,3``) resolve several ids with one
+``IN (...)`` query and answer with the rows in request order plus the ids that
+were not found.
+"""
+from typing import Iterable, List, Optional
+from fastapi import HTTPException, status
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from app.config import settings
+
+
+def response_columns(model, schema: type[BaseModel]) -> List:
+    """Columns of ``model`` that appear as fields of ``schema``, in table order."""
+    fields = schema.model_fields
+    return [getattr(model, attr.key) for attr in model.__mapper__.column_attrs if attr.key in fields]
+
+
+def select_fields(columns: List, fields: Optional[str]) -> List:
+    """``columns`` narrowed to the comma-separated names in ``fields`` (all of them when empty), in their own order.
+
+    Unknown names are a 400 listing the available ones.
+    """
+    wanted = {name.strip() for name in (fields or "").split(",") if name.strip()}
+    if not wanted:
+        return columns
+    available = [column.key for column in columns]
+    unknown = wanted.difference(available)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(available)}"
+        )
+    return [column for column in columns if column.key in wanted]
+
+
+def pick_fields(values: dict, columns: List) -> dict:
+    """The entries of an already loaded ``values`` dict named by ``columns``."""
+    return {column.key: values[column.key] for column in columns}
+
+
+def rows_to_dicts(rows: Iterable) -> list:
+    """Convert ``Query``/``Result`` rows selected by column into plain dicts."""
+    return [row._asdict() for row in rows]
+
+
+def rows_response(rows: Iterable, status_code: int = 200) -> ORJSONResponse:
+    """JSON response for column rows, encoded with orjson without revalidation."""
+    return ORJSONResponse(rows_to_dicts(rows), status_code=status_code)
+
+
+def row_response(row, status_code: int = 200) -> ORJSONResponse:
+    """JSON response for one column row (or dict), encoded like ``rows_response``."""
+    return ORJSONResponse(row if isinstance(row, dict) else row._asdict(), status_code=status_code)
+
+
+def parse_ids(ids: str) -> List[int]:
+    """Distinct ids of an ``ids=1,2,3`` parameter, in request order.
+
+    A 400 when an id is not an integer, or when there are none or more than ``BATCH_MAX_IDS``.
+    """
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be comma-separated integers"
+        )
+    unique = list(dict.fromkeys(parsed))
+    if not unique or len(unique) > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Give between 1 and {settings.BATCH_MAX_IDS} ids"
+        )
+    return unique
+
+
+def with_id(columns: List, id_column) -> List:
+    """``columns`` with ``id_column`` in front unless it is already among them (batch rows are matched by id)."""
+    if any(column.key == id_column.key for column in columns):
+        return columns
+    return [id_column, *columns]
+
+
+def batch_response(rows: Iterable, ids: List[int], forbidden: Iterable[int] = ()) -> ORJSONResponse:
+    """Batch-get body: the rows (dicts or column rows) in the order of ``ids``, the ids not found and the ``forbidden`` ones."""
+    found = {row["id"]: row for row in (row if isinstance(row, dict) else row._asdict() for row in rows)}
+    forbidden = set(forbidden)
+    return ORJSONResponse({
+        "items": [found[id_] for id_ in ids if id_ in found],
+        "missing": [id_ for id_ in ids if id_ not in found and id_ not in forbidden],
+        "forbidden": [id_ for id_ in ids if id_ in forbidden],
+    })
@@ -0,0 +1,228 @@
+"""
+Inter-bank transfer plans.
+
+Against its target level each (bank, blood type) is short, in surplus or
+balanced. ``plan_transfers`` moves surplus units to the shortages at the
+lowest total distance (units x km), as a min-cost flow over
+
+    surplus (bank, type) -> shortage (bank, type)
+
+A shortage takes its own type or, with substitutions allowed, a red-cell
+compatible one (``COMPATIBLE_DONORS``) at an extra ``SUBSTITUTION_PENALTY_KM``
+per unit, so exact matches win unless the substitute is much closer. Each
+shortage is only linked to the ``neighbours`` nearest banks within
+``radius_km`` that have a surplus of each compatible type, which keeps the
+graph at a few dozen edges per shortage however many banks there are.
+"""
+import heapq
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.matching import COMPATIBLE_DONORS, haversine_km
+from app.models import BloodType
+
+SUBSTITUTION_PENALTY_KM = 25.0
+# Edge costs are integers (tenths of a km) so path lengths compare exactly
+_COST_SCALE = 10
+
+Key = Tuple[int, BloodType]
+
+
+class MinCostFlow:
+    """Min-cost flow from supply nodes to demand nodes (all edge costs non-negative).
+
+    Successive shortest paths: every augmentation follows the cheapest
+    residual path from any node with supply left to any node with demand
+    left, as with a super source and sink. Paths are found by a Dijkstra
+    search on reduced costs that runs backwards from one demand node and
+    stops at the first supply node, so it only touches that node's
+    neighbourhood. Shortest path lengths never decrease, so demand nodes wait
+    in a heap keyed by their last known length and are searched again only
+    when they reach the top. Supply nodes keep potential 0, which makes the
+    lengths found from different demand nodes comparable.
+
+    Edges are stored in flat lists; edge ``e ^ 1`` is the reverse of edge ``e``.
+    """
+
+    def __init__(self, supply: List[int], demand: List[int]):
+        self.supply = list(supply)
+        self.demand = list(demand)
+        self.adjacent: List[List[int]] = [[] for _ in supply]
+        self.to: List[int] = []
+        self.capacity: List[int] = []
+        self.cost: List[int] = []
+
+    def add_edge(self, u: int, v: int, capacity: int, cost: int) -> int:
+        """Add an edge; returns its id (for reading the flow afterwards)."""
+        edge = len(self.to)
+        self.to += [v, u]
+        self.capacity += [capacity, 0]
+        self.cost += [cost, -cost]
+        self.adjacent[u].append(edge)
+        self.adjacent[v].append(edge + 1)
+        return edge
+
+    def flow_on(self, edge: int) -> int:
+        return self.capacity[edge ^ 1]
+
+    def _search(self, target: int, potential: List[int]):
+        """Nearest node with supply left, searching backwards from ``target``.
+
+        Returns (node, reduced length, settled node -> length, next edge per node), or None.
+        """
+        to, capacity, cost, adjacent, supply = self.to, self.capacity, self.cost, self.adjacent, self.supply
+        distance = {target: 0}
+        settled: Dict[int, int] = {}
+        next_edge: Dict[int, int] = {}
+        heap = [(0, target)]
+        # Length of the nearest supply node seen so far; nothing longer needs exploring
+        limit = float("inf")
+        while heap:
+            d, v = heapq.heappop(heap)
+            if v in settled:
+                continue
+            settled[v] = d
+            if supply[v] > 0:
+                return v, d, settled, next_edge
+            base = potential[v]
+            for edge in adjacent[v]:
+                arc = edge ^ 1  # residual arc u -> v
+                if capacity[arc]:
+                    u = to[edge]
+                    if u in settled:
+                        continue
+                    nd = d + cost[arc] + potential[u] - base
+                    if nd < limit and nd < distance.get(u, limit):
+                        distance[u] = nd
+                        next_edge[u] = arc
+                        heapq.heappush(heap, (nd, u))
+                        if supply[u] > 0:
+                            limit = nd
+        return None
+
+    def solve(self) -> int:
+        """Route as much demand as possible at minimum cost; returns the cost."""
+        to, capacity, cost = self.to, self.capacity, self.cost
+        potential = [0] * len(self.adjacent)
+        waiting = [(0, node) for node, units in enumerate(self.demand) if units > 0]
+        heapq.heapify(waiting)
+        total_cost = 0
+        while waiting:
+            _, target = heapq.heappop(waiting)
+            found = self._search(target, potential)
+            if found is None:
+                # No supply can reach it, now or after later augmentations
+                continue
+            source, reduced, settled, next_edge = found
+            length = reduced + potential[target]
+            if waiting and length > waiting[0][0]:
+                heapq.heappush(waiting, (length, target))
+                continue
+
+            for node, d in settled.items():
+                potential[node] += reduced - d
+            push, node = min(self.supply[source], self.demand[target]), source
+            while node != target:
+                arc = next_edge[node]
+                push = min(push, capacity[arc])
+                node = to[arc]
+            node = source
+            while node != target:
+                arc = next_edge[node]
+                capacity[arc] -= push
+                capacity[arc ^ 1] += push
+                total_cost += push * cost[arc]
+                node = to[arc]
+            self.supply[source] -= push
+            self.demand[target] -= push
+            if self.demand[target]:
+                heapq.heappush(waiting, (length, target))
+        return total_cost
+
+
+def plan_transfers(
+    stock: Dict[Key, int],
+    targets: Dict[Key, int],
+    coordinates: Dict[int, Tuple[float, float]],
+    radius_km: float = 100.0,
+    neighbours: int = 8,
+    allow_substitutions: bool = True,
+) -> dict:
+    """Minimal-distance transfers from surpluses to shortages.
+
+    ``targets`` decides which (bank, type) pairs take part: stock above the
+    target is surplus, below it a shortage; pairs without a target are left
+    alone. Banks need coordinates to send or receive. Returns ``transfers``
+    and the ``unmet`` shortages.
+    """
+    surplus = {key: stock.get(key, 0) - target for key, target in targets.items()
+               if stock.get(key, 0) > target and key[0] in coordinates}
+    shortages = {key: target - stock.get(key, 0) for key, target in targets.items() if target > stock.get(key, 0)}
+
+    # Distances between all banks taking part, then per blood type each
+    # bank's ``neighbours`` nearest banks with a surplus of that type
+    located = sorted({bank for bank, _ in shortages if bank in coordinates} | {bank for bank, _ in surplus})
+    row = {bank: index for index, bank in enumerate(located)}
+    lat = np.array([coordinates[bank][0] for bank in located], dtype=float)
+    lon = np.array([coordinates[bank][1] for bank in located], dtype=float)
+    distances = haversine_km(lat[:, None], lon[:, None], lat, lon)
+    np.fill_diagonal(distances, np.inf)
+
+    nearest: Dict[BloodType, tuple] = {}
+    for blood_type in BloodType:
+        keys = [key for key in surplus if key[1] == blood_type]
+        if keys:
+            block = distances[:, [row[bank] for bank, _ in keys]]
+            count = min(neighbours, len(keys))
+            order = np.argpartition(block, count - 1, axis=1)[:, :count]
+            nearest[blood_type] = (keys, order.tolist(), np.take_along_axis(block, order, axis=1).tolist())
+
+    node = {key: index for index, key in enumerate(list(surplus) + list(shortages))}
+    graph = MinCostFlow(
+        list(surplus.values()) + [0] * len(shortages),
+        [0] * len(surplus) + list(shortages.values()),
+    )
+
+    transfer_edges = []
+    for (bank, needed_type), need in shortages.items():
+        if bank not in row:
+            continue
+        donor_types = COMPATIBLE_DONORS[needed_type] if allow_substitutions else [needed_type]
+        for donor_type in donor_types:
+            if donor_type not in nearest:
+                continue
+            keys, order, km = nearest[donor_type]
+            penalty = 0.0 if donor_type == needed_type else SUBSTITUTION_PENALTY_KM
+            for index, distance in zip(order[row[bank]], km[row[bank]]):
+                if distance > radius_km:
+                    continue
+                supply_key = keys[index]
+                edge = graph.add_edge(
+                    node[supply_key], node[(bank, needed_type)],
+                    min(surplus[supply_key], need), round((distance + penalty) * _COST_SCALE),
+                )
+                transfer_edges.append((edge, supply_key, (bank, needed_type), distance))
+
+    graph.solve()
+
+    transfers = []
+    for edge, (from_bank, sent_type), (to_bank, needed_type), km in transfer_edges:
+        units = graph.flow_on(edge)
+        if units:
+            transfers.append({
+                "from_bank_id": from_bank,
+                "to_bank_id": to_bank,
+                "blood_type": sent_type,
+                "for_blood_type": needed_type,
+                "units": units,
+                "distance_km": round(km, 1),
+            })
+    transfers.sort(key=lambda t: (t["to_bank_id"], t["for_blood_type"].value, t["distance_km"]))
+
+    unmet = [
+        {"blood_bank_id": bank, "blood_type": blood_type, "units": graph.demand[node[(bank, blood_type)]]}
+        for bank, blood_type in shortages
+        if graph.demand[node[(bank, blood_type)]]
+    ]
+    return {"transfers": transfers, "unmet": unmet}
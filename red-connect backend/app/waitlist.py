@@ -0,0 +1,118 @@
+"""
+Event registrations and the per-event FIFO waitlist.
+
+``event_registrations`` holds one row per donor and event: REGISTERED rows are
+the confirmed places counted by ``Event.registered_participants`` and
+WAITLISTED rows are the queue, in id order. Joining the queue is one insert
+and the head of the queue is read from the ``(event_id, status, id)`` index,
+so both are O(log n) in the number of registrations. A donor's position is
+the exception (see ``waitlist_position``).
+
+Every change locks the event row first (``SELECT ... FOR UPDATE``), which
+serializes registrations, cancellations and capacity changes per event: a
+burst of registrations cannot overfill an event, and a freed place goes to
+exactly one waitlisted donor. Promotions, the participant count and the
+donors' "you have a place" notifications are written in the caller's
+transaction, so they are committed together or not at all.
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Event, EventRegistration, NotificationChannel, RegistrationStatus
+from app.notifications import queue_promotion_notifications
+
+
+def lock_event(db: Session, event_id: int) -> Optional[Event]:
+    """Load the event with a row lock held until the transaction ends."""
+    return db.query(Event).filter(Event.id == event_id).with_for_update().first()
+
+
+def free_places(event: Event) -> Optional[int]:
+    """Places left, or None when the event has no capacity limit (unset or 0)."""
+    if not event.max_participants:
+        return None
+    return max(event.max_participants - (event.registered_participants or 0), 0)
+
+
+def waitlist_position(db: Session, registration: EventRegistration) -> int:
+    """1-based position of a waitlisted registration in its event's queue.
+
+    Counts the index range ahead of the registration, which is O(position),
+    not O(log n): donors leave from the middle of the queue, so a stored rank
+    would have to be rewritten behind every cancellation. It runs only when a
+    donor joins or asks for their registration, never under promotion.
+    """
+    ahead = db.query(func.count(EventRegistration.id)).filter(
+        EventRegistration.event_id == registration.event_id,
+        EventRegistration.status == RegistrationStatus.WAITLISTED,
+        EventRegistration.id < registration.id,
+    ).scalar()
+    return ahead + 1
+
+
+def register(db: Session, event: Event, donor_id: int) -> EventRegistration:
+    """Take a place on the (locked) event, or join the end of its waitlist when it is full."""
+    # Free places are always handed to the waitlist first, so a free place means nobody is queued
+    places = free_places(event)
+    if places is None or places > 0:
+        registration = EventRegistration(event_id=event.id, donor_id=donor_id, status=RegistrationStatus.REGISTERED)
+        event.registered_participants = (event.registered_participants or 0) + 1
+    else:
+        registration = EventRegistration(event_id=event.id, donor_id=donor_id, status=RegistrationStatus.WAITLISTED)
+    db.add(registration)
+    db.flush()
+    return registration
+
+
+def cancel(db: Session, event: Event, registration: EventRegistration) -> List[int]:
+    """Remove a registration from the (locked) event; returns the donors promoted into the freed place."""
+    db.delete(registration)
+    if registration.status != RegistrationStatus.REGISTERED:
+        return []
+    event.registered_participants = max((event.registered_participants or 0) - 1, 0)
+    db.flush()
+    return promote(db, event)
+
+
+def promote(db: Session, event: Event) -> List[int]:
+    """Move donors from the head of the (locked) event's waitlist into its free places.
+
+    Queues their notifications in the same transaction; returns the promoted donor ids.
+    """
+    places = free_places(event)
+    if places == 0:
+        return []
+    head = db.query(EventRegistration.id, EventRegistration.donor_id).filter(
+        EventRegistration.event_id == event.id,
+        EventRegistration.status == RegistrationStatus.WAITLISTED,
+    ).order_by(EventRegistration.id)
+    if places is not None:
+        head = head.limit(places)
+    rows = head.all()
+    if not rows:
+        return []
+
+    db.query(EventRegistration).filter(EventRegistration.id.in_([row.id for row in rows])).update({
+        EventRegistration.status: RegistrationStatus.REGISTERED,
+        EventRegistration.promoted_at: datetime.utcnow(),
+    }, synchronize_session=False)
+    event.registered_participants = (event.registered_participants or 0) + len(rows)
+    donor_ids = [row.donor_id for row in rows]
+    queue_promotion_notifications(db, event, donor_ids, promotion_channels())
+    return donor_ids
+
+
+def promotion_channels() -> List[NotificationChannel]:
+    return [NotificationChannel(channel.strip()) for channel in settings.WAITLIST_NOTIFY_CHANNELS.split(",") if channel.strip()]
+
+
+def find_registration(db: Session, event_id: int, donor_id: int) -> Optional[EventRegistration]:
+    return db.query(EventRegistration).filter(
+        EventRegistration.event_id == event_id,
+        EventRegistration.donor_id == donor_id,
+    ).first()
+
@@ -0,0 +1,165 @@
+"""
+Per-request latency of the old synchronous logging versus the queued pipeline.
+
+Runs each mode in a subprocess (logging configuration is process-wide), logs
+in as a seeded donor, sends the same sequence of requests through the ASGI
+app with the TestClient and prints per-request latency percentiles. Log
+output goes to a sink that can be made slow with --sink-delay-ms, standing in
+for a terminal, a pipe to a log shipper or a container runtime under load.
+
+    sync+echo    logging.basicConfig and engine echo=True (the old setup)
+    sync         logging.basicConfig, no SQL echo
+    queue        configure_logging(): JSON records written by a listener thread
+    queue+echo   the same, with DB_ECHO=True
+
+    python benchmarks/bench_logging.py --requests 2000 --sink-delay-ms 0.2
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "sync+echo": {"DB_ECHO": "False"},
+    "sync": {"DB_ECHO": "False"},
+    "queue": {"DB_ECHO": "False"},
+    "queue+echo": {"DB_ECHO": "True"},
+}
+
+DEFAULT_PATHS = ["/api/events/upcoming?limit=10", "/api/donors/me", "/api/blood-banks/?limit=10"]
+
+
+class SlowSink:
+    """A text stream that waits ``delay`` seconds on every write."""
+
+    def __init__(self, stream, delay: float):
+        self.stream = stream
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        self.writes += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+def run_mode(mode: str, args) -> dict:
+    """Child process: configure logging for ``mode`` and time the requests."""
+    sink = SlowSink(open(args.sink, "w"), args.sink_delay_ms / 1000)
+    sys.stdout = sys.stderr = sink
+    sys.path.insert(0, BACKEND_DIR)
+
+    import logging
+
+    from fastapi.testclient import TestClient
+
+    from app import logging_config
+    from app.database import engine
+    from main import app
+
+    if mode.startswith("sync"):
+        # Undo configure_logging() and restore the setup it replaced
+        logging_config.stop_logging()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.NOTSET)
+        logging.basicConfig(level=logging.INFO)
+        if mode == "sync+echo":
+            engine.echo = True
+
+    latencies = []
+    with TestClient(app) as client:
+        response = client.post("/api/auth/login", json={"email": args.email, "password": args.password})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        for i in range(args.warmup + args.requests):
+            path = args.paths[i % len(args.paths)]
+            started = time.perf_counter()
+            response = client.get(path, headers=headers)
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                raise RuntimeError(f"{path}: {response.status_code} {response.text[:200]}")
+            if i >= args.warmup:
+                latencies.append(elapsed)
+
+    # Whatever the listener has not written yet is work the requests did not wait for
+    started = time.perf_counter()
+    logging_config.stop_logging()
+    drain = time.perf_counter() - started
+    return {
+        "latencies": latencies,
+        "drain": drain,
+        "writes": sink.writes,
+        "dropped": logging_config.dropped_records(),
+    }
+
+
+def spawn(mode: str, args) -> dict:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as result:
+        result_path = result.name
+    try:
+        command = [
+            sys.executable, os.path.abspath(__file__), "--child", mode, "--result", result_path,
+            "--requests", str(args.requests), "--warmup", str(args.warmup),
+            "--sink", args.sink, "--sink-delay-ms", str(args.sink_delay_ms),
+            "--email", args.email, "--password", args.password, "--paths", *args.paths,
+        ]
+        env = {**os.environ, "NOTIFY_DISPATCHER_ENABLED": "False", "LOG_QUEUE_SIZE": str(args.queue_size),
+               **MODES[mode]}
+        subprocess.run(command, cwd=BACKEND_DIR, env=env, check=True)
+        with open(result_path) as f:
+            return json.load(f)
+    finally:
+        os.unlink(result_path)
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    parser.add_argument("--sink", default=os.devnull, help="file the log output is written to")
+    parser.add_argument("--sink-delay-ms", type=float, default=0.0, help="delay added to every write to the sink")
+    parser.add_argument("--queue-size", type=int, default=10000, help="LOG_QUEUE_SIZE for the queue modes")
+    parser.add_argument("--email", default="donor1@seed.example.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--child", choices=list(MODES), help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        with open(args.result, "w") as f:
+            json.dump(run_mode(args.child, args), f)
+        return
+
+    print(f"{'mode':<12} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8} {'saved ms':>9} {'writes':>8} {'dropped':>8} {'drain s':>8}")
+    baseline = None
+    for mode in args.modes:
+        result = spawn(mode, args)
+        latencies = [seconds * 1000 for seconds in result["latencies"]]
+        mean = statistics.mean(latencies)
+        if baseline is None:
+            baseline = mean
+        print(f"{mode:<12} {mean:8.2f} {percentile(latencies, 0.5):8.2f} {percentile(latencies, 0.99):8.2f} "
+              f"{baseline - mean:9.2f} {result['writes']:8d} {result['dropped']:8d} {result['drain']:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Server CPU under a credential-stuffing burst, with and without rate limiting.
+
+Starts uvicorn once per configuration, fires failed logins at the login
+endpoints (rotating seeded emails, optionally spoofing client IPs through
+X-Forwarded-For) and reports how much CPU the server process burned.
+Linux only: CPU time is read from /proc.
+
+    python benchmarks/bench_rate_limit.py --duration 15 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOGIN_PATHS = ["/api/auth/login", "/api/auth/donor/login", "/api/auth/organizer/login"]
+
+CONFIGS = {
+    "off": {"RATE_LIMIT_ENABLED": "False"},
+    "per-ip+email": {"RATE_LIMIT_ENABLED": "True"},
+    "with-route-cap": {"RATE_LIMIT_ENABLED": "True", "RATE_LIMIT_PER_ROUTE": "1/second"},
+}
+
+
+def start_server(port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "RATE_LIMIT_TRUST_FORWARDED": "True", "NOTIFY_DISPATCHER_ENABLED": "False", **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def wait_ready(base_url: str, timeout: float = 60.0) -> None:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{base_url} did not become ready within {timeout}s")
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    # utime and stime are fields 14 and 15 of the full line
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def burst(base_url: str, duration: float, concurrency: int, donors: int, spoof_ips: bool) -> dict:
+    counts = {}
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    rng = random.Random(7)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        async def worker():
+            while time.perf_counter() < deadline:
+                email = f"donor{rng.randint(1, donors)}@seed.example.com"
+                headers = {"X-Forwarded-For": f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"} if spoof_ips else {}
+                try:
+                    response = await client.post(rng.choice(LOGIN_PATHS), json={"email": email, "password": "hunter2"}, headers=headers)
+                    counts[response.status_code] = counts.get(response.status_code, 0) + 1
+                except httpx.HTTPError:
+                    counts["error"] = counts.get("error", 0) + 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of burst per configuration")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--donors", type=int, default=20000, help="number of seeded donor emails to rotate through")
+    parser.add_argument("--spoof-ips", action="store_true", help="send a random X-Forwarded-For per request")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    print(f"{'config':<16} {'requests':>9} {'401':>7} {'429':>7} {'cpu s':>7} {'cpu %':>7}")
+    for name in args.configs:
+        process = start_server(args.port, CONFIGS[name])
+        try:
+            base_url = f"http://127.0.0.1:{args.port}"
+            wait_ready(base_url)
+            cpu_before = cpu_seconds(process.pid)
+            started = time.perf_counter()
+            counts = asyncio.run(burst(base_url, args.duration, args.concurrency, args.donors, args.spoof_ips))
+            elapsed = time.perf_counter() - started
+            cpu = cpu_seconds(process.pid) - cpu_before
+        finally:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=30)
+        total = sum(counts.values())
+        print(f"{name:<16} {total:9d} {counts.get(401, 0):7d} {counts.get(429, 0):7d} "
+              f"{cpu:7.2f} {100 * cpu / elapsed:6.0f}%")
+
+
+if __name__ == "__main__":
+    main()
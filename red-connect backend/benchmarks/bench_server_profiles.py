@@ -0,0 +1,122 @@
+"""
+Compare the development and production server profiles of run.py.
+
+Starts each profile as a subprocess, waits for /ready, drives it with a
+closed-loop HTTP load generator and prints throughput and latency percentiles.
+
+    python benchmarks/bench_server_profiles.py --duration 20 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = {
+    "dev": ["run.py"],
+    "prod": ["run.py", "--prod"],
+}
+
+DEFAULT_PATHS = ["/health", "/api/blood-banks/?limit=10", "/api/events/upcoming?limit=10"]
+
+
+def start_server(profile: str, port: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, *PROFILES[profile], "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def wait_ready(base_url: str, timeout: float = 60.0) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=1.0).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{base_url} did not become ready within {timeout}s")
+
+
+async def drive(base_url: str, paths: list, duration: float, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        async def worker(offset: int):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < deadline:
+                path = paths[i % len(paths)]
+                i += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / duration,
+        "p50_ms": pct(0.50),
+        "p99_ms": pct(0.99),
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "errors": errors,
+    }
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=40)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds of load per profile")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", action="append", dest="paths", help="request path (repeatable)")
+    args = parser.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+
+    print(f"{'profile':<8} {'boot s':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for profile in args.profiles:
+        process = start_server(profile, args.port)
+        try:
+            base_url = f"http://127.0.0.1:{args.port}"
+            boot = wait_ready(base_url)
+            # Short warm-up so both profiles are measured hot.
+            asyncio.run(drive(base_url, paths, 2.0, args.concurrency))
+            result = asyncio.run(drive(base_url, paths, args.duration, args.concurrency))
+        finally:
+            stop_server(process)
+        print(f"{profile:<8} {boot:7.2f} {result['rps']:9.0f} {result['p50_ms']:8.1f} "
+              f"{result['p99_ms']:8.1f} {result['errors']:7d}")
+
+
+if __name__ == "__main__":
+    main()
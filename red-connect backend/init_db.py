@@ -2,18 +2,34 @@
 Database initialization script.
 Run this ONLY to populate sample data.
 Tables will be automatically created when you start the server!
+
+Usage:
+    python init_db.py                  # interactive, adds a few sample rows
+    python init_db.py --yes            # same, without the prompt
+    python init_db.py --bulk --donors 200000 --donations 1000000 --seed 42
 """
-from app.database import engine, Base, SessionLocal
-from app.models import User, Donor, Organizer, BloodBank, BloodInventory, Event, Donation
+import argparse
+import random
+import sys
+import time
+from app.database import engine, SessionLocal
+from app import migrations
+from app.models import (
+    User, Donor, Organizer, BloodBank, BloodInventory, BloodBatch, Event, Donation, Certificate,
+    UserRole, BloodType, BankCategory, EventStatus, DonationStatus, CertificateStatus,
+    BatchStatus, BloodComponent
+)
+from app.inventory import SHELF_LIFE_DAYS, expiry_date
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
 from app.auth import get_password_hash
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 
 def create_tables():
-    """Create all database tables (Note: This is now done automatically on server startup)."""
+    """Apply schema migrations (Note: This is now done automatically on server startup)."""
     print("Creating database tables...")
     try:
-        Base.metadata.create_all(bind=engine)
+        migrations.upgrade(engine)
         print("✅ Tables created successfully!")
     except Exception as e:
         print(f"❌ Error creating tables: {e}")
@@ -192,43 +208,500 @@ def create_sample_user(db: Session):
         db.commit()
         print("✅ Sample organizer created (email: organizer@example.com, password: password123)")
 
+# ---------------------------------------------------------------------------
+# Bulk synthetic data (benchmark datasets)
+# ---------------------------------------------------------------------------
+
+# (state, relative population, [(city, relative population, latitude, longitude)])
+STATE_CITIES = [
+    ("Uttar Pradesh", 200, [("Lucknow", 36, 26.85, 80.95), ("Kanpur", 30, 26.45, 80.33), ("Agra", 18, 27.18, 78.01), ("Varanasi", 15, 25.32, 82.97), ("Prayagraj", 13, 25.44, 81.85)]),
+    ("Maharashtra", 112, [("Mumbai", 124, 19.08, 72.88), ("Pune", 31, 18.52, 73.86), ("Nagpur", 25, 21.15, 79.09), ("Nashik", 15, 20.00, 73.79), ("Aurangabad", 12, 19.88, 75.34)]),
+    ("Bihar", 104, [("Patna", 20, 25.59, 85.14), ("Gaya", 5, 24.80, 85.00), ("Bhagalpur", 4, 25.24, 86.97), ("Muzaffarpur", 4, 26.12, 85.39)]),
+    ("West Bengal", 91, [("Kolkata", 45, 22.57, 88.36), ("Howrah", 11, 22.59, 88.26), ("Durgapur", 6, 23.52, 87.31), ("Siliguri", 5, 26.73, 88.40)]),
+    ("Madhya Pradesh", 73, [("Indore", 20, 22.72, 75.86), ("Bhopal", 18, 23.26, 77.41), ("Jabalpur", 13, 23.18, 79.99), ("Gwalior", 11, 26.22, 78.18)]),
+    ("Tamil Nadu", 72, [("Chennai", 71, 13.08, 80.27), ("Coimbatore", 16, 11.02, 76.96), ("Madurai", 15, 9.93, 78.12), ("Tiruchirappalli", 9, 10.79, 78.70)]),
+    ("Rajasthan", 69, [("Jaipur", 31, 26.91, 75.79), ("Jodhpur", 11, 26.24, 73.02), ("Kota", 10, 25.21, 75.86), ("Udaipur", 5, 24.59, 73.71)]),
+    ("Karnataka", 61, [("Bangalore", 84, 12.97, 77.59), ("Mysore", 9, 12.30, 76.64), ("Hubli", 9, 15.36, 75.12), ("Mangalore", 6, 12.91, 74.86)]),
+    ("Gujarat", 60, [("Ahmedabad", 56, 23.02, 72.57), ("Surat", 45, 21.17, 72.83), ("Vadodara", 17, 22.31, 73.18), ("Rajkot", 13, 22.30, 70.80)]),
+    ("Andhra Pradesh", 49, [("Visakhapatnam", 17, 17.69, 83.22), ("Vijayawada", 10, 16.51, 80.65), ("Guntur", 7, 16.31, 80.44)]),
+    ("Odisha", 42, [("Bhubaneswar", 8, 20.30, 85.82), ("Cuttack", 6, 20.46, 85.88), ("Rourkela", 5, 22.26, 84.85)]),
+    ("Telangana", 35, [("Hyderabad", 68, 17.39, 78.49), ("Warangal", 7, 17.97, 79.59), ("Khammam", 3, 17.25, 80.15)]),
+    ("Kerala", 33, [("Kochi", 21, 9.93, 76.27), ("Thiruvananthapuram", 17, 8.52, 76.94), ("Kozhikode", 20, 11.26, 75.78), ("Kottayam", 4, 9.59, 76.52)]),
+    ("Punjab", 28, [("Ludhiana", 16, 30.90, 75.86), ("Amritsar", 12, 31.63, 74.87), ("Jalandhar", 9, 31.33, 75.58)]),
+    ("Delhi", 17, [("Delhi", 1, 28.61, 77.21)]),
+    ("Jammu and Kashmir", 13, [("Srinagar", 12, 34.08, 74.80), ("Jammu", 6, 32.73, 74.86)]),
+    ("Mizoram", 1, [("Aizawl", 1, 23.73, 92.72)]),
+]
+
+# Approximate ABO/Rh distribution of the Indian population (percent).
+BLOOD_TYPE_WEIGHTS = [
+    (BloodType.O_POSITIVE, 37.1), (BloodType.B_POSITIVE, 32.1), (BloodType.A_POSITIVE, 22.9),
+    (BloodType.AB_POSITIVE, 6.4), (BloodType.O_NEGATIVE, 0.8), (BloodType.B_NEGATIVE, 0.6),
+    (BloodType.A_NEGATIVE, 0.5), (BloodType.AB_NEGATIVE, 0.2),
+]
+
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Vihaan", "Arjun", "Sai", "Reyansh", "Ayaan", "Krishna", "Ishaan",
+               "Ananya", "Diya", "Aadhya", "Saanvi", "Myra", "Pari", "Anika", "Navya", "Kavya", "Meera",
+               "Rahul", "Priya", "Amit", "Neha", "Suresh", "Lakshmi", "Ravi", "Pooja", "Vikram", "Sneha"]
+LAST_NAMES = ["Sharma", "Verma", "Patel", "Reddy", "Nair", "Iyer", "Gupta", "Singh", "Kumar", "Das",
+              "Banerjee", "Mukherjee", "Rao", "Joshi", "Kulkarni", "Menon", "Pillai", "Chopra", "Mehta", "Shah"]
+ORG_SUFFIXES = ["Blood Donors Forum", "Seva Samiti", "Rotary Club", "Youth Foundation", "Red Cross Unit", "Lions Club"]
+OPERATING_HOURS = ["24/7", "9 AM - 6 PM", "8 AM - 8 PM", "10 AM - 6 PM", "7 AM - 10 PM"]
+
+SEED_PASSWORD = "password123"
+
+
+class BulkSeeder:
+    """Generates a deterministic synthetic dataset with batched Core inserts.
+
+    Rows get explicit primary keys (continuing after the current MAX(id)), so
+    child rows can reference parents without reading generated ids back, and
+    donor counters are computed while generating donations instead of being
+    updated afterwards.
+    """
+
+    def __init__(self, bind, seed: int = 42, batch_size: int = 5000, years: int = 3):
+        self.bind = bind
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.years = years
+        self.today = date.today()
+        # bcrypt is deliberately slow; every synthetic account shares one hash.
+        self.password_hash = get_password_hash(SEED_PASSWORD)
+
+        self._states = [s for s, _, _ in STATE_CITIES]
+        self._state_weights = [w for _, w, _ in STATE_CITIES]
+        self._cities = {s: cities for s, _, cities in STATE_CITIES}
+        self._blood_types = [t for t, _ in BLOOD_TYPE_WEIGHTS]
+        self._blood_type_weights = [w for _, w in BLOOD_TYPE_WEIGHTS]
+
+        self.event_ids = []
+        self.event_dates = {}
+
+    # -- helpers -----------------------------------------------------------
+
+    def _next_id(self, model) -> int:
+        with self.bind.connect() as conn:
+            return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+    def _insert(self, conn, model, rows):
+        if rows:
+            conn.execute(insert(model.__table__), rows)
+
+    def _insert_batched(self, model, rows_iter, label: str) -> int:
+        """Insert rows from an iterator, committing every ``batch_size`` rows."""
+        started = time.perf_counter()
+        count = 0
+        batch = []
+        for row in rows_iter:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                with self.bind.begin() as conn:
+                    self._insert(conn, model, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            with self.bind.begin() as conn:
+                self._insert(conn, model, batch)
+            count += len(batch)
+        _report(label, count, started)
+        return count
+
+    def _location(self):
+        state = self.rng.choices(self._states, self._state_weights)[0]
+        cities = self._cities[state]
+        city, _, lat, lon = self.rng.choices(cities, [c[1] for c in cities])[0]
+        return state, city, lat + self.rng.uniform(-0.15, 0.15), lon + self.rng.uniform(-0.15, 0.15)
+
+    def _person_name(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def _phone(self) -> str:
+        return f"+91{self.rng.randint(6000000000, 9999999999)}"
+
+    def _pincode(self) -> str:
+        return f"{self.rng.randint(110001, 855117)}"
+
+    def _past_date(self) -> date:
+        return self.today - timedelta(days=self.rng.randint(0, self.years * 365))
+
+    # -- generators --------------------------------------------------------
+
+    def seed_blood_banks(self, count: int) -> int:
+        if count <= 0:
+            return 0
+        first_id = self._next_id(BloodBank)
+        now = datetime.utcnow()
+
+        def banks():
+            for bank_id in range(first_id, first_id + count):
+                state, city, lat, lon = self._location()
+                types = self.rng.sample(self._blood_types, self.rng.randint(3, 8))
+                yield {
+                    "id": bank_id,
+                    "name": f"{self.rng.choice(LAST_NAMES)} {city} Blood Bank {bank_id}",
+                    "address": f"{self.rng.randint(1, 400)}, {self.rng.choice(LAST_NAMES)} Marg, {city}",
+                    "phone": self._phone(),
+                    "email": f"bank{bank_id}@seed.example.com",
+                    "category": self.rng.choices([BankCategory.GOVERNMENT, BankCategory.PRIVATE], [55, 45])[0],
+                    "city": city,
+                    "state": state,
+                    "pincode": self._pincode(),
+                    "available_blood_types": ", ".join(t.value for t in types),
+                    "operating_hours": self.rng.choice(OPERATING_HOURS),
+                    "latitude": round(lat, 6),
+                    "longitude": round(lon, 6),
+                    "created_at": now,
+                    "updated_at": now,
+                }
+
+        inserted = self._insert_batched(BloodBank, banks(), "blood banks")
+
+        stock = [
+            (bank_id, blood_type, int(self.rng.uniform(0.2, 1.5) * weight))
+            for bank_id in range(first_id, first_id + count)
+            for blood_type, weight in BLOOD_TYPE_WEIGHTS
+        ]
+
+        def inventory():
+            for bank_id, blood_type, units in stock:
+                yield {
+                    "blood_bank_id": bank_id,
+                    "blood_type": blood_type,
+                    "units_available": units,
+                    "last_updated": now,
+                }
+
+        def batches():
+            # The totals above are what dispatches draw from, so split each one
+            # into up to three unexpired whole blood batches from recent weeks.
+            max_age = SHELF_LIFE_DAYS[BloodComponent.WHOLE_BLOOD] - 1
+            for bank_id, blood_type, units in stock:
+                if units <= 0:
+                    continue
+                cuts = sorted(self.rng.sample(range(1, units), min(units - 1, self.rng.randint(0, 2))))
+                for low, high in zip([0, *cuts], [*cuts, units]):
+                    collected_on = self.today - timedelta(days=self.rng.randint(0, max_age))
+                    yield {
+                        "blood_bank_id": bank_id,
+                        "blood_type": blood_type,
+                        "component": BloodComponent.WHOLE_BLOOD,
+                        "units_received": high - low,
+                        "units_remaining": high - low,
+                        "collected_on": collected_on,
+                        "expires_on": expiry_date(BloodComponent.WHOLE_BLOOD, collected_on),
+                        "status": BatchStatus.AVAILABLE,
+                        "received_at": now,
+                    }
+
+        self._insert_batched(BloodInventory, inventory(), "inventory rows")
+        self._insert_batched(BloodBatch, batches(), "blood batches")
+        return inserted
+
+    def seed_organizers(self, count: int) -> list:
+        if count <= 0:
+            return []
+        first_user_id = self._next_id(User)
+        first_id = self._next_id(Organizer)
+        now = datetime.utcnow()
+        ids = list(range(first_id, first_id + count))
+
+        def users():
+            for offset in range(count):
+                yield {
+                    "id": first_user_id + offset,
+                    "email": f"organizer{first_id + offset}@seed.example.com",
+                    "hashed_password": self.password_hash,
+                    "role": UserRole.ORGANIZER,
+                    "is_active": True,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+
+        def organizers():
+            for offset, organizer_id in enumerate(ids):
+                state, city, _, _ = self._location()
+                yield {
+                    "id": organizer_id,
+                    "user_id": first_user_id + offset,
+                    "organization_name": f"{city} {self.rng.choice(ORG_SUFFIXES)} {organizer_id}",
+                    "contact_person": self._person_name(),
+                    "phone": self._phone(),
+                    "address": f"{self.rng.randint(1, 400)}, {self.rng.choice(LAST_NAMES)} Nagar",
+                    "city": city,
+                    "state": state,
+                    "pincode": self._pincode(),
+                    "registration_number": f"ORG-{state[:2].upper()}-{organizer_id:06d}",
+                    "verified": self.rng.random() < 0.7,
+                }
+
+        self._insert_batched(User, users(), "organizer users")
+        self._insert_batched(Organizer, organizers(), "organizers")
+        return ids
+
+    def seed_events(self, count: int, organizer_ids: list) -> int:
+        if count <= 0 or not organizer_ids:
+            return 0
+        first_id = self._next_id(Event)
+        now = datetime.utcnow()
+
+        def events():
+            for event_id in range(first_id, first_id + count):
+                state, city, _, _ = self._location()
+                event_date = self.today + timedelta(days=self.rng.randint(-self.years * 365, 90))
+                if event_date > self.today:
+                    event_status = EventStatus.UPCOMING
+                elif event_date == self.today:
+                    event_status = EventStatus.ONGOING
+                else:
+                    event_status = EventStatus.COMPLETED if self.rng.random() < 0.95 else EventStatus.CANCELLED
+                capacity = self.rng.choice([50, 100, 150, 200, 300, 500])
+                start_hour = self.rng.randint(8, 11)
+                self.event_ids.append(event_id)
+                self.event_dates[event_id] = event_date
+                yield {
+                    "id": event_id,
+                    "organizer_id": self.rng.choice(organizer_ids),
+                    "title": f"{city} Blood Donation Camp #{event_id}",
+                    "description": "Voluntary blood donation camp. Refreshments provided to all donors.",
+                    "event_date": event_date,
+                    "start_time": f"{start_hour:02d}:00",
+                    "end_time": f"{start_hour + self.rng.randint(4, 8):02d}:00",
+                    "venue": f"{self.rng.choice(LAST_NAMES)} Community Hall, {city}",
+                    "city": city,
+                    "state": state,
+                    "max_participants": capacity,
+                    "registered_participants": self.rng.randint(0, capacity),
+                    "status": event_status,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+
+        return self._insert_batched(Event, events(), "events")
+
+    def seed_donors(self, count: int, donations: int, certificates: int) -> None:
+        """Insert donors together with their donations and certificates.
+
+        Donations are assigned to donors up front (with a long-tailed weight
+        so a few donors donate often), then donors are generated in chunks:
+        each chunk's donation rows are produced alongside it so the donor's
+        ``total_donations``/``last_donation_date`` are known at insert time.
+        """
+        if count <= 0:
+            return
+        first_user_id = self._next_id(User)
+        first_id = self._next_id(Donor)
+        donation_id = self._next_id(Donation)
+        certificate_id = self._next_id(Certificate)
+        now = datetime.utcnow()
+
+        per_donor = [0] * count
+        if donations > 0:
+            weights = [self.rng.paretovariate(2.0) for _ in range(count)]
+            for index in self.rng.choices(range(count), weights, k=donations):
+                per_donor[index] += 1
+        # Roughly 90% of donations end up completed; aim for the requested
+        # certificate count among those.
+        certificate_rate = min(1.0, certificates / (donations * 0.9)) if donations else 0.0
+
+        started = time.perf_counter()
+        totals = {"users": 0, "donors": 0, "donations": 0, "certificates": 0}
+        chunk = max(1, self.batch_size // 2)
+        for chunk_start in range(0, count, chunk):
+            users, donors, donation_rows, certificate_rows = [], [], [], []
+            for offset in range(chunk_start, min(chunk_start + chunk, count)):
+                donor_id = first_id + offset
+                user_id = first_user_id + offset
+                state, city, lat, lon = self._location()
+                blood_type = self.rng.choices(self._blood_types, self._blood_type_weights)[0]
+
+                # Walk backwards from a recent date keeping the 90-day gap.
+                dates = []
+                cursor = self.today + timedelta(days=self.rng.randint(-120, 30))
+                for _ in range(per_donor[offset]):
+                    dates.append(cursor)
+                    cursor -= timedelta(days=self.rng.randint(90, 400))
+
+                counted_dates = []
+                for donation_date in dates:
+                    if donation_date > self.today:
+                        donation_status = DonationStatus.SCHEDULED
+                    else:
+                        roll = self.rng.random()
+                        if roll < 0.93:
+                            donation_status = DonationStatus.COMPLETED
+                        elif roll < 0.98:
+                            donation_status = DonationStatus.CANCELLED
+                        else:
+                            donation_status = DonationStatus.SCHEDULED
+                    units = self.rng.choice([1.0, 1.0, 1.0, 0.5, 2.0])
+                    event_id = self.rng.choice(self.event_ids) if self.event_ids and self.rng.random() < 0.4 else None
+                    donation_rows.append({
+                        "id": donation_id,
+                        "donor_id": donor_id,
+                        "event_id": event_id,
+                        "donation_date": donation_date,
+                        "blood_type": blood_type,
+                        "units": units,
+                        "status": donation_status,
+                        "created_at": now,
+                        "updated_at": now,
+                    })
+                    if donation_status != DonationStatus.CANCELLED:
+                        counted_dates.append(donation_date)
+                    if donation_status == DonationStatus.COMPLETED:
+                        if self.rng.random() < certificate_rate:
+                            issue_date = donation_date + timedelta(days=self.rng.randint(0, 7))
+                            certificate_rows.append({
+                                "id": certificate_id,
+                                "donation_id": donation_id,
+                                "donor_id": donor_id,
+                                "certificate_number": f"CERT-{issue_date:%Y%m%d}-{certificate_id:08X}",
+                                "issue_date": issue_date,
+                                "blood_units": units,
+                                "blood_type": blood_type,
+                                "status": CertificateStatus.ISSUED,
+                                "issued_by": "Red Connect",
+                                "created_at": now,
+                                "updated_at": now,
+                            })
+                            certificate_id += 1
+                    donation_id += 1
+
+                users.append({
+                    "id": user_id,
+                    "email": f"donor{donor_id}@seed.example.com",
+                    "hashed_password": self.password_hash,
+                    "role": UserRole.DONOR,
+                    "is_active": True,
+                    "created_at": now,
+                    "updated_at": now,
+                })
+                donors.append({
+                    "id": donor_id,
+                    "user_id": user_id,
+                    "full_name": self._person_name(),
+                    "phone": self._phone(),
+                    "date_of_birth": self.today - timedelta(days=self.rng.randint(18 * 365, 60 * 365)),
+                    "blood_type": blood_type,
+                    "address": f"{self.rng.randint(1, 400)}, {self.rng.choice(LAST_NAMES)} Street",
+                    "city": city,
+                    "state": state,
+                    "pincode": self._pincode(),
+                    "latitude": round(lat, 6),
+                    "longitude": round(lon, 6),
+                    # Same bookkeeping as create_donation: every non-cancelled donation counts.
+                    "last_donation_date": max(counted_dates) if counted_dates else None,
+                    "total_donations": len(counted_dates),
+                    "weight": round(self.rng.uniform(50, 95), 1),
+                    "emergency_contact": self._phone(),
+                })
+
+            with self.bind.begin() as conn:
+                for model, rows in ((User, users), (Donor, donors), (Donation, donation_rows), (Certificate, certificate_rows)):
+                    for start in range(0, len(rows), self.batch_size):
+                        self._insert(conn, model, rows[start:start + self.batch_size])
+            totals["users"] += len(users)
+            totals["donors"] += len(donors)
+            totals["donations"] += len(donation_rows)
+            totals["certificates"] += len(certificate_rows)
+
+        for label in ("donors", "donations", "certificates"):
+            _report(label, totals[label], started)
+
+
+def _report(label: str, count: int, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    print(f"  ✅ {count:>10,} {label:<16} in {elapsed:7.1f}s ({rate:,.0f} rows/s)")
+
+
+def seed_bulk(args) -> None:
+    """Generate a synthetic dataset of the requested size."""
+    print("🏥 Red Connect - Bulk Synthetic Data Generator\n")
+    print(f"Seed: {args.seed}, batch size: {args.batch_size}")
+    if not create_tables():
+        sys.exit(1)
+
+    # Statement logging would print every batch of parameters.
+    engine.echo = False
+    seeder = BulkSeeder(engine, seed=args.seed, batch_size=args.batch_size, years=args.years)
+    started = time.perf_counter()
+    seeder.seed_blood_banks(args.banks)
+    organizer_ids = seeder.seed_organizers(args.organizers)
+    seeder.seed_events(args.events, organizer_ids)
+    seeder.seed_donors(args.donors, args.donations, args.certificates)
+    print(f"\n✅ Done in {time.perf_counter() - started:.1f}s")
+    print(f"All synthetic accounts use the password: {SEED_PASSWORD}")
+
+
+def populate_sample_data() -> None:
+    """Create tables and add the small hand-written sample dataset."""
+    # Try to create tables first (in case server hasn't been started yet)
+    print("\nChecking database connection...")
+    if not create_tables():
+        print("\n❌ Cannot connect to database. Please:")
+        print("  1. Make sure MySQL is running")
+        print("  2. Check your .env file has correct credentials")
+        print("  3. Run: CREATE DATABASE red_connect;")
+        return
+
+    db = SessionLocal()
+    try:
+        populate_sample_blood_banks(db)
+        create_sample_user(db)
+        print("\n" + "=" * 50)
+        print("✅ Sample data added successfully!")
+        print("\nSample Login Credentials:")
+        print("  Donor: donor@example.com / password123")
+        print("  Organizer: organizer@example.com / password123")
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Populate the Red Connect database with sample data.")
+    parser.add_argument("-y", "--yes", action="store_true", help="add the small sample dataset without prompting")
+    bulk = parser.add_argument_group("bulk synthetic data")
+    bulk.add_argument("--bulk", action="store_true", help="generate a large synthetic dataset (non-interactive)")
+    bulk.add_argument("--banks", type=int, default=500)
+    bulk.add_argument("--organizers", type=int, default=1000)
+    bulk.add_argument("--events", type=int, default=20000)
+    bulk.add_argument("--donors", type=int, default=100000)
+    bulk.add_argument("--donations", type=int, default=250000)
+    bulk.add_argument("--certificates", type=int, default=200000)
+    bulk.add_argument("--seed", type=int, default=42, help="RNG seed; the same seed yields the same dataset")
+    bulk.add_argument("--years", type=int, default=3, help="years of donation/event history to generate")
+    bulk.add_argument("--batch-size", type=int, default=5000, help="rows per INSERT batch")
+    return parser.parse_args(argv)
+
+
 def main():
     """Main initialization function."""
+    args = parse_args()
+    if args.bulk:
+        seed_bulk(args)
+        return
+
     print("🏥 Red Connect - Database Sample Data Populator\n")
     print("=" * 50)
     print("\n📌 NOTE: Database tables will be automatically created when you start the server!")
     print("This script is only for adding sample/test data.\n")
-    
+
     # Ask if user wants to populate sample data
-    populate = input("Do you want to populate sample data? (yes/no): ").lower().strip()
-    
+    if args.yes:
+        populate = "yes"
+    else:
+        populate = input("Do you want to populate sample data? (yes/no): ").lower().strip()
+
     if populate in ['yes', 'y']:
-        # Try to create tables first (in case server hasn't been started yet)
-        print("\nChecking database connection...")
-        if not create_tables():
-            print("\n❌ Cannot connect to database. Please:")
-            print("  1. Make sure MySQL is running")
-            print("  2. Check your .env file has correct credentials")
-            print("  3. Run: CREATE DATABASE red_connect;")
-            return
-        
-        db = SessionLocal()
-        try:
-            populate_sample_blood_banks(db)
-            create_sample_user(db)
-            print("\n" + "=" * 50)
-            print("✅ Sample data added successfully!")
-            print("\nSample Login Credentials:")
-            print("  Donor: donor@example.com / password123")
-            print("  Organizer: organizer@example.com / password123")
-        except Exception as e:
-            print(f"\n❌ Error: {e}")
-            db.rollback()
-        finally:
-            db.close()
+        populate_sample_data()
     else:
         print("\n✅ No sample data added.")
-    
+
     print("\n" + "=" * 50)
     print("To start the server, run:")
     print("  uvicorn main:app --reload")
@@ -237,4 +710,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -1,13 +1,44 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-from app.database import engine
-from app.models import Base
-from app.routers import auth, donors, organizers, blood_banks, donations, events, certificates
+from fastapi.responses import JSONResponse, Response
+from app.config import settings
+from app.database import engine, SessionLocal, warm_pool, replica_router, ReadYourWritesMiddleware
+from app.matching import eligibility_index
+from app.event_status import EventStatusScheduler
+from app.inventory import expire_batches
+from app.forecasting import refresh_forecasts
+from app.scheduler import PeriodicJob
+from app.calendar_feed import calendar_cache
+from app.notifications import notifier
+from app.rate_limit import RateLimitMiddleware, Limit, build_store
+from app.idempotency import IdempotencyMiddleware, IdempotencyStore, purge_expired
+from app.audit import audit_writer
+from app.logging_config import configure_logging, dropped_records
+from app.request_log import RequestLogMiddleware
+from app import migrations
+from app.routers import auth, donors, organizers, blood_banks, donations, events, certificates, matching, audit
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+event_status_scheduler = EventStatusScheduler(
+    engine, settings.EVENT_STATUS_INTERVAL_SECONDS, on_change=calendar_cache.invalidate
+)
+inventory_expiry_job = PeriodicJob(
+    "Inventory expiry sweep", lambda: expire_batches(engine), settings.INVENTORY_EXPIRY_INTERVAL_SECONDS
+)
+forecast_job = PeriodicJob("Demand forecast refresh", lambda: refresh_forecasts(engine), settings.FORECAST_INTERVAL_SECONDS)
+idempotency_purge_job = PeriodicJob(
+    "Idempotency key purge", lambda: purge_expired(engine), settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS
+)
+
+# Configure logging: records are formatted and written by a background thread
+configure_logging()
 logger = logging.getLogger(__name__)
 
 app = FastAPI(
@@ -16,6 +47,32 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Replay POST/PUT retries that carry an Idempotency-Key. Added first, so it
+# runs inside the rate limiter.
+if settings.IDEMPOTENCY_ENABLED:
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=IdempotencyStore(
+            engine,
+            ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+            lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS,
+            cache_size=settings.IDEMPOTENCY_CACHE_SIZE,
+        ),
+        max_body_bytes=settings.IDEMPOTENCY_MAX_BODY_BYTES,
+    )
+
+# Throttle login/register (bcrypt-heavy). Added before CORS so that CORS wraps
+# it and browsers can read the 429 responses.
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        store=build_store(),
+        per_ip=Limit.parse(settings.RATE_LIMIT_PER_IP),
+        per_email=Limit.parse(settings.RATE_LIMIT_PER_EMAIL),
+        per_route=Limit.parse(settings.RATE_LIMIT_PER_ROUTE),
+        trust_forwarded=settings.RATE_LIMIT_TRUST_FORWARDED,
+    )
+
 # Configure CORS FIRST - Must be before any routes
 app.add_middleware(
     CORSMiddleware,
@@ -34,23 +91,89 @@ app.add_middleware(
     ],
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH", "HEAD"],
-    allow_headers=["Content-Type", "Authorization", "Accept", "*"],
+    allow_headers=["Content-Type", "Authorization", "Accept", "Idempotency-Key", "X-Request-ID", "*"],
     expose_headers=["*"],
     max_age=7200,  # Cache preflight for 2 hours
 )
 
-# Create database tables automatically on startup
+# Read-your-writes: after a successful write, pin the client's reads to the primary
+app.add_middleware(ReadYourWritesMiddleware, router=replica_router)
+
+# Outermost: the request id and SQL capture cover everything below, including 429s and replays
+app.add_middleware(
+    RequestLogMiddleware,
+    slow_ms=settings.LOG_SLOW_REQUEST_MS,
+    sampled_paths=[path.strip() for path in settings.LOG_SAMPLED_PATHS.split(",")],
+    sample_rate=settings.LOG_SAMPLE_RATE,
+    max_statements=settings.LOG_SLOW_SQL_MAX,
+)
+
+# Check (or migrate) the database schema on startup, then warm the pool in the background
 @app.on_event("startup")
 async def startup_event():
-    """Create database tables on application startup."""
+    """Bring the database schema up to date on application startup."""
+    app.state.ready = False
+    app.state.schema_version = None
+    app.state.timings = {"imports_ms": round(IMPORT_SECONDS * 1000, 1)}
+    started = time.perf_counter()
+
+    if settings.SCHEMA_STARTUP_MODE == "check":
+        # One read of schema_version; an unreachable database or a stale schema
+        # stops the worker instead of letting it serve errors.
+        app.state.schema_version = migrations.check_version(engine)
+    else:
+        try:
+            logger.info("Applying database migrations...")
+            applied = migrations.upgrade(engine)
+            app.state.schema_version = migrations.LATEST_VERSION
+            logger.info(f"✅ Database schema at version {migrations.LATEST_VERSION} (applied: {applied or 'none'})")
+        except Exception as e:
+            logger.error(f"❌ Database connection failed: {e}")
+            logger.warning("⚠️ Server will start but database endpoints won't work until MySQL is configured.")
+            logger.warning("Please check your .env file and ensure MySQL is running.")
+
+    app.state.timings["schema_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    app.state.warmup_task = asyncio.create_task(_warm_connection_pool())
+
+    if settings.NOTIFY_DISPATCHER_ENABLED:
+        notifier.start()
+    event_status_scheduler.start()
+    inventory_expiry_job.start()
+    forecast_job.start()
+    if settings.IDEMPOTENCY_ENABLED:
+        idempotency_purge_job.start()
+    if settings.AUDIT_ENABLED:
+        audit_writer.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background jobs; let the notification sender finish its current batch and the audit writer its queue."""
+    await event_status_scheduler.stop()
+    await inventory_expiry_job.stop()
+    await forecast_job.stop()
+    await idempotency_purge_job.stop()
+    await asyncio.to_thread(notifier.stop)
+    await asyncio.to_thread(audit_writer.stop)
+
+async def _warm_connection_pool(retry_seconds: float = 5.0):
+    """Open the pool's connections; /ready reports ready once this succeeds."""
+    started = time.perf_counter()
+    while True:
+        try:
+            opened = await asyncio.to_thread(warm_pool)
+            break
+        except Exception as e:
+            logger.error(f"❌ Connection pool warm-up failed, retrying in {retry_seconds:.0f}s: {e}")
+            await asyncio.sleep(retry_seconds)
+    app.state.timings["pool_warmup_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    app.state.ready = True
+    logger.info(f"✅ Ready: {opened} pooled connections, timings {app.state.timings}")
+
+    # Build the emergency matching index now rather than on the first match request
     try:
-        logger.info("Creating database tables...")
-        Base.metadata.create_all(bind=engine)
-        logger.info("✅ Database tables created successfully!")
+        await asyncio.to_thread(eligibility_index.ensure_built, SessionLocal)
     except Exception as e:
-        logger.error(f"❌ Database connection failed: {e}")
-        logger.warning("⚠️ Server will start but database endpoints won't work until MySQL is configured.")
-        logger.warning("Please check your .env file and ensure MySQL is running.")
+        logger.error(f"❌ Matching index build failed, will retry on first use: {e}")
 
 # Add explicit OPTIONS handler for CORS preflight
 @app.options("/{full_path:path}")
@@ -61,7 +184,7 @@ async def preflight_handler(full_path: str) -> Response:
         headers={
             "Access-Control-Allow-Origin": "*",
             "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS, PATCH",
-            "Access-Control-Allow-Headers": "Content-Type, Authorization",
+            "Access-Control-Allow-Headers": "Content-Type, Authorization, Idempotency-Key",
         },
     )
 
@@ -73,6 +196,8 @@ app.include_router(blood_banks.router, prefix="/api/blood-banks", tags=["Blood B
 app.include_router(donations.router, prefix="/api/donations", tags=["Donations"])
 app.include_router(events.router, prefix="/api/events", tags=["Events"])
 app.include_router(certificates.router, prefix="/api/certificates", tags=["Certificates"])
+app.include_router(matching.router, prefix="/api/matching", tags=["Matching"])
+app.include_router(audit.router, prefix="/api/audit", tags=["Audit"])
 
 @app.get("/")
 def read_root():
@@ -86,3 +211,15 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness probe: 503 until the schema is checked and the connection pool is warm."""
+    ready = getattr(app.state, "ready", False)
+    body = {
+        "status": "ready" if ready else "starting",
+        "schema_version": getattr(app.state, "schema_version", None),
+        "timings": getattr(app.state, "timings", {}),
+        "log_records_dropped": dropped_records(),
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
@@ -0,0 +1,211 @@
+"""
+Maintenance commands.
+
+Usage:
+    python manage.py migrate [--target N]   # apply pending schema migrations
+    python manage.py migrate --status       # show applied/pending migrations
+    python manage.py check-indexes          # EXPLAIN list queries, fail on full scans
+    python manage.py send-notifications     # run the notification sender in the foreground
+    python manage.py recompute-donor-stats  # rebuild donor totals/last donation date from donations
+    python manage.py advance-event-statuses # move due events to ongoing/completed now
+    python manage.py expire-inventory       # retire expired blood batches now
+    python manage.py forecast               # recompute blood demand forecasts now
+    python manage.py archive [--dry-run]    # move closed years of donations/events to ARCHIVE_DIR
+    python manage.py partition              # MySQL: partition donations/events by year
+"""
+import argparse
+import sys
+import time
+from datetime import date
+from app.database import engine
+
+
+def cmd_migrate(args) -> int:
+    from app import migrations
+
+    if args.status:
+        with engine.connect() as conn:
+            version = migrations.current_version(conn)
+        for migration in migrations.MIGRATIONS:
+            state = "applied" if migration.VERSION <= version else "pending"
+            print(f"  {migration.VERSION:04d}  {state:<8} {migration.DESCRIPTION}")
+        return 0
+
+    applied = migrations.upgrade(engine, target=args.target)
+    if applied:
+        print(f"✅ Applied migrations: {', '.join(f'{v:04d}' for v in applied)}")
+    else:
+        print("✅ Database schema is up to date")
+    return 0
+
+
+def cmd_check_indexes(args) -> int:
+    from app.query_plans import KNOWN_SCANS, LIST_QUERIES, check_query_plans
+
+    failures = check_query_plans(engine)
+    for name in LIST_QUERIES:
+        if name in failures:
+            print(f"  ❌ {name}: full scan on {', '.join(failures[name])}")
+        else:
+            print(f"  ✅ {name}")
+    for name in KNOWN_SCANS:
+        print(f"  ⚠️  {name}: full scan by design (not checked)")
+    if failures:
+        print(f"\n❌ {len(failures)} list queries fall back to a full table scan")
+        return 1
+    print("\n✅ All list queries use an index")
+    return 0
+
+
+def cmd_send_notifications(args) -> int:
+    from app.notifications import notifier
+
+    if args.once:
+        processed = notifier.run_once()
+        print(f"✅ Processed {processed} notifications {notifier.stats}")
+        return 0
+
+    print("📨 Sending notifications (Ctrl+C to stop)...")
+    try:
+        notifier.run()
+    except KeyboardInterrupt:
+        pass
+    print(f"✅ Stopped {notifier.stats}")
+    return 0
+
+
+def cmd_recompute_donor_stats(args) -> int:
+    from app.donor_stats import recompute_donor_stats
+
+    started = time.perf_counter()
+    updated = recompute_donor_stats(engine, batch_size=args.batch_size)
+    print(f"✅ Recomputed counters for {updated} donors in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+def cmd_advance_event_statuses(args) -> int:
+    from app.event_status import advance_event_statuses
+
+    moved = advance_event_statuses(engine)
+    if not moved:
+        print("⚠️ Another process is updating event statuses")
+        return 1
+    print(f"✅ {moved['ongoing']} events now ongoing, {moved['completed']} completed")
+    return 0
+
+
+def cmd_expire_inventory(args) -> int:
+    from app.inventory import expire_batches
+
+    retired = expire_batches(engine)
+    if not retired:
+        print("⚠️ Another process is running the expiry sweep")
+        return 1
+    print(f"✅ Retired {retired['units']} expired units in {retired['batches']} batches")
+    return 0
+
+
+def cmd_forecast(args) -> int:
+    from app.forecasting import refresh_forecasts
+
+    started = time.perf_counter()
+    refreshed = refresh_forecasts(engine)
+    if not refreshed:
+        print("⚠️ Another process is computing forecasts")
+        return 1
+    print(f"✅ Forecast {refreshed['series']} series ({refreshed['short']} running short) in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+def cmd_archive(args) -> int:
+    from app.archive import archivable_years, archive_years
+    from app.config import settings
+
+    before_year = args.before_year or date.today().year - settings.ARCHIVE_HOT_YEARS
+    years = archivable_years(engine, before_year)
+    if not years:
+        print(f"✅ Nothing to archive before {before_year}")
+        return 0
+    if args.dry_run:
+        print(f"Would archive {len(years)} years: {', '.join(map(str, years))}")
+        return 0
+
+    started = time.perf_counter()
+    moved = archive_years(engine, years, batch_size=args.batch_size)
+    for year, counts in moved.items():
+        print(f"  {year}: " + ", ".join(f"{count} {table}" for table, count in counts.items()))
+    print(f"✅ Archived {len(moved)} years to {settings.ARCHIVE_DIR} in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+def cmd_partition(args) -> int:
+    from app import partitioning
+    from app.config import settings
+
+    if engine.dialect.name != "mysql":
+        print(f"❌ Partitioning needs MySQL (database is {engine.dialect.name})")
+        return 1
+
+    this_year = date.today().year
+    first_year = args.first_year or this_year - settings.ARCHIVE_HOT_YEARS
+    last_year = this_year + args.years_ahead
+    with engine.connect() as conn:
+        for table in partitioning.PARTITIONED_TABLES:
+            if partitioning.partitions(conn, table):
+                added = partitioning.add_year_partitions(conn, table, last_year)
+                print(f"  {table}: added {', '.join(map(str, added)) or 'no'} partitions")
+            else:
+                dropped = partitioning.partition_table(conn, table, first_year, last_year)
+                print(f"  {table}: partitioned {first_year}-{last_year}, dropped foreign keys: {', '.join(dropped) or 'none'}")
+    print(f"✅ Yearly partitions in place through {last_year}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Red Connect maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subparsers.add_parser("migrate", help="apply pending schema migrations")
+    migrate.add_argument("--target", type=int, help="stop after this version")
+    migrate.add_argument("--status", action="store_true", help="list migrations and exit")
+    migrate.set_defaults(func=cmd_migrate)
+
+    check = subparsers.add_parser("check-indexes", help="EXPLAIN list queries and fail on full table scans")
+    check.set_defaults(func=cmd_check_indexes)
+
+    send = subparsers.add_parser("send-notifications", help="send queued notifications")
+    send.add_argument("--once", action="store_true", help="send one batch per channel and exit")
+    send.set_defaults(func=cmd_send_notifications)
+
+    recompute = subparsers.add_parser("recompute-donor-stats", help="rebuild donor counters from donations")
+    recompute.add_argument("--batch-size", type=int, default=50000, help="donor ids per UPDATE")
+    recompute.set_defaults(func=cmd_recompute_donor_stats)
+
+    advance = subparsers.add_parser("advance-event-statuses", help="move due events to ongoing/completed")
+    advance.set_defaults(func=cmd_advance_event_statuses)
+
+    expire = subparsers.add_parser("expire-inventory", help="retire expired blood batches and update stock counts")
+    expire.set_defaults(func=cmd_expire_inventory)
+
+    forecast = subparsers.add_parser("forecast", help="recompute demand forecasts per blood bank and type")
+    forecast.set_defaults(func=cmd_forecast)
+
+    archive = subparsers.add_parser("archive", help="move closed years of donations and events to archive files")
+    archive.add_argument("--before-year", type=int, help="archive years before this one (default: keep ARCHIVE_HOT_YEARS closed years)")
+    archive.add_argument("--batch-size", type=int, default=5000, help="rows per DELETE")
+    archive.add_argument("--dry-run", action="store_true", help="list the years that would be archived")
+    archive.set_defaults(func=cmd_archive)
+
+    partition = subparsers.add_parser("partition", help="MySQL: partition donations and events by year (run yearly)")
+    partition.add_argument("--first-year", type=int, help="first yearly partition when partitioning (older rows share one)")
+    partition.add_argument("--years-ahead", type=int, default=1, help="create partitions this many years ahead")
+    partition.set_defaults(func=cmd_partition)
+
+    args = parser.parse_args(argv)
+    # Statement logging drowns the command output.
+    engine.echo = False
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,150 @@
 """
-Development server runner.
-Quick way to start the FastAPI server.
+Server runner.
+
+    python run.py          # development: single process with auto-reload
+    python run.py --prod   # production: pre-forked workers, uvloop + httptools
+
+The production profile runs gunicorn with uvicorn workers when gunicorn is
+available (Linux/macOS): the app is imported once in the master and forked
+into the workers, so their code pages are shared copy-on-write. On Windows it
+falls back to uvicorn's own multi-process mode (no preloading).
 """
-import uvicorn
+import argparse
+import gc
+import os
 import sys
 
+import uvicorn
+
+
+def run_dev(host: str, port: int) -> None:
+    uvicorn.run(
+        "main:app",
+        host=host,
+        port=port,
+        reload=True,
+        log_level="info",
+        # Uvicorn's loggers go through the app's log pipeline; the app writes the access log
+        log_config=None,
+        access_log=False,
+    )
+
+
+def _worker_count(settings) -> int:
+    return settings.WEB_WORKERS or os.cpu_count() or 1
+
+
+def _preload():
+    """Import the app in the master process before forking.
+
+    Everything imported here is shared copy-on-write with the workers. Lazy
+    imports (passlib/bcrypt) are forced now so each worker doesn't import them
+    separately, migrations run once instead of once per worker, and objects
+    created so far are moved out of the GC's reach so collections in the
+    workers don't write to (and un-share) those pages.
+    """
+    from app import migrations
+    from app.auth import get_pwd_context
+    from app.database import engine
+    import main
+
+    get_pwd_context().hash("preload")
+    migrations.upgrade(engine)
+    engine.dispose()
+    gc.collect()
+    gc.freeze()
+    return main.app
+
+
+def run_prod_gunicorn(host: str, port: int, settings) -> None:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+
+    class ProductionWorker(UvicornWorker):
+        CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
+
+    def post_fork(server, worker):
+        from app.database import dispose_after_fork
+        dispose_after_fork()
+
+    class ProductionServer(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{host}:{port}",
+                "workers": _worker_count(settings),
+                "worker_class": ProductionWorker,
+                "preload_app": True,
+                "backlog": settings.WEB_BACKLOG,
+                "keepalive": settings.WEB_KEEPALIVE,
+                "graceful_timeout": settings.WEB_GRACEFUL_TIMEOUT,
+                "timeout": max(30, settings.WEB_GRACEFUL_TIMEOUT),
+                "max_requests": settings.WEB_MAX_REQUESTS,
+                "max_requests_jitter": settings.WEB_MAX_REQUESTS // 10,
+                "post_fork": post_fork,
+                "accesslog": None,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return _preload()
+
+    ProductionServer().run()
+
+
+def run_prod_uvicorn(host: str, port: int, settings) -> None:
+    from app import migrations
+    from app.database import engine
+
+    migrations.upgrade(engine)
+    engine.dispose()
+    uvicorn.run(
+        "main:app",
+        host=host,
+        port=port,
+        workers=_worker_count(settings),
+        loop="auto",
+        http="auto",
+        backlog=settings.WEB_BACKLOG,
+        timeout_keep_alive=settings.WEB_KEEPALIVE,
+        timeout_graceful_shutdown=settings.WEB_GRACEFUL_TIMEOUT,
+        log_level="info",
+        log_config=None,
+        access_log=False,
+    )
+
+
+def run_prod(host: str, port: int) -> None:
+    # Workers only verify the schema version; the master migrates once above.
+    os.environ.setdefault("SCHEMA_STARTUP_MODE", "check")
+    from app.config import settings
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        gunicorn = None
+    if gunicorn is not None and sys.platform != "win32":
+        run_prod_gunicorn(host, port, settings)
+    else:
+        run_prod_uvicorn(host, port, settings)
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Start the Red Connect API server")
+    parser.add_argument("--prod", action="store_true", help="production profile (multi-worker, no reload)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
     print("🏥 Starting Red Connect API Server...")
-    print("📖 API Documentation: http://localhost:8000/docs")
+    print(f"📖 API Documentation: http://localhost:{args.port}/docs")
     print("🔄 Press CTRL+C to stop the server\n")
     
     try:
-        uvicorn.run(
-            "main:app",
-            host="0.0.0.0",
-            port=8000,
-            reload=True,
-            log_level="info"
-        )
+        if args.prod:
+            run_prod(args.host, args.port)
+        else:
+            run_dev(args.host, args.port)
     except KeyboardInterrupt:
         print("\n👋 Server stopped!")
         sys.exit(0)
-
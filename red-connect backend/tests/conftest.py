@@ -0,0 +1,137 @@
+"""
+Shared fixtures.
+
+Tests run against a throwaway SQLite database created with the migrations;
+``DB_URL`` is set before ``app`` is imported, since settings and the engine
+are read at import time. Every table is emptied after each test.
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_DB_DIR = tempfile.mkdtemp(prefix="red_connect_tests_")
+os.environ["DB_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["NOTIFY_DISPATCHER_ENABLED"] = "False"
+os.environ["RATE_LIMIT_ENABLED"] = "False"
+
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import migrations
+from app.auth import create_access_token, token_claims
+from app.database import Base, SessionLocal, engine
+from app.models import BankCategory, BloodBank, BloodType, Donor, Event, EventStatus, Organizer, User, UserRole
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    migrations.upgrade(engine)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def clean_tables():
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            if table.name != "schema_version":
+                conn.execute(table.delete())
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    from main import app
+
+    # Not entered as a context manager, so the startup hook (schema check,
+    # background jobs) does not run; the schema fixture has migrated already.
+    return TestClient(app)
+
+
+@pytest.fixture
+def auth():
+    """Authorization headers for a user (a signed token, skipping the bcrypt login)."""
+
+    def headers(user: User) -> dict:
+        return {"Authorization": f"Bearer {create_access_token(token_claims(user))}"}
+
+    return headers
+
+
+@pytest.fixture
+def make_donor(db):
+    """Create a donor (and their user) and return the donor."""
+    counter = {"n": 0}
+
+    def make(blood_type: BloodType = BloodType.O_POSITIVE, **fields) -> Donor:
+        counter["n"] += 1
+        user = User(email=f"donor{counter['n']}@test.example.com", hashed_password="x", role=UserRole.DONOR)
+        db.add(user)
+        db.flush()
+        fields.setdefault("phone", f"90000{counter['n']:05d}")
+        donor = Donor(user_id=user.id, full_name=f"Donor {counter['n']}", blood_type=blood_type, **fields)
+        db.add(donor)
+        db.commit()
+        return donor
+
+    return make
+
+
+@pytest.fixture
+def organizer(db) -> Organizer:
+    user = User(email="organizer@test.example.com", hashed_password="x", role=UserRole.ORGANIZER)
+    db.add(user)
+    db.flush()
+    organizer = Organizer(user_id=user.id, organization_name="Test Camp", contact_person="Test", phone="9100000000")
+    db.add(organizer)
+    db.commit()
+    return organizer
+
+
+@pytest.fixture
+def make_event(db, organizer):
+    def make(max_participants: int = 2, **fields) -> Event:
+        event = Event(
+            organizer_id=organizer.id,
+            title="Blood drive",
+            event_date=fields.pop("event_date", date(2099, 1, 1)),
+            venue="Community hall",
+            city="Pune",
+            state="Maharashtra",
+            status=EventStatus.UPCOMING,
+            max_participants=max_participants,
+            **fields,
+        )
+        db.add(event)
+        db.commit()
+        return event
+
+    return make
+
+
+@pytest.fixture
+def make_bank(db):
+    def make(name: str = "City Blood Bank", **fields) -> BloodBank:
+        bank = BloodBank(
+            name=name, address="1 Main Road", phone="9200000000", category=BankCategory.GOVERNMENT,
+            city="Pune", state="Maharashtra", **fields,
+        )
+        db.add(bank)
+        db.commit()
+        return bank
+
+    return make
@@ -0,0 +1,41 @@
+from datetime import date
+
+from app.archive import ArchiveStore, archive_year, iter_rows
+from app.database import engine
+from app.models import BloodType, Certificate, CertificateStatus, Donation, DonationStatus
+
+
+def _donation(db, donor, day: date) -> Donation:
+    donation = Donation(donor_id=donor.id, donation_date=day, blood_type=BloodType.O_POSITIVE, units=1.0,
+                        status=DonationStatus.COMPLETED)
+    db.add(donation)
+    db.commit()
+    return donation
+
+
+def test_archiving_moves_donations_and_keeps_their_certificates(client, auth, db, make_donor, tmp_path):
+    store = ArchiveStore(str(tmp_path))
+    donor = make_donor()
+    old = _donation(db, donor, date(2019, 12, 30))
+    recent = _donation(db, donor, date(2030, 1, 5))
+    certificate = Certificate(
+        donation_id=old.id, donor_id=donor.id, certificate_number="CERT-OLD", issue_date=date(2020, 1, 2),
+        blood_units=1.0, blood_type=BloodType.O_POSITIVE, status=CertificateStatus.ISSUED,
+    )
+    db.add(certificate)
+    db.commit()
+    old_id, recent_id, certificate_id = old.id, recent.id, certificate.id
+    headers = auth(donor.user)
+
+    assert archive_year(engine, 2019, store) == {"donations": 1, "events": 0}
+
+    db.expunge_all()
+    assert db.query(Donation.id).all() == [(recent_id,)]
+    rows = iter_rows(db, "donations", [Donation.id, Donation.donation_date], store=store)
+    assert [row["id"] for row in rows] == [old_id, recent_id]
+
+    mine = client.get("/api/certificates/my-certificates", headers=headers).json()
+    assert [c["certificate_number"] for c in mine] == ["CERT-OLD"]
+    response = client.get(f"/api/certificates/{certificate_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["donation_id"] == old_id
@@ -0,0 +1,111 @@
+import queue
+from datetime import date
+
+import pytest
+
+from app.audit import AuditWriter, audit_writer, set_actor
+from app.database import SessionLocal, engine
+from app.models import BloodType, Donation, User, UserRole
+
+
+@pytest.fixture
+def captured():
+    """Entries the (not started) writer has queued since the test began."""
+
+    def drain() -> list:
+        entries = []
+        while True:
+            try:
+                entries.append(audit_writer._queue.get_nowait())
+            except queue.Empty:
+                return entries
+
+    drain()
+    return drain
+
+
+def _donation(donor, **fields) -> Donation:
+    return Donation(donor_id=donor.id, donation_date=date(2030, 1, 1), blood_type=BloodType.O_POSITIVE, **fields)
+
+
+def test_committed_changes_are_queued_with_their_actor(make_donor, captured):
+    donor = make_donor()
+    db = SessionLocal()
+    try:
+        set_actor(db, donor.user_id)
+        donation = _donation(donor, units=1.0)
+        db.add(donation)
+        db.commit()
+        donation_id = donation.id
+
+        # Loaded and then changed, as the routers do
+        db.expunge_all()
+        db.get(Donation, donation_id).units = 2.0
+        db.commit()
+    finally:
+        db.close()
+
+    entries = captured()
+
+    assert [(e["entity"], e["entity_id"], e["action"], e["actor_user_id"]) for e in entries] == [
+        ("donations", donation_id, "insert", donor.user_id),
+        ("donations", donation_id, "update", donor.user_id),
+    ]
+    assert entries[0]["changes"]["units"] == 1.0
+    assert entries[1]["changes"] == {"units": [1.0, 2.0]}
+
+
+def test_rolled_back_changes_are_not_queued(make_donor, captured):
+    donor = make_donor()
+    db = SessionLocal()
+    try:
+        db.add(_donation(donor))
+        db.flush()
+        db.rollback()
+
+        # An insert undone in a savepoint is skipped; the rest of the transaction is kept
+        kept = _donation(donor)
+        db.add(kept)
+        savepoint = db.begin_nested()
+        db.add(_donation(donor, notes="undone"))
+        db.flush()
+        savepoint.rollback()
+        db.commit()
+        kept_id = kept.id
+    finally:
+        db.close()
+
+    assert [(e["entity_id"], e["action"], e["actor_user_id"]) for e in captured()] == [(kept_id, "insert", None)]
+
+
+def test_a_full_buffer_drops_and_counts_entries():
+    writer = AuditWriter(engine, max_buffer=2)
+
+    for n in range(5):
+        writer.submit({"entity": "donations", "entity_id": n})
+
+    assert writer.buffered == 2
+    assert writer.stats["dropped"] == 3
+
+
+def test_written_entries_can_be_queried_by_entity_and_actor(client, auth, db, make_donor, captured):
+    donor = make_donor()
+    admin = User(email="admin@test.example.com", hashed_password="x", role=UserRole.ADMIN)
+    db.add(admin)
+    db.commit()
+    response = client.post("/api/donations/", json={"donation_date": "2030-01-01", "blood_type": "O+"},
+                           headers=auth(donor.user))
+    donation_id = response.json()["id"]
+
+    writer = AuditWriter(engine)
+    writer.write(captured())
+    assert writer.stats["failed"] == 0
+
+    entries = client.get("/api/audit/", params={"entity": "donations", "actor_user_id": donor.user_id},
+                         headers=auth(admin)).json()
+    assert [(e["entity_id"], e["action"]) for e in entries] == [(donation_id, "insert")]
+    assert entries[0]["changes"]["blood_type"] == BloodType.O_POSITIVE.value
+
+    others = client.get("/api/audit/", params={"entity": "donations", "actor_user_id": admin.id},
+                        headers=auth(admin)).json()
+    assert others == []
@@ -0,0 +1,91 @@
+from datetime import date
+
+from app.database import SessionLocal, engine
+from app.donor_stats import record_donation_added, recompute_donor_stats
+from app.models import Donor
+
+
+def _create(client, headers, day: date, **fields) -> dict:
+    response = client.post("/api/donations/", json={"donation_date": day.isoformat(), "blood_type": "O+", **fields},
+                           headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _counters(db, donor_id: int) -> tuple:
+    db.expire_all()
+    donor = db.get(Donor, donor_id)
+    return donor.total_donations, donor.last_donation_date
+
+
+def test_create_counts_the_donation_and_keeps_the_latest_date(client, auth, db, make_donor):
+    donor = make_donor()
+    headers = auth(donor.user)
+
+    _create(client, headers, date(2030, 3, 1))
+    _create(client, headers, date(2030, 1, 1))
+
+    assert _counters(db, donor.id) == (2, date(2030, 3, 1))
+
+
+def test_cancel_and_restore_adjust_the_counters(client, auth, db, make_donor):
+    donor = make_donor()
+    headers = auth(donor.user)
+    _create(client, headers, date(2030, 1, 1))
+    latest = _create(client, headers, date(2030, 3, 1))
+
+    response = client.put(f"/api/donations/{latest['id']}", json={"status": "cancelled"}, headers=headers)
+    assert response.status_code == 200
+    assert _counters(db, donor.id) == (1, date(2030, 1, 1))
+
+    # Cancelling twice does not count twice
+    client.put(f"/api/donations/{latest['id']}", json={"status": "cancelled"}, headers=headers)
+    assert _counters(db, donor.id) == (1, date(2030, 1, 1))
+
+    client.put(f"/api/donations/{latest['id']}", json={"status": "completed"}, headers=headers)
+    assert _counters(db, donor.id) == (2, date(2030, 3, 1))
+
+
+def test_delete_only_uncounts_counted_donations(client, auth, db, make_donor):
+    donor = make_donor()
+    headers = auth(donor.user)
+    kept = _create(client, headers, date(2030, 1, 1))
+    cancelled = _create(client, headers, date(2030, 2, 1))
+    client.put(f"/api/donations/{cancelled['id']}", json={"status": "cancelled"}, headers=headers)
+
+    assert client.delete(f"/api/donations/{cancelled['id']}", headers=headers).status_code == 204
+    assert _counters(db, donor.id) == (1, date(2030, 1, 1))
+
+    assert client.delete(f"/api/donations/{kept['id']}", headers=headers).status_code == 204
+    assert _counters(db, donor.id) == (0, None)
+
+
+def test_increments_from_sessions_with_stale_donors_are_not_lost(db, make_donor):
+    donor = make_donor()
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        # Both sessions have read the donor before either writes
+        assert first.get(Donor, donor.id).total_donations == 0
+        assert second.get(Donor, donor.id).total_donations == 0
+        record_donation_added(first, donor.id, date(2030, 1, 1))
+        first.commit()
+        record_donation_added(second, donor.id, date(2029, 1, 1))
+        second.commit()
+    finally:
+        first.close()
+        second.close()
+
+    assert _counters(db, donor.id) == (2, date(2030, 1, 1))
+
+
+def test_recompute_matches_the_incremental_counters(client, auth, db, make_donor):
+    donor = make_donor()
+    headers = auth(donor.user)
+    _create(client, headers, date(2030, 1, 1))
+    cancelled = _create(client, headers, date(2030, 5, 1))
+    client.put(f"/api/donations/{cancelled['id']}", json={"status": "cancelled"}, headers=headers)
+    incremental = _counters(db, donor.id)
+
+    recompute_donor_stats(engine)
+
+    assert _counters(db, donor.id) == incremental == (1, date(2030, 1, 1))
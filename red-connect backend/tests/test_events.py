@@ -0,0 +1,28 @@
+from app.models import (
+    Event,
+    EventRegistration,
+    Notification,
+    NotificationChannel,
+    NotificationStatus,
+    RegistrationStatus,
+)
+
+
+def test_delete_event_removes_its_registrations_and_notifications(client, auth, db, organizer, make_donor, make_event):
+    event, other = make_event(), make_event()
+    donor = make_donor()
+    for e in (event, other):
+        db.add(EventRegistration(event_id=e.id, donor_id=donor.id, status=RegistrationStatus.REGISTERED))
+        db.add(Notification(event_id=e.id, donor_id=donor.id, channel=NotificationChannel.SMS,
+                            status=NotificationStatus.QUEUED, attempts=0))
+    db.commit()
+    event_id, other_id = event.id, other.id
+
+    # No ON DELETE CASCADE to rely on (SQLite does not enforce it here, partitioned MySQL tables lack it)
+    response = client.delete(f"/api/events/{event_id}", headers=auth(organizer.user))
+
+    assert response.status_code == 204
+    db.expunge_all()
+    assert db.query(Event.id).all() == [(other_id,)]
+    assert db.query(EventRegistration.event_id).all() == [(other_id,)]
+    assert db.query(Notification.event_id).all() == [(other_id,)]
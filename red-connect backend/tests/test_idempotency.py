@@ -0,0 +1,65 @@
+import uuid
+
+from sqlalchemy import func
+
+from app.models import Donation, IdempotencyKey
+
+DONATION = {"donation_date": "2030-01-01", "blood_type": "O+"}
+
+
+def _key() -> dict:
+    # Unique per test: the middleware's in-memory cache outlives the emptied tables
+    return {"Idempotency-Key": str(uuid.uuid4())}
+
+
+def _count(db, model) -> int:
+    return db.query(func.count()).select_from(model).scalar()
+
+
+def test_retry_with_the_same_key_replays_the_first_response(client, auth, db, make_donor):
+    headers = {**auth(make_donor().user), **_key()}
+
+    first = client.post("/api/donations/", json=DONATION, headers=headers)
+    retry = client.post("/api/donations/", json=DONATION, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert _count(db, Donation) == 1
+
+
+def test_reusing_a_key_for_another_request_is_refused(client, auth, db, make_donor):
+    headers = {**auth(make_donor().user), **_key()}
+    client.post("/api/donations/", json=DONATION, headers=headers)
+
+    response = client.post("/api/donations/", json={**DONATION, "units": 2.0}, headers=headers)
+
+    assert response.status_code == 422
+    assert _count(db, Donation) == 1
+
+
+def test_keys_are_scoped_to_the_caller(client, auth, db, make_donor):
+    key = _key()
+    for donor in (make_donor(), make_donor()):
+        response = client.post("/api/donations/", json=DONATION, headers={**auth(donor.user), **key})
+        assert response.status_code == 201
+        assert "Idempotent-Replayed" not in response.headers
+
+    assert _count(db, Donation) == 2
+
+
+def test_credential_routes_and_anonymous_requests_are_never_stored(client, auth, db, make_donor):
+    key = _key()
+    registration = {"email": "new.donor@test.example.com", "password": "secret123", "full_name": "New Donor",
+                    "blood_type": "A+"}
+
+    response = client.post("/api/auth/donor/register", json=registration, headers={**auth(make_donor().user), **key})
+    assert response.status_code == 201
+    assert response.json()["access_token"]
+    for _ in range(2):
+        response = client.post("/api/auth/logout", headers=key)
+        assert response.status_code == 200
+        assert "Idempotent-Replayed" not in response.headers
+
+    assert _count(db, IdempotencyKey) == 0
@@ -0,0 +1,126 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import func
+
+from app import inventory
+from app.database import engine
+from app.models import BatchStatus, BloodBatch, BloodComponent, BloodDispatch, BloodInventory, BloodType
+
+O_POS = BloodType.O_POSITIVE
+
+
+def _stock(db, bank_id: int) -> int:
+    db.expire_all()
+    return db.query(BloodInventory.units_available).filter(
+        BloodInventory.blood_bank_id == bank_id, BloodInventory.blood_type == O_POS
+    ).scalar()
+
+
+def _remaining(db, *batches) -> list:
+    db.expire_all()
+    return [db.get(BloodBatch, batch.id).units_remaining for batch in batches]
+
+
+def test_dispatch_issues_the_oldest_batches_first(db, make_bank):
+    bank = make_bank()
+    today = date.today()
+    newest = inventory.receive_batch(db, bank.id, O_POS, 5, collected_on=today)
+    oldest = inventory.receive_batch(db, bank.id, O_POS, 3, collected_on=today - timedelta(days=10))
+    middle = inventory.receive_batch(db, bank.id, O_POS, 4, collected_on=today - timedelta(days=5))
+    db.commit()
+
+    record, taken = inventory.dispatch(db, bank.id, O_POS, 6)
+    db.commit()
+
+    assert [(batch.id, units) for batch, units in taken] == [(oldest.id, 3), (middle.id, 3)]
+    assert _remaining(db, oldest, middle, newest) == [0, 1, 5]
+    assert db.get(BloodBatch, oldest.id).status == BatchStatus.ISSUED
+    assert record.units == 6
+    assert _stock(db, bank.id) == 6
+
+
+def test_dispatch_skips_expired_batches_and_refuses_a_shortfall(db, make_bank):
+    bank = make_bank()
+    inventory.receive_batch(db, bank.id, O_POS, 2, component=BloodComponent.PLATELETS,
+                            collected_on=date.today() - timedelta(days=3))
+    # Expired, but not yet swept
+    stale = inventory.receive_batch(db, bank.id, O_POS, 4, collected_on=date.today() - timedelta(days=30))
+    db.query(BloodBatch).filter(BloodBatch.id == stale.id).update(
+        {BloodBatch.expires_on: date.today() - timedelta(days=1)}
+    )
+    db.commit()
+
+    with pytest.raises(inventory.InsufficientStock):
+        inventory.dispatch(db, bank.id, O_POS, 1)
+    db.rollback()
+
+    assert db.query(func.count(BloodDispatch.id)).scalar() == 0
+    assert _remaining(db, stale) == [4]
+    assert _stock(db, bank.id) == 6
+
+
+def test_expire_batches_takes_expired_units_out_of_the_total(db, make_bank):
+    bank = make_bank()
+    fresh = inventory.receive_batch(db, bank.id, O_POS, 5)
+    stale = inventory.receive_batch(db, bank.id, O_POS, 3, collected_on=date.today() - timedelta(days=30))
+    db.commit()
+
+    later = date.today() + timedelta(days=6)
+    assert inventory.expire_batches(engine, today=later) == {"batches": 1, "units": 3}
+
+    db.expire_all()
+    assert db.get(BloodBatch, stale.id).status == BatchStatus.EXPIRED
+    assert db.get(BloodBatch, fresh.id).status == BatchStatus.AVAILABLE
+    assert _stock(db, bank.id) == 5
+    assert inventory.expire_batches(engine, today=later) == {"batches": 0, "units": 0}
+
+
+def test_set_stock_receives_a_surplus_and_writes_off_a_shortfall_fifo(db, make_bank):
+    bank = make_bank()
+    oldest = inventory.receive_batch(db, bank.id, O_POS, 3, collected_on=date.today() - timedelta(days=2))
+    newest = inventory.receive_batch(db, bank.id, O_POS, 3)
+    db.commit()
+
+    inventory.set_stock(db, bank.id, O_POS, 4)
+    db.commit()
+    assert _remaining(db, oldest, newest) == [1, 3]
+    assert _stock(db, bank.id) == 4
+
+    inventory.set_stock(db, bank.id, O_POS, 10)
+    db.commit()
+    assert _stock(db, bank.id) == 10
+    assert db.query(func.sum(BloodBatch.units_remaining)).scalar() == 10
+
+
+def test_set_stock_only_writes_off_units_the_batches_hold(db, make_bank):
+    bank = make_bank()
+    inventory.receive_batch(db, bank.id, O_POS, 2)
+    # A total that got ahead of the batches
+    db.query(BloodInventory).filter(BloodInventory.blood_bank_id == bank.id).update({BloodInventory.units_available: 9})
+    db.commit()
+
+    inventory.set_stock(db, bank.id, O_POS, 0)
+    db.commit()
+
+    assert db.query(func.sum(BloodBatch.units_remaining)).scalar() == 0
+    assert _stock(db, bank.id) == 7
+
+
+def test_bulk_seeded_stock_is_held_in_batches(db):
+    from init_db import BulkSeeder
+
+    seeder = BulkSeeder(engine, seed=1, batch_size=50)
+    seeder.seed_blood_banks(3)
+
+    totals = dict(db.query(BloodInventory.blood_bank_id, func.sum(BloodInventory.units_available))
+                  .group_by(BloodInventory.blood_bank_id).all())
+    held = dict(db.query(BloodBatch.blood_bank_id, func.sum(BloodBatch.units_remaining))
+                .filter(BloodBatch.expires_on >= date.today()).group_by(BloodBatch.blood_bank_id).all())
+    assert held == totals
+
+    bank_id = next(iter(totals))
+    before = _stock(db, bank_id)
+    inventory.dispatch(db, bank_id, O_POS, 1)
+    db.commit()
+    assert _stock(db, bank_id) == before - 1
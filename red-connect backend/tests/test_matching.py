@@ -0,0 +1,88 @@
+import threading
+from datetime import date, timedelta
+
+from app.matching import EligibilityIndex
+from app.models import BloodType, Donor
+
+TODAY = date(2030, 6, 1)
+ADULT = date(1995, 1, 1)
+
+
+def _index(db) -> EligibilityIndex:
+    index = EligibilityIndex()
+    index.build(db)
+    return index
+
+
+def test_search_ranks_exact_type_first_and_skips_deferred_donors(db, make_donor):
+    exact = make_donor(BloodType.A_POSITIVE, city="Pune", state="Maharashtra", date_of_birth=ADULT)
+    universal = make_donor(BloodType.O_NEGATIVE, city="Pune", state="Maharashtra", date_of_birth=ADULT)
+    deferred = make_donor(BloodType.A_POSITIVE, city="Pune", state="Maharashtra", date_of_birth=ADULT,
+                          last_donation_date=TODAY - timedelta(days=10))
+    make_donor(BloodType.B_POSITIVE, city="Pune", state="Maharashtra", date_of_birth=ADULT)
+
+    found = _index(db).search(BloodType.A_POSITIVE, city="Pune", state="Maharashtra", on_date=TODAY)
+
+    assert [donor_id for donor_id, _, _ in found] == [exact.id, universal.id]
+    assert deferred.id not in {donor_id for donor_id, _, _ in found}
+
+
+def test_search_by_city_alone_matches_the_city_in_any_state(db, make_donor):
+    pune = make_donor(BloodType.O_POSITIVE, city="Pune", state="Maharashtra", date_of_birth=ADULT)
+    make_donor(BloodType.O_POSITIVE, city="Mumbai", state="Maharashtra", date_of_birth=ADULT)
+    index = _index(db)
+    # Registered after the build, in a state the index has not seen for Pune
+    index.upsert_donor(Donor(id=1_000_000, blood_type=BloodType.O_POSITIVE, city=" pune ", state="Elsewhere",
+                             date_of_birth=ADULT))
+
+    found = index.search(BloodType.O_POSITIVE, city="Pune", on_date=TODAY)
+
+    assert sorted(donor_id for donor_id, _, _ in found) == [pune.id, 1_000_000]
+    assert [donor_id for donor_id, _, _ in index.search(
+        BloodType.O_POSITIVE, city="Pune", state="Maharashtra", on_date=TODAY
+    )] == [pune.id]
+
+
+def test_record_donation_defers_the_donor(db, make_donor):
+    donor = make_donor(BloodType.O_POSITIVE, city="Pune", state="Maharashtra", date_of_birth=ADULT)
+    index = _index(db)
+
+    index.record_donation(donor.id, BloodType.O_POSITIVE, TODAY)
+
+    assert index.search(BloodType.O_POSITIVE, city="Pune", state="Maharashtra", on_date=TODAY) == []
+    later = TODAY + timedelta(days=91)
+    assert index.search(BloodType.O_POSITIVE, city="Pune", state="Maharashtra", on_date=later)
+
+
+def test_search_during_inserts_sees_consistent_buckets(db, make_donor):
+    make_donor(BloodType.O_POSITIVE, city="Pune", state="Maharashtra", latitude=18.52, longitude=73.85,
+               date_of_birth=ADULT)
+    index = _index(db)
+    stop = threading.Event()
+    errors = []
+
+    def register():
+        donor_id = 1_000_000
+        while not stop.is_set():
+            donor_id += 1
+            index.upsert_donor(Donor(
+                id=donor_id, blood_type=BloodType.O_POSITIVE, city="Pune", state="Maharashtra",
+                latitude=18.52, longitude=73.85, date_of_birth=ADULT,
+            ))
+
+    writer = threading.Thread(target=register)
+    writer.start()
+    try:
+        for _ in range(2000):
+            try:
+                found = index.search(BloodType.O_POSITIVE, latitude=18.52, longitude=73.85, city="Pune",
+                                     state="Maharashtra", on_date=TODAY, limit=5)
+            except ValueError as e:
+                errors.append(e)
+                break
+            assert all(distance is not None and distance < 1 for _, _, distance in found)
+    finally:
+        stop.set()
+        writer.join()
+
+    assert errors == []
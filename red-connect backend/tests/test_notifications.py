@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+from app.database import SessionLocal
+from app.models import Notification, NotificationChannel, NotificationStatus
+from app.notifications import NotificationDispatcher
+from app.notifications.transports import Transport
+
+
+class FlakyTransport(Transport):
+    name = "flaky"
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+        self.delivered = []
+
+    def deliver(self, message) -> None:
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("provider unavailable")
+        self.delivered.append(message.id)
+
+
+def _queued(db, make_donor, make_event) -> Notification:
+    donor = make_donor()
+    notification = Notification(
+        donor_id=donor.id, event_id=make_event().id, channel=NotificationChannel.SMS,
+        status=NotificationStatus.QUEUED, attempts=0,
+    )
+    db.add(notification)
+    db.commit()
+    return notification
+
+
+def _dispatcher(transport: Transport, **options) -> NotificationDispatcher:
+    return NotificationDispatcher(SessionLocal, transports={NotificationChannel.SMS: transport}, **options)
+
+
+def _make_due(db, notification: Notification) -> None:
+    db.query(Notification).filter(Notification.id == notification.id).update(
+        {Notification.next_attempt_at: datetime.utcnow() - timedelta(seconds=1)}
+    )
+    db.commit()
+
+
+def test_retry_delay_doubles_and_is_capped():
+    dispatcher = _dispatcher(FlakyTransport(0), retry_base_seconds=30, retry_max_seconds=100)
+
+    assert [dispatcher.retry_delay(n).total_seconds() for n in (1, 2, 3, 4)] == [30, 60, 100, 100]
+
+
+def test_failed_delivery_is_not_claimed_again_before_its_backoff(db, make_donor, make_event):
+    notification = _queued(db, make_donor, make_event)
+    transport = FlakyTransport(failures=1)
+    dispatcher = _dispatcher(transport, max_attempts=3, retry_base_seconds=60)
+
+    before = datetime.utcnow()
+    assert dispatcher.run_once() == 1
+    db.refresh(notification)
+    assert notification.status == NotificationStatus.QUEUED
+    assert notification.next_attempt_at >= before + timedelta(seconds=60)
+
+    # Not due yet: the next poll leaves it alone
+    assert dispatcher.run_once() == 0
+    assert dispatcher.stats["retried"] == 1
+
+    _make_due(db, notification)
+    assert dispatcher.run_once() == 1
+    db.refresh(notification)
+    assert notification.status == NotificationStatus.SENT
+    assert notification.attempts == 2
+    assert notification.next_attempt_at is None
+    assert transport.delivered == [notification.id]
+
+
+def test_delivery_fails_after_max_attempts(db, make_donor, make_event):
+    notification = _queued(db, make_donor, make_event)
+    dispatcher = _dispatcher(FlakyTransport(failures=10), max_attempts=2, retry_base_seconds=60)
+
+    dispatcher.run_once()
+    _make_due(db, notification)
+    dispatcher.run_once()
+
+    db.refresh(notification)
+    assert notification.status == NotificationStatus.FAILED
+    assert notification.attempts == 2
+    assert dispatcher.stats == {"sent": 0, "failed": 1, "retried": 1}
@@ -0,0 +1,62 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.rate_limit import Limit, MemoryBucketStore, RateLimitMiddleware
+
+LOGIN = "/api/auth/login"
+
+
+async def ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def _client(**limits) -> TestClient:
+    app = RateLimitMiddleware(ok, store=MemoryBucketStore(), trust_forwarded=True, **limits)
+    return TestClient(app)
+
+
+def _login(client: TestClient, ip: str, email: str = "someone@example.com") -> int:
+    return client.post(LOGIN, json={"email": email, "password": "x"}, headers={"X-Forwarded-For": ip}).status_code
+
+
+@pytest.mark.parametrize("value, capacity, rate", [
+    ("10/minute", 10, 10 / 60),
+    ("5/60", 5, 5 / 60),
+    ("2/seconds", 2, 2),
+    ("3", 3, 3),
+])
+def test_parse(value, capacity, rate):
+    limit = Limit.parse(value)
+    assert limit.capacity == capacity
+    assert limit.rate == pytest.approx(rate)
+
+
+@pytest.mark.parametrize("value", ["", "0", "off", None])
+def test_parse_disabled(value):
+    assert Limit.parse(value) is None
+
+
+@pytest.mark.parametrize("value", ["10/0", "10/-60", "-5/minute", "0/minute", "ten/minute", "10/fortnight", "inf/minute"])
+def test_parse_rejects_invalid_limits(value):
+    with pytest.raises(ValueError, match="Invalid rate limit"):
+        Limit.parse(value)
+
+
+def test_throttled_client_does_not_drain_the_route_budget():
+    client = _client(per_ip=Limit(1, 1e-6), per_route=Limit(3, 1e-6))
+
+    assert [_login(client, "10.0.0.1") for _ in range(5)] == [200, 429, 429, 429, 429]
+    # The route bucket lost one token, to the request that passed
+    assert _login(client, "10.0.0.2") == 200
+    assert _login(client, "10.0.0.3") == 200
+    assert _login(client, "10.0.0.4") == 429
+    assert client.app.throttled == {"route": 1, "ip": 4, "email": 0}
+
+
+def test_throttled_email_does_not_drain_the_route_budget():
+    client = _client(per_email=Limit(1, 1e-6), per_route=Limit(2, 1e-6))
+
+    assert [_login(client, f"10.0.1.{i}", "victim@example.com") for i in range(4)] == [200, 429, 429, 429]
+    assert _login(client, "10.0.2.1", "other@example.com") == 200
+    assert client.app.throttled == {"route": 0, "ip": 0, "email": 3}
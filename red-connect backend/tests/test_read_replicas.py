@@ -0,0 +1,48 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+from app import migrations
+from app.database import PRIMARY_PIN_COOKIE, primary_pin, replica_router
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    """An empty, migrated replica: whatever the primary has is missing there."""
+    replica_engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    migrations.upgrade(replica_engine)
+    monkeypatch.setattr(replica_router, "engines", [replica_engine])
+    monkeypatch.setattr(replica_router, "_down_until", [0.0])
+    yield replica_engine
+    replica_engine.dispose()
+
+
+def test_read_after_a_write_goes_to_the_primary(client, auth, make_donor, replica):
+    donor = make_donor()
+    headers = auth(donor.user)
+    assert client.get(f"/api/donors/{donor.id}").status_code == 404
+
+    response = client.put("/api/donors/me", json={"city": "Pune"}, headers=headers)
+    assert response.status_code == 200
+    assert PRIMARY_PIN_COOKIE in response.cookies
+
+    # The pin is in the cookie, so any worker honours it
+    read = client.get(f"/api/donors/{donor.id}")
+    assert read.status_code == 200
+    assert read.json()["city"] == "Pune"
+
+
+def test_failed_writes_expired_and_forged_pins_do_not_pin(client, auth, make_donor, replica):
+    donor = make_donor()
+
+    response = client.put("/api/donors/me", json={"blood_type": "not a type"}, headers=auth(donor.user))
+    assert response.status_code == 422
+    assert PRIMARY_PIN_COOKIE not in response.cookies
+
+    expired = primary_pin(now=time.time() - 60)
+    # A valid signature moved onto a later timestamp
+    forged = f"{time.time() + 3600:.3f}.{primary_pin().rpartition('.')[2]}"
+    for value in (expired, forged):
+        client.cookies.set(PRIMARY_PIN_COOKIE, value)
+        assert client.get(f"/api/donors/{donor.id}").status_code == 404
@@ -0,0 +1,100 @@
+import itertools
+import random
+
+from app.models import BloodType
+from app.transfers import MinCostFlow, SUBSTITUTION_PENALTY_KM, plan_transfers
+
+O_POS, O_NEG, A_POS = BloodType.O_POSITIVE, BloodType.O_NEGATIVE, BloodType.A_POSITIVE
+# One degree of longitude on the equator, in km
+DEGREE_KM = 111.19
+
+
+def _solve(supply, demand, edges):
+    graph = MinCostFlow(supply, demand)
+    ids = [graph.add_edge(u, v, capacity, cost) for u, v, capacity, cost in edges]
+    cost = graph.solve()
+    return cost, [graph.flow_on(edge) for edge in ids]
+
+
+def _brute_force(supply, demand, edges):
+    """(most units routed, least cost for them) over every feasible flow."""
+    best = (0, 0)
+    for flows in itertools.product(*(range(capacity + 1) for _, _, capacity, _ in edges)):
+        sent, received = [0] * len(supply), [0] * len(supply)
+        for (u, v, _, _), flow in zip(edges, flows):
+            sent[u] += flow
+            received[v] += flow
+        if all(s <= supply[n] for n, s in enumerate(sent)) and all(r <= demand[n] for n, r in enumerate(received)):
+            routed = sum(flows)
+            cost = sum(flow * c for (_, _, _, c), flow in zip(edges, flows))
+            if routed > best[0] or (routed == best[0] and cost < best[1]):
+                best = (routed, cost)
+    return best
+
+
+def test_min_cost_flow_reroutes_instead_of_taking_the_nearest_supply():
+    # Nodes 0, 1 supply one unit each, 2 and 3 need one; greedily giving 2 its
+    # nearest supply (0) forces 3 onto a cost-10 edge.
+    edges = [(0, 2, 1, 1), (1, 2, 1, 3), (0, 3, 1, 2), (1, 3, 1, 10)]
+
+    cost, flows = _solve([1, 1, 0, 0], [0, 0, 1, 1], edges)
+
+    assert cost == 5
+    assert flows == [0, 1, 1, 0]
+
+
+def test_min_cost_flow_matches_brute_force():
+    rng = random.Random(7)
+    for _ in range(40):
+        supply = [rng.randint(0, 3), rng.randint(0, 3), 0, 0, 0]
+        demand = [0, 0, rng.randint(0, 3), rng.randint(0, 3), rng.randint(0, 2)]
+        edges = [(u, v, rng.randint(1, 2), rng.randint(0, 20)) for u in (0, 1) for v in (2, 3, 4) if rng.random() < 0.8]
+
+        cost, flows = _solve(supply, demand, edges)
+
+        assert (sum(flows), cost) == _brute_force(supply, demand, edges)
+
+
+def _banks(*positions):
+    return {bank: (0.0, degrees) for bank, degrees in enumerate(positions, start=1)}
+
+
+def test_plan_covers_shortages_from_the_nearest_surplus():
+    coordinates = _banks(0.0, 0.5, 2.0)
+    stock = {(1, O_POS): 2, (2, O_POS): 10, (3, O_POS): 10}
+    targets = {(1, O_POS): 6, (2, O_POS): 8, (3, O_POS): 5}
+
+    plan = plan_transfers(stock, targets, coordinates, radius_km=500)
+
+    assert [(t["from_bank_id"], t["units"]) for t in plan["transfers"]] == [(2, 2), (3, 2)]
+    assert plan["transfers"][0]["distance_km"] == round(0.5 * DEGREE_KM, 1)
+    assert plan["unmet"] == []
+
+
+def test_plan_prefers_the_exact_type_unless_a_substitute_is_much_closer():
+    stock = {(2, O_NEG): 5, (3, O_POS): 5}
+    targets = {(1, O_POS): 1, (2, O_NEG): 0, (3, O_POS): 0}
+
+    def sources(plan):
+        return [(t["from_bank_id"], t["blood_type"], t["for_blood_type"]) for t in plan["transfers"]]
+
+    # O- 11 km away costs 11 + the penalty, more than O+ 22 km away
+    near = _banks(0.0, 0.1, 0.2)
+    assert sources(plan_transfers(stock, targets, near)) == [(3, O_POS, O_POS)]
+
+    # O+ 56 km away is further than O- with the penalty
+    far = _banks(0.0, 0.1, 0.5)
+    assert 0.1 * DEGREE_KM + SUBSTITUTION_PENALTY_KM < 0.5 * DEGREE_KM
+    assert sources(plan_transfers(stock, targets, far)) == [(2, O_NEG, O_POS)]
+    assert sources(plan_transfers(stock, targets, far, allow_substitutions=False)) == [(3, O_POS, O_POS)]
+
+
+def test_plan_never_substitutes_an_incompatible_type_or_leaves_the_radius():
+    coordinates = _banks(0.0, 0.1, 5.0)
+    stock = {(2, A_POS): 10, (3, O_POS): 10}
+    targets = {(1, O_POS): 3, (2, A_POS): 0, (3, O_POS): 0}
+
+    plan = plan_transfers(stock, targets, coordinates, radius_km=100)
+
+    assert plan["transfers"] == []
+    assert plan["unmet"] == [{"blood_bank_id": 1, "blood_type": O_POS, "units": 3}]
@@ -0,0 +1,79 @@
+from app.models import (
+    Event,
+    EventRegistration,
+    Notification,
+    NotificationKind,
+    RegistrationStatus,
+)
+
+
+def _register(client, auth, donor, event_id: int) -> dict:
+    response = client.post(f"/api/events/{event_id}/register", headers=auth(donor.user))
+    assert response.status_code == 200
+    return response.json()
+
+
+def _registered(db, event_id: int) -> list:
+    db.expire_all()
+    return [donor_id for (donor_id,) in db.query(EventRegistration.donor_id).filter(
+        EventRegistration.event_id == event_id, EventRegistration.status == RegistrationStatus.REGISTERED,
+    ).order_by(EventRegistration.donor_id)]
+
+
+def test_full_event_puts_donors_on_the_waitlist_in_order(client, auth, db, make_donor, make_event):
+    event = make_event(max_participants=2)
+    donors = [make_donor() for _ in range(4)]
+
+    results = [_register(client, auth, donor, event.id) for donor in donors]
+
+    assert [r["status"] for r in results] == ["registered", "registered", "waitlisted", "waitlisted"]
+    assert [r["waitlist_position"] for r in results] == [None, None, 1, 2]
+    db.refresh(event)
+    assert event.registered_participants == 2
+
+
+def test_cancellation_promotes_the_head_of_the_waitlist(client, auth, db, make_donor, make_event):
+    event = make_event(max_participants=2)
+    donors = [make_donor() for _ in range(4)]
+    event_id, donor_ids = event.id, [donor.id for donor in donors]
+    for donor in donors:
+        _register(client, auth, donor, event_id)
+
+    assert client.delete(f"/api/events/{event_id}/register", headers=auth(donors[0].user)).status_code == 204
+
+    assert _registered(db, event_id) == [donor_ids[1], donor_ids[2]]
+    assert db.get(Event, event_id).registered_participants == 2
+    promoted = db.query(Notification.donor_id).filter(Notification.kind == NotificationKind.WAITLIST_PROMOTED)
+    assert {donor_id for (donor_id,) in promoted} == {donor_ids[2]}
+    mine = client.get(f"/api/events/{event_id}/register", headers=auth(donors[3].user)).json()
+    assert mine["waitlist_position"] == 1
+
+
+def test_leaving_the_waitlist_frees_no_place(client, auth, db, make_donor, make_event):
+    event = make_event(max_participants=1)
+    donors = [make_donor() for _ in range(3)]
+    event_id, donor_ids = event.id, [donor.id for donor in donors]
+    for donor in donors:
+        _register(client, auth, donor, event_id)
+
+    client.delete(f"/api/events/{event_id}/register", headers=auth(donors[1].user))
+
+    assert _registered(db, event_id) == [donor_ids[0]]
+    mine = client.get(f"/api/events/{event_id}/register", headers=auth(donors[2].user)).json()
+    assert mine["waitlist_position"] == 1
+
+
+def test_raising_capacity_promotes_as_many_as_fit(client, auth, db, organizer, make_donor, make_event):
+    event = make_event(max_participants=1)
+    donors = [make_donor() for _ in range(4)]
+    event_id, donor_ids = event.id, [donor.id for donor in donors]
+    for donor in donors:
+        _register(client, auth, donor, event_id)
+
+    response = client.put(f"/api/events/{event_id}", json={"max_participants": 3}, headers=auth(organizer.user))
+
+    assert response.status_code == 200
+    assert response.json()["registered_participants"] == 3
+    assert _registered(db, event_id) == donor_ids[:3]
+    mine = client.get(f"/api/events/{event_id}/register", headers=auth(donors[3].user)).json()
+    assert mine["waitlist_position"] == 1